@@ -4,6 +4,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 import os
 
+from core import database
 from core.jwt_manager import JWTManager
 from services.auth_service import AuthService
 from services.workflow_service import WorkflowService
@@ -28,6 +29,24 @@ def get_database_url():
     return f"postgresql://{user}:{password}@{host}:{port}/{dbname}?sslmode=prefer"
 
 
+def get_database_read_url():
+    """Get read replica URL from environment, or None when reads go to the primary."""
+    return os.getenv("DATABASE_READ_URL") or None
+
+
+async def get_db_pool():
+    """Get the shared database connection pool."""
+    return await database.get_pool(get_database_url())
+
+
+async def get_read_pool():
+    """Get the read replica connection pool, if a replica is configured."""
+    read_url = get_database_read_url()
+    if read_url is None:
+        return None
+    return await database.get_pool(read_url, name="replica")
+
+
 def get_jwt_manager():
     """Get JWT manager instance."""
     if not os.getenv("JWT_SECRET"):
@@ -35,19 +54,19 @@ def get_jwt_manager():
     return JWTManager()
 
 
-def get_auth_service():
+async def get_auth_service():
     """Get auth service instance."""
-    return AuthService(get_database_url())
+    return AuthService(get_database_url(), await get_db_pool())
 
 
-def get_workflow_service():
+async def get_workflow_service():
     """Get workflow service instance."""
-    return WorkflowService(get_database_url())
+    return WorkflowService(get_database_url(), await get_db_pool(), await get_read_pool())
 
 
-def get_orchestration_service():
+async def get_orchestration_service():
     """Get orchestration service instance."""
-    return OrchestrationService(get_database_url())
+    return OrchestrationService(get_database_url(), await get_db_pool(), await get_read_pool())
 
 
 async def get_current_user(
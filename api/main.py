@@ -1,13 +1,16 @@
 """FastAPI application for IDE Orchestrator."""
 
+import asyncio
 import os
 from fastapi import FastAPI, Depends
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
 
 from api.routers import auth, health, workflows, refinements, websockets
-from api.dependencies import get_current_user
+from api.dependencies import get_current_user, get_database_read_url, get_database_url
+from core import database, http_client, load_balancer, stream_hub, warmup
 from core.metrics import metrics
+from services import cleanup_queue
 
 
 @asynccontextmanager
@@ -18,10 +21,50 @@ async def lifespan(app: FastAPI):
     metrics.start_metrics_server(metrics_port)
     print(f"🔢 Prometheus metrics server started on port {metrics_port}")
     
+    pool = await database.init_pool(get_database_url())
+    print("🗄️  Database connection pool opened")
+    
+    await http_client.init_http_client()
+    print("🌐 deepagents-runtime HTTP client opened")
+    
+    health_monitor = None
+    balancer = load_balancer.get_load_balancer()
+    if len(balancer.instances) > 1:
+        health_monitor = asyncio.create_task(
+            load_balancer.monitor_health(balancer, http_client.get_http_client())
+        )
+        print(f"⚖️  Balancing across {len(balancer.instances)} deepagents-runtime instances")
+    
+    cleanup_queue.start_worker(get_database_url(), pool)
+    print("🧹 Cleanup queue worker started")
+    
+    lag_monitor = None
+    pools = [pool]
+    if read_url := get_database_read_url():
+        read_pool = await database.init_pool(read_url, name="replica")
+        pools.append(read_pool)
+        lag_monitor = asyncio.create_task(database.monitor_replica_lag(read_pool))
+        print("🗄️  Read replica connection pool opened")
+    
+    # /ready reports ready once warm-up finishes; liveness is unaffected
+    warmup_task = asyncio.create_task(warmup.warm_up(pools, http_client.get_http_client()))
+    print("🔥 Startup warm-up started")
+    
     yield
     
     # Shutdown
     print("🔄 Application shutting down...")
+    warmup.reset()
+    warmup_task.cancel()
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+    if health_monitor is not None:
+        health_monitor.cancel()
+    await stream_hub.close_stream_hub()
+    await websockets.drain_background_tasks()
+    await cleanup_queue.stop_worker()
+    await http_client.close_http_client()
+    await database.close_pool()
 
 
 app = FastAPI(
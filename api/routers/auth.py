@@ -19,7 +19,7 @@ async def login(
     jwt_manager: JWTManager = Depends(get_jwt_manager),
 ):
     """Login endpoint."""
-    user = auth_service.authenticate_user(login_request.email, login_request.password)
+    user = await auth_service.authenticate_user(login_request.email, login_request.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
@@ -1,6 +1,9 @@
 """Health check endpoints."""
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from core import warmup
 
 router = APIRouter(prefix="/api", tags=["health"])
 
@@ -11,10 +14,20 @@ async def health():
     return {"status": "healthy"}
 
 
+def _readiness():
+    """Ready once startup warm-up has finished, 503 with per-step progress before."""
+    if warmup.is_ready():
+        return {"status": "ready"}
+    return JSONResponse(
+        status_code=503,
+        content={"status": "warming_up", "steps": warmup.get_results()}
+    )
+
+
 @router.get("/ready")
 async def ready():
     """Readiness check endpoint."""
-    return {"status": "ready"}
+    return _readiness()
 
 
 # Root level health endpoint for Kubernetes probes
@@ -30,4 +43,4 @@ async def health_root():
 @health_router.get("/ready")
 async def ready_root():
     """Readiness check endpoint at root level."""
-    return {"status": "ready"}
\ No newline at end of file
+    return _readiness()
\ No newline at end of file
@@ -1,8 +1,12 @@
 """Refinement workflow endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from datetime import datetime
+from typing import Optional
 
+from core import admission, database
+from core.locking import LockConflictError
+from core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from services.workflow_service import WorkflowService
 from services.orchestration_service import OrchestrationService
 from api.dependencies import get_workflow_service, get_orchestration_service, get_current_user
@@ -18,9 +22,14 @@ async def create_refinement(
     workflow_service: WorkflowService = Depends(get_workflow_service),
     orchestration_service: OrchestrationService = Depends(get_orchestration_service),
 ):
-    """Create a refinement for a workflow."""
+    """
+    Create a refinement for a workflow.
+    
+    Proposal creation passes admission control; requests over the rate or
+    concurrency limits get 429 with Retry-After.
+    """
     # Validate workflow access
-    workflow = workflow_service.get_workflow(workflow_id, current_user["user_id"])
+    workflow = await workflow_service.get_workflow(workflow_id, current_user["user_id"])
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
@@ -35,13 +44,15 @@ async def create_refinement(
         )
         
         # Create refinement proposal
-        proposal_id, thread_id = await orchestration_service.create_refinement_proposal(
-            draft_id=draft_id,
-            user_id=current_user["user_id"],
-            user_prompt=refinement_data["instructions"],
-            context_file_path=refinement_data.get("context_file_path"),
-            context_selection=refinement_data.get("context_selection")
-        )
+        async with admission.get_admission_controller().admit(current_user["user_id"]):
+            proposal_id, thread_id = await orchestration_service.create_refinement_proposal(
+                draft_id=draft_id,
+                user_id=current_user["user_id"],
+                user_prompt=refinement_data["instructions"],
+                context_file_path=refinement_data.get("context_file_path"),
+                context_selection=refinement_data.get("context_selection")
+            )
+        database.record_write(current_user["user_id"])
         
         # Return response matching Go implementation format
         return {
@@ -52,6 +63,12 @@ async def create_refinement(
             "created_at": datetime.utcnow().isoformat() + "Z"
         }
         
+    except admission.AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": e.retry_after_header}
+        )
+    except LockConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail=str(e))
@@ -66,6 +83,28 @@ async def create_refinement(
             raise HTTPException(status_code=500, detail="Failed to create refinement proposal")
 
 
+@router.get("/workflows/{workflow_id}/proposals", status_code=200)
+async def list_proposals(
+    workflow_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user=Depends(get_current_user),
+    workflow_service: WorkflowService = Depends(get_workflow_service),
+    orchestration_service: OrchestrationService = Depends(get_orchestration_service),
+):
+    """List proposals on a workflow's draft, newest first."""
+    # Validate workflow access
+    workflow = await workflow_service.get_workflow(workflow_id, current_user["user_id"])
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    try:
+        with database.read_your_writes(current_user["user_id"]):
+            return await orchestration_service.list_workflow_proposals(workflow_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/refinements/{proposal_id}/approve", status_code=200)
 async def approve_proposal(
     proposal_id: str,
@@ -74,7 +113,8 @@ async def approve_proposal(
 ):
     """Approve a refinement proposal."""
     try:
-        orchestration_service.approve_proposal(proposal_id, current_user["user_id"])
+        await orchestration_service.approve_proposal(proposal_id, current_user["user_id"])
+        database.record_write(current_user["user_id"])
         
         return {
             "proposal_id": proposal_id,
@@ -85,6 +125,8 @@ async def approve_proposal(
     except ValueError as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail="Proposal not found")
+        elif "already resolved" in str(e).lower():
+            raise HTTPException(status_code=409, detail="Proposal is already resolved")
         elif "not ready" in str(e).lower():
             raise HTTPException(status_code=400, detail="Proposal is not ready for approval")
         else:
@@ -99,7 +141,8 @@ async def reject_proposal(
 ):
     """Reject a refinement proposal."""
     try:
-        orchestration_service.reject_proposal(proposal_id, current_user["user_id"])
+        await orchestration_service.reject_proposal(proposal_id, current_user["user_id"])
+        database.record_write(current_user["user_id"])
         
         return {
             "proposal_id": proposal_id,
@@ -109,6 +152,8 @@ async def reject_proposal(
     except ValueError as e:
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail="Proposal not found")
+        elif "already resolved" in str(e).lower():
+            raise HTTPException(status_code=409, detail="Proposal is already resolved")
         else:
             raise HTTPException(status_code=500, detail="Failed to reject proposal")
 
@@ -121,10 +166,12 @@ async def get_proposal(
 ):
     """Get proposal details and generated files."""
     # Validate access
-    if not orchestration_service.can_access_proposal(proposal_id, current_user["user_id"]):
+    if not await orchestration_service.can_access_proposal(proposal_id, current_user["user_id"]):
         raise HTTPException(status_code=403, detail="Access denied to proposal")
     
-    proposal = orchestration_service.get_proposal(proposal_id)
+    # A proposal is read right after create_refinement; keep that on the primary
+    with database.read_your_writes(current_user["user_id"]):
+        proposal = await orchestration_service.get_proposal(proposal_id)
     if not proposal:
         raise HTTPException(status_code=404, detail="Proposal not found")
     
@@ -1,23 +1,47 @@
 """WebSocket endpoints for real-time streaming."""
 
-import json
 import asyncio
 import logging
 import os
-from typing import Optional
+from typing import Any, Dict, Literal, Optional, Set
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Query, Header
 from fastapi.security import HTTPBearer
-import websockets
 import httpx
 
+from core import load_balancer, polling, state_cache
 from core.jwt_manager import JWTManager
 from core.metrics import metrics
+from core.stream_frames import encode_batch, sniff_event_type
+from core.stream_hub import RESYNC_EVENT_TYPE, SLOW_CLIENT_CLOSE_CODE, Subscription, get_stream_hub
 from services.orchestration_service import OrchestrationService
 from api.dependencies import get_jwt_manager, get_orchestration_service, get_database_url
 
 router = APIRouter(prefix="/api/ws", tags=["websockets"])
 logger = logging.getLogger(__name__)
 
+# Subprotocol a client offers to receive on_llm_stream events in array frames
+BATCH_SUBPROTOCOL = "deepagents.batch.v1"
+
+# Proposal updates spawned by the proxy. Retained so they are not garbage
+# collected mid-flight and can be drained before the database pool closes.
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _spawn_background_task(coro) -> asyncio.Task:
+    """Start a tracked background task."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def drain_background_tasks(timeout: float = 10.0) -> None:
+    """Wait for in-flight proposal updates on the running loop to finish."""
+    loop = asyncio.get_running_loop()
+    pending = [task for task in _background_tasks if task.get_loop() is loop]
+    if pending:
+        await asyncio.wait(pending, timeout=timeout)
+
 
 async def validate_websocket_auth(
     websocket: WebSocket,
@@ -54,22 +78,38 @@ async def validate_websocket_auth(
         return None
 
 
-async def can_access_thread(user_id: str, thread_id: str) -> bool:
-    """Check if user can access the specified thread_id."""
+async def get_thread_access(user_id: str, thread_id: str) -> Optional[Dict[str, Any]]:
+    """Resolve the user's access to thread_id, or None if denied."""
     try:
-        orchestration_service = get_orchestration_service()
+        orchestration_service = await get_orchestration_service()
         
-        # Check if there's a proposal with this thread_id that the user can access
-        proposal = orchestration_service.get_proposal_by_thread_id(thread_id)
-        if not proposal:
-            return False
-        
-        # Check if user has access to this proposal
-        return orchestration_service.can_access_proposal(proposal["id"], user_id)
+        # Resolve the thread's proposal and the user's access grant in one query
+        return await orchestration_service.get_thread_access(thread_id, user_id)
         
     except Exception as e:
         logger.error(f"Error checking thread access: {e}")
-        return False
+        return None
+
+
+async def can_access_thread(user_id: str, thread_id: str) -> bool:
+    """Check if user can access the specified thread_id."""
+    return await get_thread_access(user_id, thread_id) is not None
+
+
+def get_runtime_ws_url(thread_id: str, runtime_endpoint: Optional[str]) -> str:
+    """
+    WebSocket base URL of the runtime instance serving a thread.
+    
+    DEEPAGENTS_RUNTIME_WS_URL overrides it for single-instance deployments;
+    otherwise the URL is derived from the instance the thread is pinned to.
+    """
+    if ws_url := os.getenv("DEEPAGENTS_RUNTIME_WS_URL"):
+        return ws_url
+    
+    balancer = load_balancer.get_load_balancer()
+    balancer.pin(thread_id, runtime_endpoint)
+    base_url = balancer.route(thread_id)
+    return base_url.replace("http://", "ws://").replace("https://", "wss://")
 
 
 @router.websocket("/refinements/{thread_id}")
@@ -77,7 +117,10 @@ async def stream_refinement(
     websocket: WebSocket,
     thread_id: str,
     token: Optional[str] = Query(None),
-    authorization: Optional[str] = Header(None)
+    authorization: Optional[str] = Header(None),
+    since: Optional[int] = Query(None, ge=0),
+    batch: bool = Query(False),
+    delta: Optional[Literal["files", "lines"]] = Query(None)
 ):
     """
     WebSocket endpoint to stream real-time progress from deepagents-runtime.
@@ -85,8 +128,25 @@ async def stream_refinement(
     Authentication via:
     - Query parameter: ?token=<jwt_token>
     - Authorization header: Authorization: Bearer <jwt_token>
+    
+    Events carry a ``seq`` number. A client reconnecting with ?since=<seq>
+    first receives the buffered events it missed, or a ``replay_gap`` event
+    if some were already evicted.
+    
+    Clients opting in with ?batch=true or the ``deepagents.batch.v1``
+    subprotocol receive consecutive on_llm_stream events as JSON array frames.
+    
+    With ?delta=files, on_state_update events carry ``data.files_delta``
+    (added, changed and removed paths since the state at ``base_seq``)
+    instead of the full ``data.files``; ?delta=lines sends changed files as
+    line patches. The first state update after connecting is sent in full,
+    and a ``{"event_type": "resync"}`` message returns a ``files_snapshot``.
     """
-    await websocket.accept()
+    if BATCH_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        batch = True
+        await websocket.accept(subprotocol=BATCH_SUBPROTOCOL)
+    else:
+        await websocket.accept()
     
     # Record WebSocket connection metrics
     metrics.record_websocket_connection(thread_id)
@@ -100,39 +160,23 @@ async def stream_refinement(
         logger.info(f"WebSocket connection for thread_id: {thread_id}, user_id: {user_id}")
         
         # Verify user can access this thread_id
-        if not await can_access_thread(user_id, thread_id):
+        access = await get_thread_access(user_id, thread_id)
+        if access is None:
             logger.warning(f"Access denied for user {user_id} to thread {thread_id}")
             await websocket.close(code=1008, reason="Access denied to thread")
             return
         
-        # Connect to deepagents-runtime WebSocket using environment variable
-        # Use separate WS URL if provided, otherwise derive from HTTP URL
-        deepagents_ws_url = os.getenv("DEEPAGENTS_RUNTIME_WS_URL")
-        if not deepagents_ws_url:
-            deepagents_base_url = os.getenv("DEEPAGENTS_RUNTIME_URL", "http://deepagents-runtime:8000")
-            # Convert HTTP URL to WebSocket URL
-            deepagents_ws_url = deepagents_base_url.replace("http://", "ws://").replace("https://", "wss://")
+        # Subscribe to the thread's shared stream from the instance that owns it
+        deepagents_ws_url = get_runtime_ws_url(thread_id, access.get("runtime_endpoint"))
+        ws_url = f"{deepagents_ws_url}/stream/{thread_id}"
         
-        try:
-            # Connect to deepagents WebSocket endpoint
-            ws_url = f"{deepagents_ws_url}/stream/{thread_id}"
-            logger.info(f"Attempting WebSocket connection to: {ws_url}")
-            
-            async with websockets.connect(ws_url) as deepagents_ws:
-                logger.info(f"Connected to deepagents-runtime WebSocket for thread: {thread_id}")
-                
-                # Start bidirectional proxying
-                await proxy_websocket_with_state_extraction(
-                    websocket, deepagents_ws, thread_id, user_id
-                )
-                
-        except Exception as e:
-            logger.error(f"Failed to connect to deepagents-runtime: {e}")
-            # Send error to client
-            await websocket.send_json({
-                "event_type": "error",
-                "data": {"error": "Failed to connect to AI service"}
-            })
+        async with get_stream_hub().subscribe(
+            thread_id, ws_url, on_end=handle_stream_end, on_error=handle_stream_error,
+            since=since, delta=delta
+        ) as subscription:
+            await proxy_websocket_with_state_extraction(
+                websocket, subscription, thread_id, user_id, batch=batch
+            )
             
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for thread: {thread_id}")
@@ -147,14 +191,35 @@ async def stream_refinement(
         metrics.record_websocket_disconnection(thread_id)
 
 
+def handle_stream_end(thread_id: str, files: dict) -> None:
+    """Finalize a thread whose stream ended; called once per thread by the stream hub."""
+    logger.info(f"Stream ended for thread: {thread_id}, updating proposal with files")
+    state_cache.invalidate(thread_id)
+    polling.notify_stream_completion(thread_id)
+    # Update proposal with final files in background
+    _spawn_background_task(update_proposal_with_files(thread_id, files))
+
+
+def handle_stream_error(thread_id: str, error_message: str) -> None:
+    """Mark the proposal failed when its stream breaks mid-way."""
+    _spawn_background_task(update_proposal_status_to_failed(thread_id, error_message))
+
+
 async def proxy_websocket_with_state_extraction(
     client_ws: WebSocket,
-    deepagents_ws,
+    subscription: Subscription,
     thread_id: str,
-    user_id: str
+    user_id: str,
+    batch: bool = False
 ):
-    """Handle bidirectional WebSocket proxying with state extraction."""
-    final_files = {}
+    """
+    Proxy between a client and its subscription to the thread's shared stream.
+    
+    Files are extracted and the proposal finalized by the stream hub, once per
+    thread; this side only relays messages for one client. With ``batch``,
+    runs of on_llm_stream events are sent as one array frame. State updates
+    are delta encoded per the subscription's ``delta`` mode.
+    """
     
     async def client_to_deepagents():
         """Forward messages from client to deepagents-runtime."""
@@ -162,8 +227,11 @@ async def proxy_websocket_with_state_extraction(
             while True:
                 # Receive message from client
                 message = await client_ws.receive_text()
+                if subscription.delta is not None and sniff_event_type(message) == RESYNC_EVENT_TYPE:
+                    subscription.resync()
+                    continue
                 # Forward to deepagents-runtime
-                await deepagents_ws.send(message)
+                await subscription.send(message)
                 logger.debug(f"Forwarded client message to deepagents-runtime for thread: {thread_id}")
         except WebSocketDisconnect:
             logger.info(f"Client disconnected for thread: {thread_id}")
@@ -171,49 +239,41 @@ async def proxy_websocket_with_state_extraction(
             logger.error(f"Client->DeepAgents proxy error for thread {thread_id}: {e}")
     
     async def deepagents_to_client():
-        """Forward events from deepagents-runtime to client and extract state."""
-        nonlocal final_files
+        """Forward queued events to the client until the stream closes."""
         try:
-            async for message in deepagents_ws:
-                try:
-                    event = json.loads(message)
-                    logger.debug(f"Received event from deepagents-runtime for thread {thread_id}: {event.get('event_type')}")
-                    
-                    # Extract files from on_state_update events
-                    if event.get("event_type") == "on_state_update":
-                        if "files" in event.get("data", {}):
-                            final_files = event["data"]["files"]
-                            logger.info(f"Extracted {len(final_files)} files from on_state_update for thread: {thread_id}")
-                    
-                    # Forward event to client
-                    await client_ws.send_json(event)
-                    
-                    # Handle completion
-                    if event.get("event_type") == "end":
-                        logger.info(f"Received end event for thread: {thread_id}, updating proposal with files")
-                        # Update proposal with final files in background
-                        asyncio.create_task(update_proposal_with_files(thread_id, final_files))
-                        break
-                        
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse deepagents message: {e}")
-                except Exception as e:
-                    logger.error(f"Error processing deepagents message: {e}")
-                    
+            if batch:
+                settings = get_stream_hub().settings
+                while (events := await subscription.next_batch(
+                    settings["batch_max_events"], settings["batch_window"]
+                )) is not None:
+                    if events[0].event_type == "on_llm_stream":
+                        await client_ws.send_text(encode_batch(events))
+                    else:
+                        await client_ws.send_text(subscription.frame(events[0]))
+            else:
+                while (event := await subscription.next_event()) is not None:
+                    # Forward the frame text as received unless it is delta encoded
+                    await client_ws.send_text(subscription.frame(event))
+            if subscription.overflowed:
+                logger.warning(f"Disconnecting slow client for thread {thread_id} at seq {subscription.last_seq}")
+                await client_ws.close(
+                    code=SLOW_CLIENT_CLOSE_CODE,
+                    reason=f"Client too slow; reconnect with ?since={subscription.last_seq}"
+                )
         except Exception as e:
             logger.error(f"DeepAgents->Client proxy error for thread {thread_id}: {e}")
-            # Update proposal status to failed
-            asyncio.create_task(update_proposal_status_to_failed(thread_id, str(e)))
     
-    # Run both proxy directions concurrently
+    # Run both directions until the client leaves or the stream closes
+    tasks = [
+        asyncio.create_task(client_to_deepagents()),
+        asyncio.create_task(deepagents_to_client())
+    ]
     try:
-        await asyncio.gather(
-            client_to_deepagents(),
-            deepagents_to_client(),
-            return_exceptions=True
-        )
-    except Exception as e:
-        logger.error(f"WebSocket proxy error for thread {thread_id}: {e}")
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     
     logger.info(f"WebSocket proxy session ended for thread: {thread_id}")
 
@@ -221,7 +281,7 @@ async def proxy_websocket_with_state_extraction(
 async def update_proposal_with_files(thread_id: str, files: dict):
     """Update the proposal with generated files."""
     try:
-        orchestration_service = get_orchestration_service()
+        orchestration_service = await get_orchestration_service()
         
         # Update the proposal in the database using the orchestration service
         logger.info(f"Updating proposal for thread {thread_id} with {len(files)} files")
@@ -238,7 +298,7 @@ async def update_proposal_with_files(thread_id: str, files: dict):
 async def update_proposal_status_to_failed(thread_id: str, error_message: str):
     """Update the proposal status to failed with error details."""
     try:
-        orchestration_service = get_orchestration_service()
+        orchestration_service = await get_orchestration_service()
         
         # Update the proposal status in the database
         logger.info(f"Updating proposal for thread {thread_id} to failed status: {error_message}")
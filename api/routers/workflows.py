@@ -1,8 +1,13 @@
 """Workflow management endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from models.workflow import WorkflowCreate, WorkflowResponse
+from core import database
+from core.locking import LockConflictError
+from core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from services.workflow_service import WorkflowService
 from api.dependencies import get_workflow_service, get_current_user
 
@@ -16,14 +21,30 @@ async def create_workflow(
     workflow_service: WorkflowService = Depends(get_workflow_service),
 ):
     """Create a new workflow."""
-    result = workflow_service.create_workflow(
+    result = await workflow_service.create_workflow(
         name=workflow.name,
         user_id=current_user["user_id"],
         description=workflow.description,
     )
+    database.record_write(current_user["user_id"])
     return result
 
 
+@router.get("")
+async def list_workflows(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user=Depends(get_current_user),
+    workflow_service: WorkflowService = Depends(get_workflow_service),
+):
+    """List the current user's workflows, newest first."""
+    try:
+        with database.read_your_writes(current_user["user_id"]):
+            return await workflow_service.list_workflows(current_user["user_id"], limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
 async def get_workflow(
     workflow_id: str,
@@ -31,7 +52,7 @@ async def get_workflow(
     workflow_service: WorkflowService = Depends(get_workflow_service),
 ):
     """Get a workflow by ID."""
-    result = workflow_service.get_workflow(workflow_id, current_user["user_id"])
+    result = await workflow_service.get_workflow(workflow_id, current_user["user_id"])
     if not result:
         # Return 404 for both non-existent workflows and access denied cases
         # This prevents information disclosure about workflow existence
@@ -42,17 +63,22 @@ async def get_workflow(
 @router.get("/{workflow_id}/versions")
 async def get_versions(
     workflow_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user=Depends(get_current_user),
     workflow_service: WorkflowService = Depends(get_workflow_service),
 ):
-    """Get all versions for a workflow."""
+    """Get versions for a workflow, newest first."""
     # Validate workflow access
-    workflow = workflow_service.get_workflow(workflow_id, current_user["user_id"])
+    workflow = await workflow_service.get_workflow(workflow_id, current_user["user_id"])
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
-    versions = workflow_service.get_versions(workflow_id)
-    return {"versions": versions}
+    try:
+        with database.read_your_writes(current_user["user_id"]):
+            return await workflow_service.get_versions(workflow_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{workflow_id}/versions/{version_number}")
@@ -64,11 +90,12 @@ async def get_version(
 ):
     """Get a specific version of a workflow."""
     # Validate workflow access
-    workflow = workflow_service.get_workflow(workflow_id, current_user["user_id"])
+    workflow = await workflow_service.get_workflow(workflow_id, current_user["user_id"])
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
-    version = workflow_service.get_version(workflow_id, version_number)
+    with database.read_your_writes(current_user["user_id"]):
+        version = await workflow_service.get_version(workflow_id, version_number)
     if not version:
         raise HTTPException(status_code=404, detail="Version not found")
     
@@ -83,17 +110,20 @@ async def publish_draft(
 ):
     """Publish draft as a new version."""
     # Validate workflow access
-    workflow = workflow_service.get_workflow(workflow_id, current_user["user_id"])
+    workflow = await workflow_service.get_workflow(workflow_id, current_user["user_id"])
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     try:
-        version = workflow_service.publish_draft(workflow_id, current_user["user_id"])
+        version = await workflow_service.publish_draft(workflow_id, current_user["user_id"])
+        database.record_write(current_user["user_id"])
         return {
             "version_id": version["id"],
             "version_number": version["version_number"],
             "message": "Draft published successfully"
         }
+    except LockConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -106,13 +136,15 @@ async def discard_draft(
 ):
     """Discard the current draft."""
     # Validate workflow access
-    workflow = workflow_service.get_workflow(workflow_id, current_user["user_id"])
+    workflow = await workflow_service.get_workflow(workflow_id, current_user["user_id"])
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     try:
-        workflow_service.discard_draft(workflow_id, current_user["user_id"])
+        await workflow_service.discard_draft(workflow_id, current_user["user_id"])
         return {"message": "Draft discarded successfully"}
+    except LockConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -126,7 +158,7 @@ async def deploy_version(
 ):
     """Deploy a version to production."""
     # Validate workflow access
-    workflow = workflow_service.get_workflow(workflow_id, current_user["user_id"])
+    workflow = await workflow_service.get_workflow(workflow_id, current_user["user_id"])
     if not workflow:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
@@ -135,13 +167,16 @@ async def deploy_version(
         raise HTTPException(status_code=400, detail="version_number is required")
     
     try:
-        deployment = workflow_service.deploy_version(
+        deployment = await workflow_service.deploy_version(
             workflow_id, version_number, current_user["user_id"]
         )
+        database.record_write(current_user["user_id"])
         return {
             "deployment_id": deployment["id"],
             "status": deployment["status"],
             "message": "Deployment initiated successfully"
         }
+    except LockConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
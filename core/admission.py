@@ -0,0 +1,201 @@
+"""
+Admission control for refinement requests.
+
+Each refinement invokes a deepagents-runtime job, so a single user scripting
+the refinements endpoint can saturate the runtime for everyone. Requests pass
+token-bucket rate limits (global and per user) and then wait, in a bounded
+queue, for a concurrency slot under both the global and the per-user limit.
+Requests that cannot be admitted are rejected with a retry hint instead of
+piling up.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from core.metrics import metrics
+
+# One controller per event loop; its condition variable is loop-bound
+_controllers: Dict[asyncio.AbstractEventLoop, "AdmissionController"] = {}
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is not admitted; carries the suggested retry delay."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many refinement requests ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value in whole seconds, at least 1."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+def get_admission_settings() -> Dict[str, Any]:
+    """
+    Read admission control settings from environment variables.
+
+    Rates are tokens per second; a rate of 0 disables that bucket.
+    """
+    return {
+        "max_concurrency": int(os.getenv("REFINEMENT_MAX_CONCURRENCY", "32")),
+        "max_concurrency_per_user": int(os.getenv("REFINEMENT_MAX_CONCURRENCY_PER_USER", "4")),
+        "rate": float(os.getenv("REFINEMENT_RATE", "0")),
+        "burst": float(os.getenv("REFINEMENT_BURST", "50")),
+        "user_rate": float(os.getenv("REFINEMENT_USER_RATE", "1")),
+        "user_burst": float(os.getenv("REFINEMENT_USER_BURST", "10")),
+        "max_queue": int(os.getenv("REFINEMENT_MAX_QUEUE", "64")),
+        "queue_timeout": float(os.getenv("REFINEMENT_QUEUE_TIMEOUT", "5")),
+        "max_tracked_users": int(os.getenv("REFINEMENT_MAX_TRACKED_USERS", "10000")),
+    }
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def retry_after(self) -> float:
+        """Seconds until a token is available; 0 if one is available now."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+
+class AdmissionController:
+    """Rate limits and concurrency slots for refinement requests."""
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or get_admission_settings()
+        self.global_bucket = (
+            TokenBucket(self.settings["rate"], self.settings["burst"])
+            if self.settings["rate"] > 0 else None
+        )
+        self._user_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.in_flight = 0
+        self._user_in_flight: Dict[str, int] = {}
+        self.queued = 0
+        self._slots = asyncio.Condition()
+
+    def _user_bucket(self, user_id: str) -> Optional[TokenBucket]:
+        if self.settings["user_rate"] <= 0:
+            return None
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.settings["user_rate"], self.settings["user_burst"])
+            self._user_buckets[user_id] = bucket
+            while len(self._user_buckets) > self.settings["max_tracked_users"]:
+                self._user_buckets.popitem(last=False)
+        self._user_buckets.move_to_end(user_id)
+        return bucket
+
+    def _reject(self, reason: str, retry_after: float, waited: Optional[float] = None) -> None:
+        metrics.record_admission_rejection(reason)
+        if waited is not None:
+            metrics.record_admission_wait("rejected", waited)
+        raise AdmissionRejectedError(reason, retry_after)
+
+    def _check_rate(self, user_id: str) -> None:
+        """Spend a token from the user's and the global bucket, or reject."""
+        user_bucket = self._user_bucket(user_id)
+        if user_bucket is not None and (delay := user_bucket.retry_after()):
+            self._reject("user_rate", delay)
+        if self.global_bucket is not None and (delay := self.global_bucket.retry_after()):
+            self._reject("global_rate", delay)
+        if user_bucket is not None:
+            user_bucket.take()
+        if self.global_bucket is not None:
+            self.global_bucket.take()
+
+    def _has_slot(self, user_id: str) -> bool:
+        return (
+            self.in_flight < self.settings["max_concurrency"]
+            and self._user_in_flight.get(user_id, 0) < self.settings["max_concurrency_per_user"]
+        )
+
+    def _record_load(self) -> None:
+        metrics.record_admission_load(self.in_flight, self.queued)
+
+    @asynccontextmanager
+    async def admit(self, user_id: str) -> AsyncIterator[None]:
+        """
+        Hold an admission slot for the duration of the block.
+
+        Args:
+            user_id: User the request is made for
+
+        Raises:
+            AdmissionRejectedError: If a rate limit is exceeded, the queue is
+                full, or no slot frees up within the queue timeout
+        """
+        self._check_rate(user_id)
+
+        start = time.monotonic()
+        async with self._slots:
+            if not self._has_slot(user_id):
+                if self.queued >= self.settings["max_queue"]:
+                    self._reject("queue_full", self.settings["queue_timeout"], 0.0)
+                self.queued += 1
+                self._record_load()
+                try:
+                    await asyncio.wait_for(
+                        self._slots.wait_for(lambda: self._has_slot(user_id)),
+                        timeout=self.settings["queue_timeout"]
+                    )
+                except asyncio.TimeoutError:
+                    reason = (
+                        "user_concurrency"
+                        if self.in_flight < self.settings["max_concurrency"]
+                        else "global_concurrency"
+                    )
+                    self._reject(reason, self.settings["queue_timeout"], time.monotonic() - start)
+                finally:
+                    self.queued -= 1
+
+            self.in_flight += 1
+            self._user_in_flight[user_id] = self._user_in_flight.get(user_id, 0) + 1
+            self._record_load()
+        metrics.record_admission_wait("admitted", time.monotonic() - start)
+
+        try:
+            yield
+        finally:
+            async with self._slots:
+                self.in_flight -= 1
+                remaining = self._user_in_flight[user_id] - 1
+                if remaining:
+                    self._user_in_flight[user_id] = remaining
+                else:
+                    del self._user_in_flight[user_id]
+                self._record_load()
+                self._slots.notify_all()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the admission controller for the running event loop."""
+    loop = asyncio.get_running_loop()
+    controller = _controllers.get(loop)
+    if controller is None:
+        controller = AdmissionController()
+        _controllers[loop] = controller
+    return controller
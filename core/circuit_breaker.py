@@ -0,0 +1,207 @@
+"""
+Asyncio circuit breakers for outbound calls.
+
+Each deepagents-runtime endpoint gets its own breaker, so a slow /state
+endpoint cannot trip /invoke. A breaker opens after consecutive failures,
+where calls slower than the endpoint's latency threshold count as failures
+too. While open, calls are rejected without touching the network; after the
+reset timeout a limited number of concurrent probe calls decide whether it
+closes again.
+"""
+
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from core.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Latency in seconds above which a call counts as a failure, per endpoint
+DEFAULT_SLOW_CALL_THRESHOLDS = {
+    "invoke": 10.0,
+    "state": 5.0,
+}
+
+_breakers: Dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected by an open (or saturated half-open) breaker."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit breaker '{name}' is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker that tracks coroutine outcomes and latency."""
+
+    def __init__(
+        self,
+        name: str,
+        fail_max: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        success_threshold: int = 1,
+        slow_call_threshold: Optional[float] = None,
+        exclude: Tuple[Type[BaseException], ...] = ()
+    ):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.exclude = exclude
+
+        self._state = CLOSED
+        self._failures = 0
+        self._probe_successes = 0
+        self._probes_in_flight = 0
+        self._opened_at = 0.0
+        metrics.record_breaker_state(name, CLOSED)
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open breakers to half-open once the reset timeout passed."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str) -> None:
+        previous, self._state = self._state, state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == HALF_OPEN:
+            self._probe_successes = 0
+        if state == CLOSED:
+            self._failures = 0
+        metrics.record_breaker_transition(self.name, previous, state)
+
+    def _before_call(self) -> bool:
+        """Admit or reject a call. Returns whether the call is a half-open probe."""
+        state = self.state
+        if state == OPEN:
+            retry_after = self.reset_timeout - (time.monotonic() - self._opened_at)
+            metrics.record_breaker_rejection(self.name)
+            raise CircuitOpenError(self.name, max(retry_after, 0.0))
+        if state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_max_calls:
+                metrics.record_breaker_rejection(self.name)
+                raise CircuitOpenError(self.name, 0.0)
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def _on_success(self) -> None:
+        if self._state == HALF_OPEN:
+            self._probe_successes += 1
+            if self._probe_successes >= self.success_threshold:
+                self._transition(CLOSED)
+        else:
+            self._failures = 0
+
+    def _on_failure(self) -> None:
+        if self._state == HALF_OPEN:
+            self._transition(OPEN)
+            return
+        self._failures += 1
+        if self._state == CLOSED and self._failures >= self.fail_max:
+            self._transition(OPEN)
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        is_failure: Optional[Callable[[Any], bool]] = None,
+        slow_allowance: float = 0.0,
+        **kwargs
+    ) -> Any:
+        """
+        Await ``func(*args, **kwargs)`` through the breaker.
+
+        Args:
+            func: Coroutine function to call
+            is_failure: Optional predicate marking a returned result as a failure
+            slow_allowance: Extra seconds this call may take before it counts
+                as slow, e.g. a long-poll wait
+            *args, **kwargs: Arguments for func
+
+        Returns:
+            The call's result, also when it was counted as a failure
+
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+        """
+        probe = self._before_call()
+        start = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
+        except self.exclude:
+            self._on_success()
+            raise
+        except Exception:
+            self._on_failure()
+            raise
+        finally:
+            if probe:
+                self._probes_in_flight -= 1
+
+        elapsed = time.monotonic() - start
+        slow = (
+            self.slow_call_threshold is not None
+            and elapsed > self.slow_call_threshold + slow_allowance
+        )
+        if slow:
+            metrics.record_breaker_slow_call(self.name)
+        if slow or (is_failure is not None and is_failure(result)):
+            self._on_failure()
+        else:
+            self._on_success()
+        return result
+
+    def reset(self) -> None:
+        """Force the breaker closed."""
+        if self._state != CLOSED:
+            self._transition(CLOSED)
+        self._failures = 0
+
+
+def get_breaker_settings(endpoint: str) -> Dict[str, Any]:
+    """
+    Read breaker settings for a deepagents-runtime endpoint.
+
+    ``DEEPAGENTS_<ENDPOINT>_BREAKER_<SETTING>`` overrides
+    ``DEEPAGENTS_BREAKER_<SETTING>`` for FAIL_MAX, RESET_TIMEOUT,
+    HALF_OPEN_MAX_CALLS and SUCCESS_THRESHOLD. The latency threshold is
+    ``DEEPAGENTS_<ENDPOINT>_SLOW_CALL_THRESHOLD``; 0 disables latency trips.
+    """
+    prefix = f"DEEPAGENTS_{endpoint.upper()}_BREAKER_"
+
+    def setting(name: str, default: str) -> str:
+        return os.getenv(prefix + name) or os.getenv("DEEPAGENTS_BREAKER_" + name, default)
+
+    slow = float(os.getenv(
+        f"DEEPAGENTS_{endpoint.upper()}_SLOW_CALL_THRESHOLD",
+        str(DEFAULT_SLOW_CALL_THRESHOLDS.get(endpoint, 0))
+    ))
+    return {
+        "fail_max": int(setting("FAIL_MAX", "5")),
+        "reset_timeout": float(setting("RESET_TIMEOUT", "30")),
+        "half_open_max_calls": int(setting("HALF_OPEN_MAX_CALLS", "1")),
+        "success_threshold": int(setting("SUCCESS_THRESHOLD", "1")),
+        "slow_call_threshold": slow or None,
+    }
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Get the process-wide breaker for an endpoint, creating it on first use."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = CircuitBreaker(endpoint, **get_breaker_settings(endpoint))
+        _breakers[endpoint] = breaker
+    return breaker
@@ -0,0 +1,327 @@
+"""
+Shared PostgreSQL connection pools for IDE Orchestrator services.
+
+A single psycopg_pool.AsyncConnectionPool is opened in the application
+lifespan and injected into every service, so requests reuse warm connections
+instead of paying a TCP and auth handshake for every query, and database
+waits never block the event loop.
+
+When DATABASE_READ_URL is configured a second "replica" pool is opened.
+Service methods decorated with @read_only are routed to it unless the caller
+needs read-your-writes consistency or the replica is lagging.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import psycopg
+from psycopg.rows import dict_row
+from psycopg.types.string import TextLoader
+from psycopg_pool import AsyncConnectionPool
+
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# asyncio pools are bound to the loop that opened them. Production runs a
+# single loop; test clients that run the app on a separate loop get their own.
+_pools: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Task] = {}
+
+# Read routing state
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+_force_primary: ContextVar[bool] = ContextVar("db_force_primary", default=False)
+_recent_writes: Dict[str, float] = {}
+
+# Connection of the enclosing unit_of_work(), if any
+_unit_of_work: ContextVar[Optional[psycopg.AsyncConnection]] = ContextVar(
+    "db_unit_of_work", default=None
+)
+_replica_lag: float = 0.0
+
+
+def get_pool_settings() -> Dict[str, Any]:
+    """Read connection pool sizing from environment variables."""
+    return {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    }
+
+
+def get_connection_options() -> str:
+    """
+    Server settings applied to every pooled connection at startup.
+
+    Hot point lookups run as prepared statements (see core.queries); a generic
+    plan keeps their plans stable instead of re-planning per parameter set.
+    """
+    plan_cache_mode = os.getenv("DB_PLAN_CACHE_MODE", "force_generic_plan")
+    return f"-c plan_cache_mode={plan_cache_mode}"
+
+
+def configure_adapters(conn: psycopg.AsyncConnection) -> None:
+    """
+    Register the type loaders shared by all service connections.
+
+    uuid columns are decoded straight to str by the C text loader, so rows
+    come back JSON-ready without a per-row Python conversion pass.
+    """
+    conn.adapters.register_loader("uuid", TextLoader)
+
+
+async def _configure_connection(conn: psycopg.AsyncConnection) -> None:
+    configure_adapters(conn)
+
+
+def create_pool(database_url: str, name: str = "primary") -> AsyncConnectionPool:
+    """
+    Create a connection pool for the given database.
+
+    The pool is returned unopened; call ``await pool.open()`` from a running
+    event loop.
+
+    Args:
+        database_url: PostgreSQL connection string
+        name: Pool name used for metrics labels
+
+    Returns:
+        Connection pool yielding dict_row connections
+    """
+    health_check = os.getenv("DB_POOL_HEALTH_CHECK", "true").lower() == "true"
+
+    pool = AsyncConnectionPool(
+        database_url,
+        kwargs={"row_factory": dict_row, "options": get_connection_options()},
+        configure=_configure_connection,
+        check=AsyncConnectionPool.check_connection if health_check else None,
+        name=name,
+        open=False,
+        **get_pool_settings()
+    )
+    metrics.register_db_pool(name, pool)
+    return pool
+
+
+async def init_pool(database_url: str, name: str = "primary") -> AsyncConnectionPool:
+    """
+    Open a named pool for the running event loop. Called from the application lifespan.
+
+    Concurrent callers share a single open operation.
+    """
+    key = (asyncio.get_running_loop(), name)
+    opening = _pools.get(key)
+
+    if opening is None:
+        pool = create_pool(database_url, name)
+        opening = key[0].create_task(_open(pool))
+        _pools[key] = opening
+
+    return await opening
+
+
+async def _open(pool: AsyncConnectionPool) -> AsyncConnectionPool:
+    await pool.open()
+    return pool
+
+
+async def get_pool(database_url: str, name: str = "primary") -> AsyncConnectionPool:
+    """
+    Get a shared pool, opening it lazily if the lifespan did not run.
+
+    The lazy path keeps scripts and ASGI test transports (which skip the
+    lifespan) working against the same pooled code paths.
+    """
+    opening = _pools.get((asyncio.get_running_loop(), name))
+    if opening is not None and opening.done():
+        return opening.result()
+    return await init_pool(database_url, name)
+
+
+async def close_pool() -> None:
+    """Close all pools for the running event loop and release their connections."""
+    loop = asyncio.get_running_loop()
+    for key in [key for key in _pools if key[0] is loop]:
+        pool = await _pools.pop(key)
+        await pool.close()
+
+
+def read_only(func):
+    """
+    Declare a service coroutine as safe to serve from the read replica.
+
+    The method's queries go to the service's read pool, if it has one, unless
+    primary reads are forced by use_primary() or the replica is lagging.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Route all reads in this context to the primary."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+def get_consistency_window() -> float:
+    """Seconds after a write during which the writer reads from the primary."""
+    return float(os.getenv("DB_READ_YOUR_WRITES_WINDOW", "5"))
+
+
+def record_write(key: str) -> None:
+    """
+    Record that ``key`` (typically a user id) just wrote to the primary.
+
+    Subsequent reads wrapped in read_your_writes(key) go to the primary until
+    the consistency window expires.
+    """
+    now = time.monotonic()
+    _recent_writes[key] = now
+
+    if len(_recent_writes) > 10000:
+        window = get_consistency_window()
+        for stale_key in [k for k, t in _recent_writes.items() if now - t >= window]:
+            del _recent_writes[stale_key]
+
+
+@contextmanager
+def read_your_writes(key: str) -> Iterator[None]:
+    """Route reads to the primary if ``key`` wrote within the consistency window."""
+    wrote_at = _recent_writes.get(key)
+    if wrote_at is not None and time.monotonic() - wrote_at < get_consistency_window():
+        with use_primary():
+            yield
+    else:
+        yield
+
+
+def get_max_replica_lag() -> float:
+    """Replica lag in seconds above which reads fall back to the primary."""
+    return float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+
+
+def replica_usable() -> bool:
+    """Whether the replica is currently within the lag threshold."""
+    return _replica_lag <= get_max_replica_lag()
+
+
+async def check_replica_lag(pool: AsyncConnectionPool) -> float:
+    """
+    Measure replication lag on a replica in seconds.
+
+    A server that is not in recovery, or has replayed everything it received,
+    reports zero lag.
+    """
+    async with pool.connection() as conn:
+        cur = await conn.execute(
+            """
+            SELECT CASE
+                WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+            END AS lag_seconds
+            """
+        )
+        row = await cur.fetchone()
+        return float(row["lag_seconds"])
+
+
+async def monitor_replica_lag(pool: AsyncConnectionPool) -> None:
+    """
+    Periodically sample replica lag. Runs as a background task for the app lifetime.
+
+    An unreachable replica is treated as infinitely lagged, so reads go to the
+    primary until it recovers.
+    """
+    global _replica_lag
+    interval = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "5"))
+
+    while True:
+        try:
+            _replica_lag = await check_replica_lag(pool)
+        except Exception as e:
+            logger.warning(f"Replica lag check failed: {e}")
+            _replica_lag = float("inf")
+        metrics.record_replica_lag(_replica_lag)
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def connect(
+    database_url: str,
+    pool: Optional[AsyncConnectionPool] = None,
+    read_pool: Optional[AsyncConnectionPool] = None
+) -> AsyncIterator[psycopg.AsyncConnection]:
+    """
+    Get a connection for a service.
+
+    Borrows from the pool when one is injected, otherwise opens a dedicated
+    connection. Both variants commit on clean exit and roll back on error.
+    Inside @read_only methods the read pool is used when it is configured,
+    primary reads are not forced and the replica is within the lag threshold.
+    Inside unit_of_work() the unit's connection is reused and committed by it.
+    """
+    joined = _unit_of_work.get()
+    if joined is not None:
+        yield joined
+        return
+
+    if read_pool is not None and _read_only.get():
+        if not _force_primary.get() and replica_usable():
+            pool = read_pool
+            metrics.record_db_read("replica")
+        else:
+            metrics.record_db_read("primary")
+
+    if pool is not None:
+        async with pool.connection() as conn:
+            yield conn
+    else:
+        async with await psycopg.AsyncConnection.connect(
+            database_url, row_factory=dict_row
+        ) as conn:
+            configure_adapters(conn)
+            yield conn
+
+
+@asynccontextmanager
+async def unit_of_work(
+    database_url: str,
+    pool: Optional[AsyncConnectionPool] = None
+) -> AsyncIterator[psycopg.AsyncConnection]:
+    """
+    Run a sequence of service calls as one transaction on one connection.
+
+    Every connect() inside the block joins the unit's connection, so row locks
+    taken by the first statement are held until the whole unit commits, and
+    any exception rolls all of it back. Nested units join the outer one.
+    Tasks spawned inside the block inherit the connection; spawn them after it.
+    """
+    joined = _unit_of_work.get()
+    if joined is not None:
+        yield joined
+        return
+
+    async with connect(database_url, pool) as conn:
+        async with conn.transaction():
+            token = _unit_of_work.set(conn)
+            try:
+                yield conn
+            finally:
+                _unit_of_work.reset(token)
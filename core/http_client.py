@@ -0,0 +1,107 @@
+"""
+Shared HTTP client for calls to deepagents-runtime.
+
+One httpx.AsyncClient is opened in the application lifespan and reused by
+every DeepAgentsRuntimeClient, so requests ride on kept-alive (and, when
+enabled, HTTP/2 multiplexed) connections instead of paying connection setup
+and TLS on every call.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict
+
+import httpx
+
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Like the database pools, clients are bound to the loop that opened them.
+_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+# Read timeouts in seconds per deepagents-runtime endpoint
+DEFAULT_ENDPOINT_TIMEOUTS = {
+    "invoke": 30.0,
+    "state": 10.0,
+    "cleanup": 10.0,
+}
+
+
+def get_client_limits() -> httpx.Limits:
+    """Read connection pool limits from environment variables."""
+    return httpx.Limits(
+        max_connections=int(os.getenv("DEEPAGENTS_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("DEEPAGENTS_HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("DEEPAGENTS_HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def get_endpoint_timeout(endpoint: str) -> httpx.Timeout:
+    """
+    Get the timeout for a deepagents-runtime endpoint.
+
+    The read timeout comes from ``DEEPAGENTS_<ENDPOINT>_TIMEOUT``; connecting
+    and waiting for a pooled connection share ``DEEPAGENTS_CONNECT_TIMEOUT``.
+
+    Args:
+        endpoint: Endpoint name, e.g. "invoke", "state" or "cleanup"
+
+    Returns:
+        Timeout for requests to that endpoint
+    """
+    default = DEFAULT_ENDPOINT_TIMEOUTS.get(endpoint, 10.0)
+    read = float(os.getenv(f"DEEPAGENTS_{endpoint.upper()}_TIMEOUT", str(default)))
+    connect = float(os.getenv("DEEPAGENTS_CONNECT_TIMEOUT", "5"))
+    return httpx.Timeout(read, connect=connect, pool=connect)
+
+
+def http2_enabled() -> bool:
+    """Whether HTTP/2 is requested and the optional h2 package is installed."""
+    if os.getenv("DEEPAGENTS_HTTP2", "false").lower() != "true":
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("DEEPAGENTS_HTTP2 is set but h2 is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create a pooled client for deepagents-runtime and export its utilization."""
+    client = httpx.AsyncClient(
+        limits=get_client_limits(),
+        http2=http2_enabled(),
+        timeout=get_endpoint_timeout("default"),
+    )
+    metrics.register_http_pool("deepagents", client)
+    return client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared client for the running event loop, creating it lazily.
+
+    The lazy path keeps scripts and test transports that skip the lifespan on
+    the same pooled code path.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = create_http_client()
+        _clients[loop] = client
+    return client
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """Open the shared client. Called from the application lifespan."""
+    return get_http_client()
+
+
+async def close_http_client() -> None:
+    """Close the running loop's shared client and its kept-alive connections."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,200 @@
+"""
+Client-side load balancing across deepagents-runtime instances.
+
+``DEEPAGENTS_RUNTIME_URLS`` lists the runtime replicas. New jobs go to the
+healthy instance with the fewest outstanding requests, or to the better of
+two random picks (power of two choices). A thread lives on the instance that
+created it, so every later call for that thread_id (state, stream, cleanup)
+is pinned there. Pins are kept in a bounded in-process map; proposals and the
+cleanup outbox persist the instance so pins can be restored after a restart
+or on another orchestrator replica.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("least_outstanding", "p2c")
+
+_balancers: Dict[Tuple[str, ...], "LoadBalancer"] = {}
+
+
+def get_runtime_urls() -> List[str]:
+    """
+    Read deepagents-runtime base URLs.
+
+    ``DEEPAGENTS_RUNTIME_URLS`` (comma-separated) takes precedence over the
+    single ``DEEPAGENTS_RUNTIME_URL``.
+    """
+    urls = os.getenv("DEEPAGENTS_RUNTIME_URLS", "")
+    parsed = [url.strip().rstrip("/") for url in urls.split(",") if url.strip()]
+    if parsed:
+        return parsed
+    return [os.getenv("DEEPAGENTS_RUNTIME_URL", "http://deepagents-runtime:8000").rstrip("/")]
+
+
+def get_balancer_settings() -> Dict[str, Any]:
+    """
+    Read load balancing and health check settings from environment variables.
+
+    Raises:
+        ValueError: If DEEPAGENTS_LB_STRATEGY is not a known strategy
+    """
+    strategy = os.getenv("DEEPAGENTS_LB_STRATEGY", "least_outstanding").lower()
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Invalid DEEPAGENTS_LB_STRATEGY: {strategy}")
+    return {
+        "strategy": strategy,
+        "pin_cache_size": int(os.getenv("DEEPAGENTS_PIN_CACHE_SIZE", "10000")),
+        "health_check_interval": float(os.getenv("DEEPAGENTS_HEALTH_CHECK_INTERVAL", "10")),
+        "health_check_path": os.getenv("DEEPAGENTS_HEALTH_CHECK_PATH", "/health"),
+        "health_check_timeout": float(os.getenv("DEEPAGENTS_HEALTH_CHECK_TIMEOUT", "2")),
+        "unhealthy_threshold": int(os.getenv("DEEPAGENTS_UNHEALTHY_THRESHOLD", "2")),
+    }
+
+
+class RuntimeInstance:
+    """Load and health bookkeeping for one runtime instance."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+
+
+class LoadBalancer:
+    """Picks runtime instances for new work and routes pinned threads."""
+
+    def __init__(self, urls: List[str], settings: Optional[Dict[str, Any]] = None):
+        if not urls:
+            raise ValueError("At least one deepagents-runtime URL is required")
+        self.settings = settings or get_balancer_settings()
+        self.instances = {url: RuntimeInstance(url) for url in urls}
+        self._pins: "OrderedDict[str, str]" = OrderedDict()
+        for url in urls:
+            metrics.record_runtime_instance_health(url, True)
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self.instances)
+
+    def pick(self) -> str:
+        """Choose an instance for new work, preferring healthy ones."""
+        candidates = [i for i in self.instances.values() if i.healthy]
+        if not candidates:
+            # Everything looks down; spread load rather than fail outright
+            candidates = list(self.instances.values())
+        if len(candidates) == 1:
+            return candidates[0].url
+
+        if self.settings["strategy"] == "p2c":
+            first, second = random.sample(candidates, 2)
+            return min(first, second, key=lambda i: i.outstanding).url
+
+        fewest = min(i.outstanding for i in candidates)
+        return random.choice([i for i in candidates if i.outstanding == fewest]).url
+
+    def pin(self, thread_id: str, url: Optional[str]) -> None:
+        """Pin a thread to the instance holding its state. Unknown URLs are ignored."""
+        if url is None or url not in self.instances:
+            return
+        self._pins[thread_id] = url
+        self._pins.move_to_end(thread_id)
+        while len(self._pins) > self.settings["pin_cache_size"]:
+            self._pins.popitem(last=False)
+
+    def pinned(self, thread_id: str) -> Optional[str]:
+        """The instance a thread is pinned to, if known."""
+        url = self._pins.get(thread_id)
+        if url is not None:
+            self._pins.move_to_end(thread_id)
+        return url
+
+    def route(self, thread_id: Optional[str] = None) -> str:
+        """Instance for a request: the thread's pinned instance, else a fresh pick."""
+        if thread_id is not None:
+            url = self.pinned(thread_id)
+            if url is not None:
+                return url
+        return self.pick()
+
+    def instance_for(self, request_url: str) -> Optional[str]:
+        """Map a full request URL back to the instance it was sent to."""
+        for url in self.instances:
+            if request_url.startswith(url + "/") or request_url == url:
+                return url
+        return None
+
+    @contextmanager
+    def track(self, url: str) -> Iterator[None]:
+        """Count a request as outstanding on an instance while it runs."""
+        instance = self.instances[url]
+        instance.outstanding += 1
+        metrics.record_runtime_instance_outstanding(url, instance.outstanding)
+        try:
+            yield
+        finally:
+            instance.outstanding -= 1
+            metrics.record_runtime_instance_outstanding(url, instance.outstanding)
+
+    def record_health(self, url: str, ok: bool) -> None:
+        """Apply a health check result; instances are ejected after consecutive failures."""
+        instance = self.instances[url]
+        if ok:
+            instance.consecutive_failures = 0
+            if not instance.healthy:
+                logger.info(f"deepagents-runtime instance {url} is healthy again")
+            instance.healthy = True
+        else:
+            instance.consecutive_failures += 1
+            if instance.healthy and instance.consecutive_failures >= self.settings["unhealthy_threshold"]:
+                logger.warning(f"deepagents-runtime instance {url} failed health checks; ejecting it")
+                instance.healthy = False
+        metrics.record_runtime_instance_health(url, instance.healthy)
+
+    async def check_health(self, client: httpx.AsyncClient) -> None:
+        """Probe every instance's health endpoint once, concurrently."""
+        async def probe(url: str) -> None:
+            try:
+                response = await client.get(
+                    url + self.settings["health_check_path"],
+                    timeout=self.settings["health_check_timeout"]
+                )
+                ok = response.status_code < 500
+            except httpx.HTTPError:
+                ok = False
+            self.record_health(url, ok)
+
+        await asyncio.gather(*(probe(url) for url in self.instances))
+
+
+def get_load_balancer(urls: Optional[List[str]] = None) -> LoadBalancer:
+    """Get the process-wide balancer for a set of runtime URLs, defaulting to the configured ones."""
+    urls = [url.rstrip("/") for url in urls] if urls else get_runtime_urls()
+    key = tuple(urls)
+    balancer = _balancers.get(key)
+    if balancer is None:
+        balancer = LoadBalancer(urls)
+        _balancers[key] = balancer
+    return balancer
+
+
+async def monitor_health(balancer: LoadBalancer, client: httpx.AsyncClient) -> None:
+    """Run active health checks for the app lifetime."""
+    while True:
+        try:
+            await balancer.check_health(client)
+        except Exception as e:
+            logger.warning(f"deepagents-runtime health check failed: {e}")
+        await asyncio.sleep(balancer.settings["health_check_interval"])
@@ -53,6 +53,242 @@ ide_orchestrator_deepagents_requests = Counter(
     ['endpoint', 'status']
 )
 
+# Database connection pool metrics
+ide_orchestrator_db_pool_checked_out = Gauge(
+    'ide_orchestrator_db_pool_connections_checked_out',
+    'Database connections currently checked out of the pool',
+    ['pool']
+)
+
+ide_orchestrator_db_pool_idle = Gauge(
+    'ide_orchestrator_db_pool_connections_idle',
+    'Idle database connections available in the pool',
+    ['pool']
+)
+
+ide_orchestrator_db_pool_waiting = Gauge(
+    'ide_orchestrator_db_pool_requests_waiting',
+    'Requests waiting for a database connection',
+    ['pool']
+)
+
+ide_orchestrator_db_lock_wait = Histogram(
+    'ide_orchestrator_db_lock_wait_seconds',
+    'Time spent acquiring row locks, by query class and outcome',
+    ['query_class', 'outcome'],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+ide_orchestrator_db_replica_lag = Gauge(
+    'ide_orchestrator_db_replica_lag_seconds',
+    'Replication lag of the read replica'
+)
+
+ide_orchestrator_db_reads = Counter(
+    'ide_orchestrator_db_read_only_queries_total',
+    'Read-only service calls by the database they were routed to',
+    ['target']
+)
+
+ide_orchestrator_http_pool_connections = Gauge(
+    'ide_orchestrator_http_pool_connections',
+    'Outbound HTTP connections by state (active or idle)',
+    ['pool', 'state']
+)
+
+ide_orchestrator_http_pool_max_connections = Gauge(
+    'ide_orchestrator_http_pool_max_connections',
+    'Configured outbound HTTP connection limit',
+    ['pool']
+)
+
+ide_orchestrator_deepagents_requests_in_flight = Gauge(
+    'ide_orchestrator_deepagents_requests_in_flight',
+    'deepagents-runtime requests currently in flight',
+    ['endpoint']
+)
+
+ide_orchestrator_cleanup_queue_depth = Gauge(
+    'ide_orchestrator_cleanup_queue_depth',
+    'Pending deepagents-runtime cleanups in the outbox'
+)
+
+ide_orchestrator_cleanup_queue_lag = Gauge(
+    'ide_orchestrator_cleanup_queue_lag_seconds',
+    'Age of the oldest pending cleanup in the outbox'
+)
+
+ide_orchestrator_cleanups = Counter(
+    'ide_orchestrator_cleanups_total',
+    'deepagents-runtime cleanup attempts by outcome',
+    ['outcome']
+)
+
+ide_orchestrator_deepagents_retries = Counter(
+    'ide_orchestrator_deepagents_retries_total',
+    'Extra deepagents-runtime attempts by kind (retry or hedge)',
+    ['endpoint', 'kind']
+)
+
+ide_orchestrator_deepagents_hedge_wins = Counter(
+    'ide_orchestrator_deepagents_hedge_wins_total',
+    'Hedged requests that answered before the original attempt',
+    ['endpoint']
+)
+
+ide_orchestrator_deepagents_retry_budget_exhausted = Counter(
+    'ide_orchestrator_deepagents_retry_budget_exhausted_total',
+    'Retries skipped because the retry budget was spent',
+    ['endpoint']
+)
+
+ide_orchestrator_runtime_instance_outstanding = Gauge(
+    'ide_orchestrator_deepagents_instance_outstanding_requests',
+    'Outstanding requests per deepagents-runtime instance',
+    ['instance']
+)
+
+ide_orchestrator_runtime_instance_healthy = Gauge(
+    'ide_orchestrator_deepagents_instance_healthy',
+    'Whether a deepagents-runtime instance passes health checks (1) or is ejected (0)',
+    ['instance']
+)
+
+ide_orchestrator_admission_queue_wait = Histogram(
+    'ide_orchestrator_refinement_admission_wait_seconds',
+    'Time refinement requests waited for an admission slot, by outcome',
+    ['outcome'],
+    buckets=[0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+ide_orchestrator_admission_rejections = Counter(
+    'ide_orchestrator_refinement_admission_rejections_total',
+    'Refinement requests rejected by admission control, by reason',
+    ['reason']
+)
+
+ide_orchestrator_admission_in_flight = Gauge(
+    'ide_orchestrator_refinement_admission_in_flight',
+    'Refinement requests holding an admission slot'
+)
+
+ide_orchestrator_admission_queued = Gauge(
+    'ide_orchestrator_refinement_admission_queued',
+    'Refinement requests waiting for an admission slot'
+)
+
+ide_orchestrator_state_cache_lookups = Counter(
+    'ide_orchestrator_deepagents_state_cache_lookups_total',
+    'Execution state cache lookups (hit, miss, or shared in-flight request)',
+    ['result']
+)
+
+ide_orchestrator_state_cache_size = Gauge(
+    'ide_orchestrator_deepagents_state_cache_entries',
+    'Execution states held in the cache'
+)
+
+ide_orchestrator_stream_upstreams = Gauge(
+    'ide_orchestrator_stream_upstream_connections',
+    'Open deepagents-runtime stream connections shared through the stream hub'
+)
+
+ide_orchestrator_stream_subscribers = Gauge(
+    'ide_orchestrator_stream_subscribers',
+    'Client WebSockets subscribed to a shared thread stream'
+)
+
+ide_orchestrator_stream_replayed_events = Counter(
+    'ide_orchestrator_stream_replayed_events_total',
+    'Events replayed from memory to reconnecting clients'
+)
+
+ide_orchestrator_stream_replay_gaps = Counter(
+    'ide_orchestrator_stream_replay_gaps_total',
+    'Reconnects asking for events already evicted from the replay buffer'
+)
+
+ide_orchestrator_stream_send_queue_depth = Gauge(
+    'ide_orchestrator_stream_send_queue_depth',
+    'Events queued for sending to WebSocket clients',
+    ['event_type']
+)
+
+ide_orchestrator_stream_send_queue_dropped = Counter(
+    'ide_orchestrator_stream_send_queue_dropped_total',
+    'Events skipped for WebSocket clients whose send queue was full',
+    ['event_type', 'policy']
+)
+
+ide_orchestrator_stream_slow_client_disconnects = Counter(
+    'ide_orchestrator_stream_slow_client_disconnects_total',
+    'WebSocket clients disconnected because their send queue overflowed'
+)
+
+ide_orchestrator_stream_batch_size = Histogram(
+    'ide_orchestrator_stream_batch_events',
+    'on_llm_stream events sent per batched WebSocket frame',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128]
+)
+
+ide_orchestrator_stream_batch_delay = Histogram(
+    'ide_orchestrator_stream_batch_delay_seconds',
+    'Time the first event of a batch waited for more events before sending',
+    buckets=[.001, .005, .01, .025, .05, .1, .25]
+)
+
+ide_orchestrator_stream_state_update_bytes = Counter(
+    'ide_orchestrator_stream_state_update_bytes_total',
+    'Bytes of on_state_update frames sent to clients receiving files deltas'
+)
+
+ide_orchestrator_stream_state_update_bytes_saved = Counter(
+    'ide_orchestrator_stream_state_update_bytes_saved_total',
+    'Bytes saved by sending files deltas instead of full on_state_update frames'
+)
+
+ide_orchestrator_warmup_step_duration = Gauge(
+    'ide_orchestrator_warmup_step_duration_seconds',
+    'Duration of the last startup warm-up step',
+    ['step', 'outcome']
+)
+
+ide_orchestrator_ready = Gauge(
+    'ide_orchestrator_ready',
+    'Whether startup warm-up has finished and the instance accepts traffic'
+)
+
+ide_orchestrator_circuit_breaker_state = Gauge(
+    'ide_orchestrator_circuit_breaker_state',
+    'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+    ['breaker']
+)
+
+ide_orchestrator_circuit_breaker_transitions = Counter(
+    'ide_orchestrator_circuit_breaker_transitions_total',
+    'Circuit breaker state transitions',
+    ['breaker', 'from_state', 'to_state']
+)
+
+ide_orchestrator_circuit_breaker_rejections = Counter(
+    'ide_orchestrator_circuit_breaker_rejections_total',
+    'Calls rejected without being sent because the breaker was open',
+    ['breaker']
+)
+
+ide_orchestrator_circuit_breaker_slow_calls = Counter(
+    'ide_orchestrator_circuit_breaker_slow_calls_total',
+    'Calls counted as failures for exceeding the latency threshold',
+    ['breaker']
+)
+
+ide_orchestrator_db_query_duration = Histogram(
+    'ide_orchestrator_db_query_duration_seconds',
+    'Duration of named prepared database queries',
+    ['query'],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+
 
 class MetricsManager:
     """Manager for Prometheus metrics with context managers for timing."""
@@ -120,6 +356,178 @@ class MetricsManager:
     def record_deepagents_request(self, endpoint: str, status: str) -> None:
         """Record request to deepagents-runtime."""
         ide_orchestrator_deepagents_requests.labels(endpoint=endpoint, status=status).inc()
+    
+    def record_db_query(self, query: str, duration: float) -> None:
+        """Record execution of a named database query."""
+        ide_orchestrator_db_query_duration.labels(query=query).observe(duration)
+    
+    def record_lock_wait(self, query_class: str, outcome: str, duration: float) -> None:
+        """Record a row-lock acquisition attempt (acquired or conflict)."""
+        ide_orchestrator_db_lock_wait.labels(query_class=query_class, outcome=outcome).observe(duration)
+    
+    def record_replica_lag(self, lag_seconds: float) -> None:
+        """Record the latest measured replica lag."""
+        ide_orchestrator_db_replica_lag.set(lag_seconds)
+    
+    def record_db_read(self, target: str) -> None:
+        """Record where a read-only service call was routed (primary or replica)."""
+        ide_orchestrator_db_reads.labels(target=target).inc()
+    
+    def register_db_pool(self, name: str, pool) -> None:
+        """Expose connection pool usage, sampled from pool stats at scrape time."""
+        def stat(key: str) -> int:
+            return pool.get_stats().get(key, 0)
+        
+        ide_orchestrator_db_pool_checked_out.labels(pool=name).set_function(
+            lambda: stat("pool_size") - stat("pool_available")
+        )
+        ide_orchestrator_db_pool_idle.labels(pool=name).set_function(
+            lambda: stat("pool_available")
+        )
+        ide_orchestrator_db_pool_waiting.labels(pool=name).set_function(
+            lambda: stat("requests_waiting")
+        )
+
+    
+    def register_http_pool(self, name: str, client) -> None:
+        """Expose outbound HTTP connection pool usage, sampled at scrape time."""
+        def connections(idle: bool) -> int:
+            pool = getattr(client._transport, "_pool", None)
+            if pool is None:
+                return 0
+            return sum(1 for conn in pool.connections if conn.is_idle() == idle)
+        
+        ide_orchestrator_http_pool_connections.labels(pool=name, state="active").set_function(
+            lambda: connections(idle=False)
+        )
+        ide_orchestrator_http_pool_connections.labels(pool=name, state="idle").set_function(
+            lambda: connections(idle=True)
+        )
+        pool = getattr(client._transport, "_pool", None)
+        if pool is not None and pool._max_connections is not None:
+            ide_orchestrator_http_pool_max_connections.labels(pool=name).set(pool._max_connections)
+    
+    def record_cleanup_queue(self, depth: int, lag_seconds: float) -> None:
+        """Record cleanup outbox depth and the age of its oldest entry."""
+        ide_orchestrator_cleanup_queue_depth.set(depth)
+        ide_orchestrator_cleanup_queue_lag.set(lag_seconds)
+    
+    def record_cleanups(self, outcome: str, count: int = 1) -> None:
+        """Record processed cleanups (succeeded or failed)."""
+        if count:
+            ide_orchestrator_cleanups.labels(outcome=outcome).inc(count)
+
+    def record_deepagents_retry(self, endpoint: str, kind: str) -> None:
+        """Record an extra attempt (retry or hedge) against deepagents-runtime."""
+        ide_orchestrator_deepagents_retries.labels(endpoint=endpoint, kind=kind).inc()
+
+    def record_hedge_win(self, endpoint: str) -> None:
+        """Record a hedge request that beat the original attempt."""
+        ide_orchestrator_deepagents_hedge_wins.labels(endpoint=endpoint).inc()
+
+    def record_retry_budget_exhausted(self, endpoint: str) -> None:
+        """Record a retry skipped for lack of retry budget."""
+        ide_orchestrator_deepagents_retry_budget_exhausted.labels(endpoint=endpoint).inc()
+
+    def record_runtime_instance_outstanding(self, instance: str, outstanding: int) -> None:
+        """Record outstanding requests on a deepagents-runtime instance."""
+        ide_orchestrator_runtime_instance_outstanding.labels(instance=instance).set(outstanding)
+
+    def record_runtime_instance_health(self, instance: str, healthy: bool) -> None:
+        """Record a deepagents-runtime instance's health check status."""
+        ide_orchestrator_runtime_instance_healthy.labels(instance=instance).set(1 if healthy else 0)
+
+    def record_admission_wait(self, outcome: str, seconds: float) -> None:
+        """Record how long a refinement request waited for admission (admitted or rejected)."""
+        ide_orchestrator_admission_queue_wait.labels(outcome=outcome).observe(seconds)
+
+    def record_admission_rejection(self, reason: str) -> None:
+        """Record a refinement request rejected by admission control."""
+        ide_orchestrator_admission_rejections.labels(reason=reason).inc()
+
+    def record_admission_load(self, in_flight: int, queued: int) -> None:
+        """Record admitted and queued refinement requests."""
+        ide_orchestrator_admission_in_flight.set(in_flight)
+        ide_orchestrator_admission_queued.set(queued)
+
+    def record_state_cache_lookup(self, result: str) -> None:
+        """Record an execution state cache lookup (hit, miss or shared)."""
+        ide_orchestrator_state_cache_lookups.labels(result=result).inc()
+
+    def record_state_cache_size(self, entries: int) -> None:
+        """Record the number of cached execution states."""
+        ide_orchestrator_state_cache_size.set(entries)
+
+    def record_stream_upstreams(self, count: int) -> None:
+        """Record the number of open upstream thread streams."""
+        ide_orchestrator_stream_upstreams.set(count)
+
+    def record_stream_subscriber(self, delta: int) -> None:
+        """Record a client subscribing to (+1) or leaving (-1) a thread stream."""
+        ide_orchestrator_stream_subscribers.inc(delta)
+
+    def record_stream_replay(self, events: int, missed: bool) -> None:
+        """Record events replayed to a reconnecting client and whether some were already evicted."""
+        ide_orchestrator_stream_replayed_events.inc(events)
+        if missed:
+            ide_orchestrator_stream_replay_gaps.inc()
+
+    def record_send_queue_depth(self, event_type: Optional[str], delta: int) -> None:
+        """Record an event entering (+1) or leaving (-1) a client send queue."""
+        ide_orchestrator_stream_send_queue_depth.labels(event_type=event_type or "unknown").inc(delta)
+
+    def record_send_queue_drop(self, event_type: Optional[str], policy: str) -> None:
+        """Record an event skipped for a slow client."""
+        ide_orchestrator_stream_send_queue_dropped.labels(
+            event_type=event_type or "unknown", policy=policy
+        ).inc()
+
+    def record_slow_client_disconnect(self) -> None:
+        """Record a client disconnected for overflowing its send queue."""
+        ide_orchestrator_stream_slow_client_disconnects.inc()
+
+    def record_stream_batch(self, events: int, delay: float) -> None:
+        """Record a batched frame's event count and the latency batching added."""
+        ide_orchestrator_stream_batch_size.observe(events)
+        ide_orchestrator_stream_batch_delay.observe(delay)
+
+    def record_state_update_sent(self, full_size: int, sent_size: int) -> None:
+        """Record a state update sent to a delta client and how much smaller than in full it was."""
+        ide_orchestrator_stream_state_update_bytes.inc(sent_size)
+        ide_orchestrator_stream_state_update_bytes_saved.inc(max(full_size - sent_size, 0))
+
+    def record_warmup_step(self, step: str, ok: bool, duration: float) -> None:
+        """Record how long a startup warm-up step took and whether it succeeded."""
+        outcome = "ok" if ok else "failed"
+        ide_orchestrator_warmup_step_duration.labels(step=step, outcome=outcome).set(duration)
+
+    def record_ready(self, ready: bool) -> None:
+        """Record whether the instance reports ready."""
+        ide_orchestrator_ready.set(1 if ready else 0)
+
+    def record_breaker_state(self, breaker: str, state: str) -> None:
+        """Record a circuit breaker's current state (closed, half_open or open)."""
+        value = {"closed": 0, "half_open": 1, "open": 2}[state]
+        ide_orchestrator_circuit_breaker_state.labels(breaker=breaker).set(value)
+
+    def record_breaker_transition(self, breaker: str, from_state: str, to_state: str) -> None:
+        """Record a circuit breaker state change."""
+        ide_orchestrator_circuit_breaker_transitions.labels(
+            breaker=breaker, from_state=from_state, to_state=to_state
+        ).inc()
+        self.record_breaker_state(breaker, to_state)
+
+    def record_breaker_rejection(self, breaker: str) -> None:
+        """Record a call rejected by a circuit breaker."""
+        ide_orchestrator_circuit_breaker_rejections.labels(breaker=breaker).inc()
+
+    def record_breaker_slow_call(self, breaker: str) -> None:
+        """Record a call that exceeded its breaker's latency threshold."""
+        ide_orchestrator_circuit_breaker_slow_calls.labels(breaker=breaker).inc()
+
+    def track_deepagents_request(self, endpoint: str):
+        """Context manager counting an in-flight deepagents-runtime request."""
+        return ide_orchestrator_deepagents_requests_in_flight.labels(endpoint=endpoint).track_inprogress()
 
 
 # Global metrics manager instance
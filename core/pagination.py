@@ -0,0 +1,95 @@
+"""
+Keyset (seek) pagination helpers for listing endpoints.
+
+Listings are ordered by an indexed sort key and each page continues strictly
+after the last row of the previous one, so fetching page N costs the same as
+page 1 regardless of how many rows precede it. The sort key of the last row
+is handed to clients as an opaque cursor.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode a row's sort key as an opaque, URL-safe cursor.
+
+    Args:
+        values: Sort key values of the last row on the page
+
+    Returns:
+        URL-safe base64 string
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous page
+        size: Number of sort key values the listing expects
+
+    Returns:
+        Sort key values
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another listing
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def decode_created_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor for listings ordered by ``(created_at, id)``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    created_at, row_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), str(uuid.UUID(row_id))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def build_page(
+    rows: List[Dict[str, Any]],
+    limit: int,
+    key: Sequence[str],
+    items_name: str
+) -> Dict[str, Any]:
+    """
+    Trim a ``limit + 1`` row fetch to one page and compute its next cursor.
+
+    Args:
+        rows: Rows fetched with ``LIMIT limit + 1``
+        limit: Page size
+        key: Column names of the sort key
+        items_name: Response key for the page items
+
+    Returns:
+        Dict with the page items and ``next_cursor`` (None on the last page)
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor([rows[-1][k] for k in key]) if has_more else None
+    return {items_name: rows, "next_cursor": next_cursor}
@@ -0,0 +1,139 @@
+"""
+Adaptive polling for deepagents-runtime job state.
+
+Polls start fast and back off exponentially with jitter, so short jobs are
+noticed within a fraction of a second while long jobs generate little load.
+When the runtime supports long-polling (``?wait=``) the server holds each
+request until the state changes. A WebSocket proxy that sees the job finish
+on its event stream can wake pollers for that thread immediately.
+"""
+
+import asyncio
+import os
+import random
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Pollers waiting on each thread, woken by stream-derived completion
+_watchers: Dict[str, Set[asyncio.Event]] = {}
+
+
+def get_poll_settings() -> Dict[str, float]:
+    """Read polling intervals, deadline and long-poll wait from environment variables."""
+    return {
+        "initial_interval": float(os.getenv("DEEPAGENTS_POLL_INITIAL_INTERVAL", "0.1")),
+        "max_interval": float(os.getenv("DEEPAGENTS_POLL_MAX_INTERVAL", "5")),
+        "multiplier": float(os.getenv("DEEPAGENTS_POLL_MULTIPLIER", "2")),
+        "deadline": float(os.getenv("DEEPAGENTS_POLL_DEADLINE", "60")),
+        "long_poll_wait": float(os.getenv("DEEPAGENTS_LONG_POLL_WAIT", "0")),
+    }
+
+
+def backoff_delay(attempt: int, settings: Dict[str, float]) -> float:
+    """
+    Delay before the next poll, with equal jitter.
+
+    The ceiling grows by ``multiplier`` per attempt up to ``max_interval``;
+    the delay is drawn from the upper half of it so concurrent pollers spread
+    out without ever polling back to back.
+    """
+    ceiling = min(
+        settings["max_interval"],
+        settings["initial_interval"] * settings["multiplier"] ** attempt
+    )
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+@contextmanager
+def watch_stream_completion(thread_id: str) -> Iterator[asyncio.Event]:
+    """Register an event that is set when the thread's stream reports completion."""
+    event = asyncio.Event()
+    _watchers.setdefault(thread_id, set()).add(event)
+    try:
+        yield event
+    finally:
+        watchers = _watchers.get(thread_id)
+        if watchers is not None:
+            watchers.discard(event)
+            if not watchers:
+                del _watchers[thread_id]
+
+
+def notify_stream_completion(thread_id: str) -> int:
+    """
+    Wake every poller waiting on ``thread_id`` so it fetches the final state now.
+
+    Must be called from the event loop the pollers run on.
+
+    Returns:
+        Number of pollers woken
+    """
+    watchers = _watchers.get(thread_id, ())
+    for event in watchers:
+        event.set()
+    return len(watchers)
+
+
+async def poll_until_terminal(
+    thread_id: str,
+    fetch_state: Callable[[Optional[float]], Awaitable[Dict[str, Any]]],
+    settings: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Poll a job's state until it completes or fails.
+
+    Args:
+        thread_id: Thread whose stream completion can short-circuit the wait
+        fetch_state: Coroutine function fetching the state; receives the
+            long-poll wait in seconds, or None for a plain poll
+        settings: Polling settings, defaults to get_poll_settings()
+
+    Returns:
+        The terminal state
+
+    Raises:
+        TimeoutError: If the job is not terminal before the deadline
+    """
+    settings = settings or get_poll_settings()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings["deadline"]
+    attempt = 0
+    last_error: Optional[Exception] = None
+
+    with watch_stream_completion(thread_id) as completed:
+        while True:
+            completed.clear()
+            remaining = deadline - loop.time()
+            wait = min(settings["long_poll_wait"], remaining) if settings["long_poll_wait"] else None
+            started = loop.time()
+
+            try:
+                state = await fetch_state(wait)
+                last_error = None
+                if state.get("status", "running") in TERMINAL_STATUSES:
+                    return state
+            except Exception as e:
+                # State can be briefly unavailable; keep polling until the deadline
+                last_error = e
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                detail = f": {last_error}" if last_error else ""
+                raise TimeoutError(
+                    f"Job did not complete within {settings['deadline']:g} seconds{detail}"
+                )
+
+            if wait and last_error is None and loop.time() - started >= wait * 0.9:
+                # The server held the request; it is already rate-limiting us
+                attempt = 0
+                continue
+
+            delay = min(backoff_delay(attempt, settings), remaining)
+            attempt += 1
+            try:
+                await asyncio.wait_for(completed.wait(), timeout=delay)
+                attempt = 0
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,80 @@
+"""
+Named-query registry for hot SQL statements.
+
+Statements registered here are executed as server-side prepared statements:
+psycopg prepares each one once per pooled connection and reuses the plan on
+every later call, so Postgres skips the parse/plan work for the point lookups
+that run on every request. Call counts and latency are exported per query
+name.
+"""
+
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import psycopg
+
+from core.metrics import metrics
+
+
+class PreparedQuery:
+    """A named SQL statement executed as a prepared statement."""
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+
+    async def execute(
+        self,
+        cur: psycopg.AsyncCursor,
+        params: Optional[Sequence[Any]] = None
+    ) -> psycopg.AsyncCursor:
+        """
+        Execute the statement on a cursor, preparing it on first use.
+
+        Args:
+            cur: Cursor of a (pooled) connection
+            params: Query parameters
+
+        Returns:
+            The cursor, ready for fetching
+        """
+        start_time = time.perf_counter()
+        try:
+            await cur.execute(self.sql, params, prepare=True)
+        finally:
+            metrics.record_db_query(self.name, time.perf_counter() - start_time)
+        return cur
+
+
+class QueryRegistry:
+    """Central registry of named prepared statements."""
+
+    def __init__(self):
+        self._queries: Dict[str, PreparedQuery] = {}
+
+    def register(self, name: str, sql: str) -> PreparedQuery:
+        """
+        Register a statement under a unique name.
+
+        Raises:
+            ValueError: If the name is already registered with different SQL
+        """
+        existing = self._queries.get(name)
+        if existing is not None and existing.sql != sql:
+            raise ValueError(f"Query '{name}' is already registered")
+
+        query = PreparedQuery(name, sql)
+        self._queries[name] = query
+        return query
+
+    def get(self, name: str) -> PreparedQuery:
+        """Get a registered statement by name."""
+        return self._queries[name]
+
+    def names(self) -> list:
+        """Names of all registered statements."""
+        return sorted(self._queries)
+
+
+# Global query registry instance
+queries = QueryRegistry()
@@ -0,0 +1,225 @@
+"""
+Retries and request hedging for idempotent deepagents-runtime calls.
+
+Callers must make requests idempotent, e.g. by keying them on a job_id
+the runtime can dedupe on; a retried or hedged request may then reach
+the runtime more than once without starting duplicate work. Transport
+errors and 502/503/504 responses are retried with jittered backoff.
+Optionally a hedge request is fired when the first attempt is slower than
+the endpoint's recent p95 latency, and whichever succeeds first wins.
+
+Both retries and hedges draw from a per-endpoint retry budget, so during an
+outage the extra load stays a bounded fraction of the regular traffic.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+from core.metrics import metrics
+
+RETRYABLE_STATUS_CODES = (502, 503, 504)
+
+_budgets: Dict[str, "RetryBudget"] = {}
+_latencies: Dict[str, "LatencyTracker"] = {}
+
+
+class RetryBudget:
+    """
+    Sliding-window retry budget.
+
+    Within any ``window`` seconds, at most ``max(min_retries, ratio * requests)``
+    retries are allowed, so retries add at most ``ratio`` extra load once
+    traffic is high enough and a small floor of retries when it is not.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _prune(self, now: float) -> None:
+        for timestamps in (self._requests, self._retries):
+            while timestamps and now - timestamps[0] > self.window:
+                timestamps.popleft()
+
+    def record_request(self) -> None:
+        """Count an original (non-retry) request."""
+        now = time.monotonic()
+        self._prune(now)
+        self._requests.append(now)
+
+    def try_acquire(self) -> bool:
+        """Spend one retry if the budget allows it."""
+        now = time.monotonic()
+        self._prune(now)
+        if len(self._retries) >= max(self.min_retries, self.ratio * len(self._requests)):
+            return False
+        self._retries.append(now)
+        return True
+
+
+class LatencyTracker:
+    """Recent successful-call latencies, used to pick hedge delays."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile of recent latencies, or None with too few samples."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def get_retry_settings(endpoint: str) -> Dict[str, Any]:
+    """
+    Read retry and hedging settings for an endpoint from environment variables.
+
+    Attempt and hedge settings are per endpoint (``DEEPAGENTS_<ENDPOINT>_...``);
+    the retry budget settings are shared by all endpoints.
+    """
+    prefix = f"DEEPAGENTS_{endpoint.upper()}_"
+    return {
+        "max_attempts": int(os.getenv(prefix + "MAX_ATTEMPTS", "3")),
+        "retry_base": float(os.getenv(prefix + "RETRY_BASE", "0.1")),
+        "retry_max": float(os.getenv(prefix + "RETRY_MAX", "1")),
+        "hedge": os.getenv(prefix + "HEDGE", "false").lower() == "true",
+        "hedge_quantile": float(os.getenv(prefix + "HEDGE_QUANTILE", "0.95")),
+        "hedge_min_delay": float(os.getenv(prefix + "HEDGE_MIN_DELAY", "0.05")),
+        "hedge_default_delay": float(os.getenv(prefix + "HEDGE_DEFAULT_DELAY", "1")),
+        "budget_ratio": float(os.getenv("DEEPAGENTS_RETRY_BUDGET_RATIO", "0.2")),
+        "budget_min_retries": int(os.getenv("DEEPAGENTS_RETRY_BUDGET_MIN", "3")),
+        "budget_window": float(os.getenv("DEEPAGENTS_RETRY_BUDGET_WINDOW", "10")),
+    }
+
+
+def get_retry_budget(endpoint: str, settings: Dict[str, Any]) -> RetryBudget:
+    """Get the process-wide retry budget for an endpoint."""
+    budget = _budgets.get(endpoint)
+    if budget is None:
+        budget = RetryBudget(
+            settings["budget_ratio"], settings["budget_min_retries"], settings["budget_window"]
+        )
+        _budgets[endpoint] = budget
+    return budget
+
+
+def get_latency_tracker(endpoint: str) -> LatencyTracker:
+    """Get the process-wide latency tracker for an endpoint."""
+    return _latencies.setdefault(endpoint, LatencyTracker())
+
+
+def _is_retryable(task: "asyncio.Future[httpx.Response]") -> bool:
+    """Whether a finished attempt failed in a way worth retrying."""
+    error = task.exception()
+    if error is not None:
+        return isinstance(error, httpx.TransportError)
+    return task.result().status_code in RETRYABLE_STATUS_CODES
+
+
+async def _hedged(
+    endpoint: str,
+    send: Callable[[], Awaitable[httpx.Response]],
+    delay: float,
+    budget: RetryBudget
+) -> httpx.Response:
+    """Run one attempt, adding a hedge request if it is still pending after ``delay``."""
+    first = asyncio.ensure_future(send())
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not budget.try_acquire():
+            return await first
+
+        metrics.record_deepagents_retry(endpoint, "hedge")
+        second = asyncio.ensure_future(send())
+        tasks.append(second)
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if not _is_retryable(task)), None)
+            if winner is None and not pending:
+                winner = done.pop()
+            if winner is not None:
+                if winner is second:
+                    metrics.record_hedge_win(endpoint)
+                return winner.result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def send_with_retries(
+    endpoint: str,
+    send: Callable[[], Awaitable[httpx.Response]],
+    settings: Optional[Dict[str, Any]] = None
+) -> httpx.Response:
+    """
+    Send an idempotent request with retries and optional hedging.
+
+    Args:
+        endpoint: Endpoint name used for settings, budget and metrics
+        send: Coroutine function sending one attempt of the request
+        settings: Retry settings, defaults to get_retry_settings(endpoint)
+
+    Returns:
+        The first non-retryable response, or the last retryable one once
+        attempts or the retry budget are exhausted
+
+    Raises:
+        httpx.TransportError: If the last attempt failed with a transport error
+    """
+    settings = settings or get_retry_settings(endpoint)
+    budget = get_retry_budget(endpoint, settings)
+    latencies = get_latency_tracker(endpoint)
+    budget.record_request()
+
+    async def timed_send() -> httpx.Response:
+        start = time.monotonic()
+        response = await send()
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+            latencies.record(time.monotonic() - start)
+        return response
+
+    attempt = 0
+    while True:
+        error: Optional[httpx.TransportError] = None
+        try:
+            if settings["hedge"]:
+                delay = latencies.quantile(settings["hedge_quantile"])
+                delay = max(settings["hedge_min_delay"], delay or settings["hedge_default_delay"])
+                response = await _hedged(endpoint, timed_send, delay, budget)
+            else:
+                response = await timed_send()
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                return response
+        except httpx.TransportError as e:
+            error = e
+
+        attempt += 1
+        exhausted = attempt >= settings["max_attempts"]
+        if not exhausted and not budget.try_acquire():
+            metrics.record_retry_budget_exhausted(endpoint)
+            exhausted = True
+        if exhausted:
+            if error is not None:
+                raise error
+            return response
+
+        metrics.record_deepagents_retry(endpoint, "retry")
+        ceiling = min(settings["retry_max"], settings["retry_base"] * 2 ** (attempt - 1))
+        await asyncio.sleep(random.uniform(0, ceiling))
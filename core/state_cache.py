@@ -0,0 +1,144 @@
+"""
+In-process cache of deepagents-runtime execution state.
+
+Polling and status checks ask for the same thread's state over and over,
+and terminal states never change. Completed and failed states are kept
+until the thread is cleaned up (or evicted by the LRU bound), running states
+only for a short TTL. Concurrent lookups for the same thread share one
+upstream request.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from core.metrics import metrics
+from core.polling import TERMINAL_STATUSES
+
+# One cache per event loop; in-flight lookups are futures bound to it
+_caches: Dict[asyncio.AbstractEventLoop, "StateCache"] = {}
+
+
+def get_state_cache_settings() -> Dict[str, float]:
+    """Read state cache size and TTLs from environment variables."""
+    return {
+        "max_size": int(os.getenv("DEEPAGENTS_STATE_CACHE_SIZE", "1000")),
+        "running_ttl": float(os.getenv("DEEPAGENTS_STATE_CACHE_RUNNING_TTL", "0.25")),
+        "terminal_ttl": float(os.getenv("DEEPAGENTS_STATE_CACHE_TERMINAL_TTL", "0")),
+    }
+
+
+class StateCache:
+    """LRU cache of execution states with status-dependent TTLs and single-flight fetches."""
+
+    def __init__(self, settings: Optional[Dict[str, float]] = None):
+        self.settings = settings or get_state_cache_settings()
+        # thread_id -> (expires_at or None for no expiry, terminal, state)
+        self._entries: "OrderedDict[str, Tuple[Optional[float], bool, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+    def _lookup(self, thread_id: str, fresh: bool) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            return None
+        expires_at, terminal, state = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[thread_id]
+            return None
+        if fresh and not terminal:
+            return None
+        self._entries.move_to_end(thread_id)
+        return state
+
+    def _store(self, thread_id: str, state: Dict[str, Any]) -> None:
+        terminal = state.get("status", "running") in TERMINAL_STATUSES
+        ttl = self.settings["terminal_ttl"] if terminal else self.settings["running_ttl"]
+        if not terminal and ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl if ttl > 0 else None
+        self._entries[thread_id] = (expires_at, terminal, state)
+        self._entries.move_to_end(thread_id)
+        while len(self._entries) > self.settings["max_size"]:
+            self._entries.popitem(last=False)
+        metrics.record_state_cache_size(len(self._entries))
+
+    async def get(
+        self,
+        thread_id: str,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+        fresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get a thread's state from the cache or via ``fetch``.
+
+        Args:
+            thread_id: Thread ID from deepagents-runtime
+            fetch: Coroutine function fetching the state upstream
+            fresh: Ignore cached non-terminal states and fetch without sharing,
+                e.g. for long-polls waiting for the state to change
+
+        Returns:
+            A copy of the state, so callers cannot alter the cached entry
+        """
+        state = self._lookup(thread_id, fresh)
+        if state is not None:
+            metrics.record_state_cache_lookup("hit")
+            return dict(state)
+
+        if not fresh and thread_id in self._in_flight:
+            metrics.record_state_cache_lookup("shared")
+            future = self._in_flight[thread_id]
+            try:
+                return dict(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The request we joined was cancelled, not us; fetch again
+                return await self.get(thread_id, fetch, fresh)
+
+        metrics.record_state_cache_lookup("miss")
+        if fresh:
+            state = await fetch()
+            self._store(thread_id, state)
+            return dict(state)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[thread_id] = future
+        try:
+            state = await fetch()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark retrieved so an unshared failure is not logged as unhandled
+                future.exception()
+            raise
+        else:
+            self._store(thread_id, state)
+            future.set_result(state)
+            return dict(state)
+        finally:
+            del self._in_flight[thread_id]
+
+    def invalidate(self, thread_id: str) -> None:
+        """Drop a thread's cached state, e.g. after cleanup or a stream-reported change."""
+        if self._entries.pop(thread_id, None) is not None:
+            metrics.record_state_cache_size(len(self._entries))
+
+
+def get_state_cache() -> StateCache:
+    """Get the state cache for the running event loop."""
+    loop = asyncio.get_running_loop()
+    cache = _caches.get(loop)
+    if cache is None:
+        cache = StateCache()
+        _caches[loop] = cache
+    return cache
+
+
+def invalidate(thread_id: str) -> None:
+    """Drop a thread's cached state on the running event loop."""
+    get_state_cache().invalidate(thread_id)
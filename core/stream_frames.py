@@ -0,0 +1,172 @@
+"""
+Upstream stream frames forwarded without re-parsing.
+
+Most of a refinement stream is ``on_llm_stream`` token frames with large
+``raw_event`` strings that the orchestrator never looks into. Decoding each
+one only to read ``event_type`` and encoding it again for the client costs a
+full JSON round trip per token. Frames are instead kept as the text received
+from deepagents-runtime: ``event_type`` is read with a prefix scan and only
+the frames the orchestrator acts on are parsed.
+
+Every ``on_state_update`` repeats the thread's whole ``files`` dict. For
+clients that opt in, such a frame can instead be sent as a ``files_delta``
+against the previous state: added, changed and removed paths, with changed
+files optionally reduced to line-level patches.
+"""
+
+import difflib
+import json
+from typing import Any, Dict, List, Optional
+
+# Frames the orchestrator needs the content of (files, completion)
+PARSED_EVENT_TYPES = frozenset({"on_state_update", "end"})
+
+# How a client can receive the files of on_state_update events besides in full:
+# changed files whole, or as line patches
+FILES_DELTA_MODES = ("files", "lines")
+
+_EVENT_TYPE_KEY = '"event_type"'
+
+
+def sniff_event_type(text: str) -> Optional[str]:
+    """
+    Read ``event_type`` from a frame without parsing it.
+
+    Only succeeds when ``event_type`` is the frame's first key with a plain
+    string value, as deepagents-runtime sends it.
+
+    Returns:
+        The event type, or None if the frame has to be parsed to find it
+    """
+    start = text.find("{")
+    if start < 0 or text[:start].strip():
+        return None
+    key = text.find(_EVENT_TYPE_KEY, start + 1)
+    if key < 0 or text[start + 1:key].strip():
+        return None
+    value = text.find('"', key + len(_EVENT_TYPE_KEY))
+    if value < 0 or text[key + len(_EVENT_TYPE_KEY):value].strip() != ":":
+        return None
+    end = text.find('"', value + 1)
+    if end < 0 or "\\" in text[value + 1:end]:
+        return None
+    return text[value + 1:end]
+
+
+def diff_files(previous: Dict[str, Any], current: Dict[str, Any], lines: bool = False) -> Dict[str, Any]:
+    """
+    Paths added, changed and removed between two ``files`` states.
+
+    With ``lines``, a changed file whose ``content`` is a list of lines gets a
+    ``patch`` instead of ``content``: ``[start, end, new_lines]`` entries in
+    ascending order, each replacing ``old[start:end]``, to be applied from
+    last to first. Files the patch would not shrink keep their full content.
+    """
+    added: Dict[str, Any] = {}
+    changed: Dict[str, Any] = {}
+    for path, file in current.items():
+        if path not in previous:
+            added[path] = file
+        elif previous[path] is not file and previous[path] != file:
+            changed[path] = _patch_file(previous[path], file) if lines else file
+    removed = [path for path in previous if path not in current]
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+def _patch_file(old: Any, new: Any) -> Any:
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return new
+    old_lines, new_lines = old.get("content"), new.get("content")
+    if not isinstance(old_lines, list) or not isinstance(new_lines, list):
+        return new
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    patch = [
+        [i1, i2, new_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+    if len(patch) + sum(len(replacement) for _, _, replacement in patch) >= len(new_lines):
+        return new
+    patched = {key: value for key, value in new.items() if key != "content"}
+    patched["patch"] = patch
+    return patched
+
+
+class StreamEvent:
+    """
+    A frame as forwarded to clients: its text plus what the hub needs to route it.
+
+    ``parsed`` is only set for frames that had to be decoded. State updates
+    carrying files also reference the thread's previous files state
+    (``previous_files`` as of ``base_seq``) so they can be delta encoded.
+    """
+
+    __slots__ = ("event_type", "text", "parsed", "seq", "base_seq", "previous_files", "_deltas")
+
+    def __init__(self, event_type: Optional[str], text: str, parsed: Optional[Dict[str, Any]] = None):
+        self.event_type = event_type
+        self.text = text
+        self.parsed = parsed
+        self.seq: Optional[int] = None
+        self.base_seq: Optional[int] = None
+        self.previous_files: Optional[Dict[str, Any]] = None
+        self._deltas: Dict[bool, str] = {}
+
+    @classmethod
+    def from_frame(cls, text: str) -> "StreamEvent":
+        """
+        Wrap an upstream text frame, parsing it only if its type requires it.
+
+        Raises:
+            json.JSONDecodeError: If a frame that has to be parsed is not valid JSON
+        """
+        event_type = sniff_event_type(text)
+        if event_type is not None and event_type not in PARSED_EVENT_TYPES:
+            return cls(event_type, text)
+        parsed = json.loads(text)
+        return cls(parsed.get("event_type"), text, parsed)
+
+    @classmethod
+    def from_dict(cls, event: Dict[str, Any]) -> "StreamEvent":
+        """Build an event generated by the orchestrator itself."""
+        return cls(event.get("event_type"), json.dumps(event), event)
+
+    def number(self, seq: int) -> None:
+        """Add ``seq`` as the frame's first key by splicing the text, not re-encoding it."""
+        start = self.text.index("{") + 1
+        rest = self.text[start:]
+        separator = "" if rest.lstrip().startswith("}") else ", "
+        self.text = f'{{"seq": {seq}{separator}{rest}'
+        self.seq = seq
+        if self.parsed is not None:
+            self.parsed["seq"] = seq
+
+    @property
+    def files(self) -> Optional[Dict[str, Any]]:
+        """The files of an ``on_state_update`` event, or None if it carries none."""
+        if self.event_type != "on_state_update" or self.parsed is None:
+            return None
+        data = self.parsed.get("data", {})
+        return data["files"] if "files" in data else None
+
+    def files_delta(self, lines: bool = False) -> str:
+        """
+        The frame with ``data.files`` replaced by ``data.files_delta``.
+
+        The delta is taken against ``previous_files`` and names it by
+        ``base_seq``; it is encoded once per mode and shared by all clients.
+        """
+        text = self._deltas.get(lines)
+        if text is None:
+            delta = diff_files(self.previous_files or {}, self.files, lines)
+            delta["base_seq"] = self.base_seq
+            data = {key: value for key, value in self.parsed["data"].items() if key != "files"}
+            data["files_delta"] = delta
+            text = json.dumps(dict(self.parsed, data=data))
+            self._deltas[lines] = text
+        return text
+
+
+def encode_batch(events: List[StreamEvent]) -> str:
+    """Join event frames into one JSON array frame without re-encoding them."""
+    return "[" + ",".join(event.text for event in events) + "]"
@@ -0,0 +1,610 @@
+"""
+In-process fan-out of deepagents-runtime event streams.
+
+Several clients may watch the same thread, e.g. two IDE tabs or an owner and
+a viewer. The hub keeps a single upstream WebSocket per thread and broadcasts
+each event to every subscriber. The upstream is reference counted and closed
+once the last subscriber leaves. The stream's outcome is reported to one
+completion callback, so the proposal is finalized exactly once no matter how
+many clients are watching.
+
+Every forwarded event carries a per-thread sequence number (``seq``) and is
+kept in a bounded replay buffer. A client whose socket dropped reconnects
+with the last sequence number it saw and gets the missed events from memory
+before switching to live ones. After the last subscriber leaves, the upstream
+lingers briefly so such a reconnect resumes the same stream.
+
+Each subscriber has a bounded send queue, so a slow client cannot make
+memory grow without limit. What happens when it is full is a policy:
+``block`` pauses the shared upstream read until the client catches up,
+``drop`` discards new ``on_llm_stream`` events, ``coalesce`` discards the
+oldest queued ``on_llm_stream`` events in favour of newer ones, and
+``disconnect`` closes the client with a resumable close code. Skipped events
+show up as gaps in ``seq`` and can be fetched again with ``?since=``. Events
+other than ``on_llm_stream`` are never dropped; if they do not fit, the
+client is disconnected.
+
+Events travel through the hub as ``StreamEvent`` text frames (see
+core.stream_frames), so token frames reach clients without being re-parsed.
+Clients that opt in receive consecutive ``on_llm_stream`` events batched
+into one array frame, collected for at most a short window.
+
+The buffer also tracks the last files state forwarded for the thread. Clients
+asking for deltas get each ``on_state_update`` with only the paths that
+changed since the previous one; a client without that base (a new or
+reconnected subscription, or one that asked for a resync) gets its next
+state update in full or a ``files_snapshot`` event.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import websockets
+
+from core.metrics import metrics
+from core.stream_frames import StreamEvent
+
+logger = logging.getLogger(__name__)
+
+# Threads whose outcome was already reported, so a stream reopened after the
+# end event does not finalize the proposal a second time
+FINALIZED_HISTORY = 10000
+
+SEND_QUEUE_POLICIES = ("block", "drop", "coalesce", "disconnect")
+
+# Events that may be skipped for a slow client
+DROPPABLE_EVENT_TYPE = "on_llm_stream"
+
+# Close code telling a client it was too slow and should reconnect with ?since=
+SLOW_CLIENT_CLOSE_CODE = 4001
+
+# Client message asking for the thread's full files state, answered with a
+# files snapshot event instead of being forwarded upstream
+RESYNC_EVENT_TYPE = "resync"
+FILES_SNAPSHOT_EVENT_TYPE = "files_snapshot"
+
+CONNECT_ERROR_EVENT = {
+    "event_type": "error",
+    "data": {"error": "Failed to connect to AI service"}
+}
+
+# One hub per event loop; streams are tasks bound to it
+_hubs: Dict[asyncio.AbstractEventLoop, "StreamHub"] = {}
+
+
+def get_stream_settings() -> Dict[str, Any]:
+    """
+    Read replay buffer bounds, upstream linger time and send queue settings
+    from environment variables.
+
+    Raises:
+        ValueError: If DEEPAGENTS_STREAM_SEND_QUEUE_POLICY is not a known policy
+    """
+    policy = os.getenv("DEEPAGENTS_STREAM_SEND_QUEUE_POLICY", "coalesce")
+    if policy not in SEND_QUEUE_POLICIES:
+        raise ValueError(
+            f"DEEPAGENTS_STREAM_SEND_QUEUE_POLICY must be one of {', '.join(SEND_QUEUE_POLICIES)}"
+        )
+    return {
+        "replay_max_events": int(os.getenv("DEEPAGENTS_STREAM_REPLAY_EVENTS", "2000")),
+        "replay_max_bytes": int(os.getenv("DEEPAGENTS_STREAM_REPLAY_BYTES", str(4 * 1024 * 1024))),
+        "replay_ttl": float(os.getenv("DEEPAGENTS_STREAM_REPLAY_TTL", "300")),
+        "replay_max_threads": int(os.getenv("DEEPAGENTS_STREAM_REPLAY_THREADS", "500")),
+        "linger": float(os.getenv("DEEPAGENTS_STREAM_LINGER", "5")),
+        "send_queue_size": int(os.getenv("DEEPAGENTS_STREAM_SEND_QUEUE_SIZE", "256")),
+        "send_queue_policy": policy,
+        "batch_window": float(os.getenv("DEEPAGENTS_STREAM_BATCH_WINDOW_MS", "25")) / 1000,
+        "batch_max_events": int(os.getenv("DEEPAGENTS_STREAM_BATCH_MAX_EVENTS", "32")),
+    }
+
+
+class ReplayBuffer:
+    """
+    Ring buffer of a thread's recent events, bounded by count, bytes and age.
+
+    Sequence numbers keep increasing across upstream reconnects of the thread.
+    """
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings = settings
+        # (seq, received_at, size, event)
+        self.events: Deque[Tuple[int, float, int, StreamEvent]] = deque()
+        self.size = 0
+        self.last_seq = 0
+        self.finished = False
+        self.updated_at = time.monotonic()
+        # Last files state forwarded for the thread and the seq it came with
+        self.files: Dict[str, Any] = {}
+        self.files_seq: Optional[int] = None
+
+    def append(self, event: StreamEvent) -> int:
+        """Number the event, store it and evict what no longer fits."""
+        self.last_seq += 1
+        event.number(self.last_seq)
+        files = event.files
+        if files is not None:
+            event.base_seq, event.previous_files = self.files_seq, self.files
+            self.files, self.files_seq = files, self.last_seq
+        size = len(event.text)
+        self.updated_at = time.monotonic()
+        self.events.append((self.last_seq, self.updated_at, size, event))
+        self.size += size
+        while self.events and (
+            len(self.events) > self.settings["replay_max_events"]
+            or self.size > self.settings["replay_max_bytes"]
+        ):
+            self._pop()
+        return self.last_seq
+
+    def _pop(self) -> None:
+        _, _, size, _ = self.events.popleft()
+        self.size -= size
+
+    def expire(self, now: float) -> None:
+        """Drop events older than the replay TTL."""
+        cutoff = now - self.settings["replay_ttl"]
+        while self.events and self.events[0][1] < cutoff:
+            self._pop()
+
+    def since(self, seq: int) -> Tuple[bool, list]:
+        """
+        Events after ``seq``.
+
+        Returns:
+            Whether events between ``seq`` and the oldest buffered one were
+            evicted, and the buffered events after ``seq``
+        """
+        self.expire(time.monotonic())
+        oldest = self.events[0][0] if self.events else self.last_seq + 1
+        missed = seq + 1 < oldest and seq < self.last_seq
+        return missed, [event for event_seq, _, _, event in self.events if event_seq > seq]
+
+
+class SendQueue:
+    """Bounded queue of events waiting to be sent to one client."""
+
+    def __init__(self, maxsize: int, policy: str):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items: Deque[StreamEvent] = deque()
+        self.closed = False
+        self.overflowed = False
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    def push(self, event: StreamEvent) -> None:
+        """Queue an event regardless of the bound, e.g. for replays."""
+        if not self.closed:
+            self.items.append(event)
+            self._readable.set()
+            metrics.record_send_queue_depth(event.event_type, 1)
+
+    async def put(self, event: StreamEvent) -> None:
+        """Queue a live event, applying the overflow policy when the queue is full."""
+        if self.policy == "block":
+            while len(self.items) >= self.maxsize and not self.closed:
+                self._writable.clear()
+                await self._writable.wait()
+        elif len(self.items) >= self.maxsize and not self._make_room(event):
+            return
+        self.push(event)
+
+    def _make_room(self, event: StreamEvent) -> bool:
+        """Apply the drop, coalesce or disconnect policy; True if the event should be queued."""
+        event_type = event.event_type
+        if self.policy == "drop" and event_type == DROPPABLE_EVENT_TYPE:
+            metrics.record_send_queue_drop(event_type, self.policy)
+            return False
+        if self.policy in ("drop", "coalesce"):
+            for i, queued in enumerate(self.items):
+                if queued.event_type == DROPPABLE_EVENT_TYPE:
+                    del self.items[i]
+                    metrics.record_send_queue_depth(DROPPABLE_EVENT_TYPE, -1)
+                    metrics.record_send_queue_drop(DROPPABLE_EVENT_TYPE, self.policy)
+                    return True
+            if event_type == DROPPABLE_EVENT_TYPE:
+                metrics.record_send_queue_drop(event_type, self.policy)
+                return False
+        self.overflow()
+        return False
+
+    def overflow(self) -> None:
+        """Give up on a client that cannot keep up: discard its backlog and close."""
+        logger.warning(f"Client send queue full ({self.maxsize} events), disconnecting")
+        self.overflowed = True
+        self.clear()
+        self.close()
+        metrics.record_slow_client_disconnect()
+
+    def clear(self) -> None:
+        for event in self.items:
+            metrics.record_send_queue_depth(event.event_type, -1)
+        self.items.clear()
+
+    def close(self) -> None:
+        """No more events; queued ones are still delivered and blocked producers released."""
+        self.closed = True
+        self._readable.set()
+        self._writable.set()
+
+    async def get(self) -> Optional[StreamEvent]:
+        """The next queued event, or None once the queue is closed and empty."""
+        while not self.items:
+            if self.closed:
+                return None
+            self._readable.clear()
+            await self._readable.wait()
+        event = self.items.popleft()
+        self._writable.set()
+        metrics.record_send_queue_depth(event.event_type, -1)
+        return event
+
+
+class Subscription:
+    """A client's view of a shared thread stream, or of a finished thread's replay."""
+
+    def __init__(
+        self,
+        stream: Optional["ThreadStream"],
+        settings: Dict[str, Any],
+        buffer: Optional[ReplayBuffer] = None,
+        delta: Optional[str] = None
+    ):
+        self.stream = stream
+        self.buffer = stream.buffer if stream is not None else buffer
+        self.queue = SendQueue(settings["send_queue_size"], settings["send_queue_policy"])
+        self.last_seq = 0
+        # Files delta mode the client asked for, and the seq of the files state it holds
+        self.delta = delta
+        self.files_seq: Optional[int] = None
+        # Event read past the end of a batch, delivered first by the next call
+        self._pending: Optional[StreamEvent] = None
+
+    @property
+    def overflowed(self) -> bool:
+        """Whether the client was cut off for falling too far behind."""
+        return self.queue.overflowed
+
+    async def next_event(self) -> Optional[StreamEvent]:
+        """The next event, or None once the stream has closed."""
+        if self._pending is not None:
+            event, self._pending = self._pending, None
+            return event
+        event = await self.queue.get()
+        if event is not None and event.seq is not None:
+            self.last_seq = event.seq
+        return event
+
+    async def next_batch(self, max_events: int, window: float) -> Optional[List[StreamEvent]]:
+        """
+        The next event, or a run of consecutive ``on_llm_stream`` events.
+
+        After the first stream event, further ones are collected until
+        ``max_events`` are gathered, ``window`` seconds have passed or another
+        event type arrives; events already queued are taken without waiting.
+
+        Returns:
+            Events to send as one frame, or None once the stream has closed
+        """
+        event = await self.next_event()
+        if event is None or event.event_type != DROPPABLE_EVENT_TYPE:
+            return None if event is None else [event]
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        batch = [event]
+        while len(batch) < max_events:
+            if self.queue.items:
+                event = await self.next_event()
+            else:
+                timeout = started + window - loop.time()
+                if timeout <= 0 or self.queue.closed:
+                    break
+                try:
+                    event = await asyncio.wait_for(self.next_event(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if event is None:
+                break
+            if event.event_type != DROPPABLE_EVENT_TYPE:
+                self._pending = event
+                break
+            batch.append(event)
+        metrics.record_stream_batch(len(batch), loop.time() - started)
+        return batch
+
+    def frame(self, event: StreamEvent) -> str:
+        """
+        The text to send the client for an event.
+
+        State updates are sent as a files delta when the client holds the
+        state the delta is based on, and in full otherwise.
+        """
+        if self.delta is None:
+            return event.text
+        if event.event_type == FILES_SNAPSHOT_EVENT_TYPE:
+            self.files_seq = event.parsed["data"]["base_seq"]
+            return event.text
+        if event.files is None:
+            return event.text
+        text = event.text
+        if self.files_seq is not None and event.base_seq == self.files_seq:
+            text = event.files_delta(lines=self.delta == "lines")
+        self.files_seq = event.seq
+        metrics.record_state_update_sent(len(event.text), len(text))
+        return text
+
+    def resync(self) -> None:
+        """Queue a snapshot of the thread's current files behind the events already queued."""
+        if self.buffer is not None:
+            self.queue.push(StreamEvent.from_dict({
+                "event_type": FILES_SNAPSHOT_EVENT_TYPE,
+                "data": {"base_seq": self.buffer.files_seq, "files": self.buffer.files}
+            }))
+
+    async def send(self, message: str) -> None:
+        """Forward a client message to deepagents-runtime; dropped for finished threads."""
+        if self.stream is not None:
+            await self.stream.send(message)
+
+
+class ThreadStream:
+    """The single upstream connection of a thread and its subscribers."""
+
+    def __init__(
+        self,
+        hub: "StreamHub",
+        thread_id: str,
+        url: str,
+        on_end: Callable[[str, Dict[str, Any]], None],
+        on_error: Callable[[str, str], None]
+    ):
+        self.hub = hub
+        self.thread_id = thread_id
+        self.url = url
+        self.on_end = on_end
+        self.on_error = on_error
+        self.buffer = hub._buffer(thread_id)
+        self.subscribers: Set[Subscription] = set()
+        self.files: Dict[str, Any] = {}
+        self.closed = False
+        self.linger: Optional[asyncio.TimerHandle] = None
+        self._upstream = None
+        self._connected = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def send(self, message: str) -> None:
+        """Send a message upstream once connected; dropped if the stream is gone."""
+        await self._connected.wait()
+        if self._upstream is not None and not self.closed:
+            await self._upstream.send(message)
+
+    async def _broadcast(self, event: StreamEvent) -> None:
+        for subscription in list(self.subscribers):
+            await subscription.queue.put(event)
+
+    def _close(self) -> None:
+        if self.linger is not None:
+            self.linger.cancel()
+        if not self.closed:
+            self.closed = True
+            self._connected.set()
+            for subscription in self.subscribers:
+                subscription.queue.close()
+            self.hub._remove(self)
+
+    async def _run(self) -> None:
+        try:
+            async with websockets.connect(self.url) as upstream:
+                logger.info(f"Connected to deepagents-runtime WebSocket for thread: {self.thread_id}")
+                self._upstream = upstream
+                self._connected.set()
+                await self._pump(upstream)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self._upstream is None:
+                logger.error(f"Failed to connect to deepagents-runtime: {e}")
+                for subscription in self.subscribers:
+                    subscription.queue.push(StreamEvent.from_dict(CONNECT_ERROR_EVENT))
+            else:
+                logger.error(f"DeepAgents stream error for thread {self.thread_id}: {e}")
+                self.hub._finalize(self.thread_id, lambda: self.on_error(self.thread_id, str(e)))
+        finally:
+            self._close()
+
+    async def _pump(self, upstream) -> None:
+        async for message in upstream:
+            if isinstance(message, bytes):
+                message = message.decode()
+            try:
+                event = StreamEvent.from_frame(message)
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse deepagents message: {e}")
+                continue
+
+            self.buffer.append(event)
+            event_type = event.event_type
+            logger.debug(f"Received event from deepagents-runtime for thread {self.thread_id}: {event_type}")
+            if event.files is not None:
+                self.files = event.files
+                logger.info(f"Extracted {len(self.files)} files from on_state_update for thread: {self.thread_id}")
+
+            if event_type == "end":
+                logger.info(f"Received end event for thread: {self.thread_id}")
+                self.buffer.finished = True
+                self.hub._finalize(self.thread_id, lambda: self.on_end(self.thread_id, self.files))
+                await self._broadcast(event)
+                return
+            await self._broadcast(event)
+
+
+class StreamHub:
+    """Registry of shared thread streams and their replay buffers on one event loop."""
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or get_stream_settings()
+        self.streams: Dict[str, ThreadStream] = {}
+        self.buffers: "OrderedDict[str, ReplayBuffer]" = OrderedDict()
+        self._finalized: "OrderedDict[str, None]" = OrderedDict()
+
+    def _buffer(self, thread_id: str) -> ReplayBuffer:
+        self._prune_buffers()
+        buffer = self.buffers.get(thread_id)
+        if buffer is None:
+            buffer = ReplayBuffer(self.settings)
+            self.buffers[thread_id] = buffer
+        self.buffers.move_to_end(thread_id)
+        return buffer
+
+    def _prune_buffers(self) -> None:
+        """Drop buffers of inactive threads past the TTL or over the thread cap."""
+        cutoff = time.monotonic() - self.settings["replay_ttl"]
+        inactive = [thread_id for thread_id in self.buffers if thread_id not in self.streams]
+        excess = len(self.buffers) - self.settings["replay_max_threads"]
+        for thread_id in inactive:
+            if excess > 0 or self.buffers[thread_id].updated_at < cutoff:
+                del self.buffers[thread_id]
+                excess -= 1
+
+    def _remove(self, stream: ThreadStream) -> None:
+        if self.streams.get(stream.thread_id) is stream:
+            del self.streams[stream.thread_id]
+            metrics.record_stream_upstreams(len(self.streams))
+
+    def _finalize(self, thread_id: str, callback: Callable[[], None]) -> None:
+        """Run the outcome callback unless the thread was already finalized."""
+        if thread_id in self._finalized:
+            return
+        self._finalized[thread_id] = None
+        while len(self._finalized) > FINALIZED_HISTORY:
+            self._finalized.popitem(last=False)
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Stream completion handler failed for thread {thread_id}: {e}")
+
+    def _replay(self, subscription: Subscription, buffer: ReplayBuffer, since: int) -> None:
+        missed, events = buffer.since(since)
+        if missed:
+            # The client has to resync, e.g. from the proposal's stored state
+            subscription.queue.push(StreamEvent.from_dict({
+                "event_type": "replay_gap",
+                "data": {"since": since, "first_seq": events[0].seq if events else buffer.last_seq + 1}
+            }))
+        for event in events:
+            subscription.queue.push(event)
+        if missed and subscription.delta is not None:
+            # Evicted state updates may have changed files the replay does not cover
+            subscription.resync()
+        metrics.record_stream_replay(len(events), missed)
+
+    @asynccontextmanager
+    async def subscribe(
+        self,
+        thread_id: str,
+        url: str,
+        on_end: Callable[[str, Dict[str, Any]], None],
+        on_error: Callable[[str, str], None],
+        since: Optional[int] = None,
+        delta: Optional[str] = None
+    ) -> AsyncIterator[Subscription]:
+        """
+        Subscribe to a thread's event stream, connecting upstream if needed.
+
+        A finished thread whose events are still buffered is served entirely
+        from memory without reconnecting upstream.
+
+        Args:
+            thread_id: Thread ID from deepagents-runtime
+            url: Upstream stream URL, used when no stream is open yet
+            on_end: Called once with the final files when the stream ends
+            on_error: Called once with the error if the stream fails mid-way
+            since: Last sequence number the client received; buffered events
+                after it are replayed before live ones. None for live only.
+            delta: Files delta mode (see core.stream_frames.FILES_DELTA_MODES),
+                or None to receive state updates in full
+
+        Yields:
+            Subscription delivering events until the stream closes
+        """
+        buffer = self.buffers.get(thread_id)
+        if buffer is not None and buffer.finished:
+            subscription = Subscription(None, self.settings, buffer, delta)
+            self._replay(subscription, buffer, since or 0)
+            subscription.queue.close()
+            try:
+                yield subscription
+            finally:
+                subscription.queue.clear()
+            return
+
+        stream = self.streams.get(thread_id)
+        if stream is None:
+            stream = ThreadStream(self, thread_id, url, on_end, on_error)
+            self.streams[thread_id] = stream
+            metrics.record_stream_upstreams(len(self.streams))
+        elif stream.linger is not None:
+            stream.linger.cancel()
+            stream.linger = None
+
+        subscription = Subscription(stream, self.settings, delta=delta)
+        if since is not None:
+            self._replay(subscription, stream.buffer, since)
+        stream.subscribers.add(subscription)
+        metrics.record_stream_subscriber(1)
+        try:
+            yield subscription
+        finally:
+            stream.subscribers.discard(subscription)
+            # Release the upstream if it is blocked on this client and drop its backlog
+            subscription.queue.close()
+            subscription.queue.clear()
+            metrics.record_stream_subscriber(-1)
+            if not stream.subscribers and not stream.closed:
+                # Last subscriber left: keep the upstream briefly for reconnects, then tear it down
+                if self.settings["linger"] > 0:
+                    stream.linger = asyncio.get_running_loop().call_later(
+                        self.settings["linger"], self._teardown, stream
+                    )
+                else:
+                    self._teardown(stream)
+                    await asyncio.wait([stream.task])
+
+    def _teardown(self, stream: ThreadStream) -> None:
+        if not stream.subscribers:
+            logger.info(f"Closing deepagents-runtime stream for thread {stream.thread_id}: no subscribers left")
+            self._remove(stream)
+            stream.task.cancel()
+
+    async def close(self) -> None:
+        """Close every upstream stream, e.g. on shutdown."""
+        tasks = [stream.task for stream in self.streams.values()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+
+
+def get_stream_hub() -> StreamHub:
+    """Get the stream hub for the running event loop."""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = StreamHub()
+        _hubs[loop] = hub
+    return hub
+
+
+async def close_stream_hub() -> None:
+    """Close the running loop's upstream streams and forget the hub."""
+    hub = _hubs.pop(asyncio.get_running_loop(), None)
+    if hub is not None:
+        await hub.close()
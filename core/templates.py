@@ -0,0 +1,52 @@
+"""
+Workflow templates shipped in the repository's templates/ directory.
+
+Templates are parsed once and kept in memory; the startup warm-up preloads
+them so the first request does not pay for file I/O and JSON parsing.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+_templates: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def get_templates_dir() -> Path:
+    """Directory holding template JSON files, overridable with TEMPLATES_DIR."""
+    return Path(os.getenv("TEMPLATES_DIR", str(DEFAULT_TEMPLATES_DIR)))
+
+
+def load_templates(directory: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse every ``*.json`` template and replace the in-memory set.
+
+    Templates are keyed by their ``template_id``, falling back to the file name.
+
+    Args:
+        directory: Templates directory, defaults to get_templates_dir()
+
+    Returns:
+        Templates keyed by template ID
+    """
+    global _templates
+    directory = directory or get_templates_dir()
+    templates = {}
+    for path in sorted(directory.glob("*.json")):
+        template = json.loads(path.read_text())
+        templates[template.get("template_id", path.stem)] = template
+    _templates = templates
+    return templates
+
+
+def list_templates() -> List[Dict[str, Any]]:
+    """All templates, loading them on first use."""
+    return list((_templates if _templates is not None else load_templates()).values())
+
+
+def get_template(template_id: str) -> Optional[Dict[str, Any]]:
+    """A template by ID, or None if there is no such template."""
+    return (_templates if _templates is not None else load_templates()).get(template_id)
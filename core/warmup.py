@@ -0,0 +1,156 @@
+"""
+Startup warm-up of upstream connections.
+
+A fresh replica would otherwise pay for DNS resolution, TCP/TLS setup to
+deepagents-runtime, filling the database pool and parsing templates on its
+first requests. The lifespan runs the warm-up in the background and the
+readiness probe reports ready only once it has finished, so traffic arrives
+after the expensive setup is done. Failed steps are logged and reported but
+do not block readiness: an unreachable runtime is handled per request.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from psycopg_pool import AsyncConnectionPool
+
+from core import load_balancer, templates
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_ready = False
+_results: Dict[str, str] = {}
+
+
+def get_warmup_settings() -> Dict[str, Any]:
+    """Read warm-up settings from environment variables."""
+    return {
+        "enabled": os.getenv("STARTUP_WARMUP", "true").lower() == "true",
+        "timeout": float(os.getenv("STARTUP_WARMUP_TIMEOUT", "10")),
+        "connections": int(os.getenv("DEEPAGENTS_WARMUP_CONNECTIONS", "4")),
+    }
+
+
+def is_ready() -> bool:
+    """Whether warm-up has finished."""
+    return _ready
+
+
+def get_results() -> Dict[str, str]:
+    """Outcome per warm-up step ("ok", "pending" or the error)."""
+    return dict(_results)
+
+
+def reset() -> None:
+    """Mark the process as not ready, e.g. while shutting down."""
+    global _ready
+    _ready = False
+    _results.clear()
+    metrics.record_ready(False)
+
+
+def _runtime_hosts() -> List[Any]:
+    """(host, port) pairs of every configured runtime URL, including the WebSocket URL."""
+    urls = load_balancer.get_runtime_urls()
+    if ws_url := os.getenv("DEEPAGENTS_RUNTIME_WS_URL"):
+        urls.append(ws_url)
+    hosts = set()
+    for url in urls:
+        parts = urlsplit(url)
+        default_port = 443 if parts.scheme in ("https", "wss") else 80
+        hosts.add((parts.hostname, parts.port or default_port))
+    return sorted(hosts)
+
+
+async def resolve_runtime_hosts() -> None:
+    """Resolve runtime host names so the resolver cache is warm."""
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.getaddrinfo(host, port) for host, port in _runtime_hosts()))
+
+
+async def preconnect_runtime(client: httpx.AsyncClient, connections: int) -> None:
+    """
+    Open keep-alive connections to every runtime instance.
+
+    Concurrent health requests force the pool to open ``connections`` separate
+    connections per instance, which then stay idle in the pool.
+    """
+    balancer = load_balancer.get_load_balancer()
+    path = balancer.settings["health_check_path"]
+
+    async def connect(url: str) -> None:
+        response = await client.get(url + path)
+        balancer.record_health(url, response.status_code < 500)
+
+    results = await asyncio.gather(
+        *(connect(url) for url in balancer.urls for _ in range(connections)),
+        return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, Exception)]
+    if len(errors) == len(results):
+        raise errors[0]
+
+
+async def warm_database(pools: List[AsyncConnectionPool], timeout: float) -> None:
+    """Wait until every pool holds its minimum connections, then run a round trip."""
+    for pool in pools:
+        await pool.wait(timeout=timeout)
+        async with pool.connection() as conn:
+            await conn.execute("SELECT 1")
+
+
+async def preload_templates() -> None:
+    """Parse workflow templates off the event loop."""
+    await asyncio.to_thread(templates.load_templates)
+
+
+async def _run_step(name: str, step: Awaitable[None], timeout: float) -> None:
+    start = time.monotonic()
+    try:
+        await asyncio.wait_for(step, timeout=timeout)
+        _results[name] = "ok"
+    except Exception as e:
+        _results[name] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        logger.warning(f"Warm-up step {name} failed: {_results[name]}")
+    metrics.record_warmup_step(name, _results[name] == "ok", time.monotonic() - start)
+
+
+async def warm_up(
+    pools: List[AsyncConnectionPool],
+    client: httpx.AsyncClient,
+    settings: Optional[Dict[str, Any]] = None
+) -> Dict[str, str]:
+    """
+    Run all warm-up steps concurrently and mark the process ready.
+
+    Args:
+        pools: Database pools to fill
+        client: Shared deepagents-runtime HTTP client to pre-connect
+        settings: Warm-up settings, defaults to get_warmup_settings()
+
+    Returns:
+        Outcome per step
+    """
+    global _ready
+    settings = settings or get_warmup_settings()
+    if settings["enabled"]:
+        steps = {
+            "dns": resolve_runtime_hosts(),
+            "http": preconnect_runtime(client, settings["connections"]),
+            "database": warm_database(pools, settings["timeout"]),
+            "templates": preload_templates(),
+        }
+        _results.update({name: "pending" for name in steps})
+        await asyncio.gather(
+            *(_run_step(name, step, settings["timeout"]) for name, step in steps.items())
+        )
+
+    _ready = True
+    metrics.record_ready(True)
+    return get_results()
@@ -0,0 +1,4 @@
+-- Rollback keyset pagination indexes
+
+DROP INDEX IF EXISTS idx_proposals_draft_created_id;
+DROP INDEX IF EXISTS idx_workflows_owner_created_id;
\ No newline at end of file
@@ -0,0 +1,12 @@
+-- Add composite indexes backing keyset-paginated listing endpoints
+-- Each index matches a listing's filter column followed by its sort key, so a
+-- page is a single index range scan no matter how deep the cursor is.
+-- versions listings already use idx_versions_workflow_version (workflow_id, version_number DESC).
+
+-- A user's workflows, newest first
+CREATE INDEX IF NOT EXISTS idx_workflows_owner_created_id
+    ON workflows(created_by_user_id, created_at DESC, id DESC);
+
+-- A draft's proposals, newest first
+CREATE INDEX IF NOT EXISTS idx_proposals_draft_created_id
+    ON proposals(draft_id, created_at DESC, id DESC);
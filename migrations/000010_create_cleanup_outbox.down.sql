@@ -0,0 +1,4 @@
+-- Rollback cleanup outbox
+
+DROP INDEX IF EXISTS idx_cleanup_outbox_pending;
+DROP TABLE IF EXISTS cleanup_outbox;
\ No newline at end of file
@@ -0,0 +1,25 @@
+-- Create durable outbox for deepagents-runtime checkpointer cleanup
+-- Rows are written in the same transaction that resolves a proposal and are
+-- drained by a background worker, so cleanups survive restarts and failures.
+
+CREATE TABLE IF NOT EXISTS cleanup_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    thread_id VARCHAR(255) NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    failed_at TIMESTAMP WITH TIME ZONE,
+
+    -- Constraints
+    CONSTRAINT unique_cleanup_thread UNIQUE (thread_id),
+    CONSTRAINT attempts_non_negative CHECK (attempts >= 0)
+);
+
+-- Pending rows in claim order; parked (failed) rows are excluded
+CREATE INDEX IF NOT EXISTS idx_cleanup_outbox_pending
+    ON cleanup_outbox(next_attempt_at) WHERE failed_at IS NULL;
+
+COMMENT ON TABLE cleanup_outbox IS 'Pending deepagents-runtime checkpointer cleanups';
+COMMENT ON COLUMN cleanup_outbox.next_attempt_at IS 'Earliest time of the next attempt; also the lease expiry of a claimed row';
+COMMENT ON COLUMN cleanup_outbox.failed_at IS 'Set when retries are exhausted; the row is kept for inspection';
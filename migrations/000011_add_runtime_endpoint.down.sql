@@ -0,0 +1,4 @@
+-- Rollback runtime endpoint columns
+
+ALTER TABLE cleanup_outbox DROP COLUMN IF EXISTS runtime_endpoint;
+ALTER TABLE proposals DROP COLUMN IF EXISTS runtime_endpoint;
\ No newline at end of file
@@ -0,0 +1,13 @@
+-- Record which deepagents-runtime instance owns each thread
+-- With several runtime replicas, a thread's state, stream and checkpointer
+-- data live on the instance that created it. Persisting it lets any
+-- orchestrator replica route later calls for the thread there.
+
+ALTER TABLE proposals
+ADD COLUMN IF NOT EXISTS runtime_endpoint VARCHAR(255);
+
+ALTER TABLE cleanup_outbox
+ADD COLUMN IF NOT EXISTS runtime_endpoint VARCHAR(255);
+
+COMMENT ON COLUMN proposals.runtime_endpoint IS 'Base URL of the deepagents-runtime instance that owns thread_id';
+COMMENT ON COLUMN cleanup_outbox.runtime_endpoint IS 'Base URL of the deepagents-runtime instance holding the thread data';
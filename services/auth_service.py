@@ -1,16 +1,19 @@
 """Authentication service for database operations."""
 
+import asyncio
 from typing import Optional
-import psycopg
-from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
 import bcrypt
 
+from core.database import connect
+
 
 class AuthService:
     """Service for authentication database operations."""
     
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, pool: Optional[AsyncConnectionPool] = None):
         self.database_url = database_url
+        self.pool = pool
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash."""
@@ -19,11 +22,11 @@ class AuthService:
             hashed_password.encode('utf-8')
         )
     
-    def authenticate_user(self, email: str, password: str) -> Optional[dict]:
+    async def authenticate_user(self, email: str, password: str) -> Optional[dict]:
         """Authenticate a user by email and password."""
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with connect(self.database_url, self.pool) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     SELECT id, email, hashed_password
                     FROM users
@@ -31,17 +34,15 @@ class AuthService:
                     """,
                     (email,)
                 )
-                user = cur.fetchone()
+                user = await cur.fetchone()
                 
                 if not user:
                     return None
                 
-                if not self.verify_password(password, user["hashed_password"]):
+                # bcrypt is CPU-bound; keep it off the event loop
+                if not await asyncio.to_thread(
+                    self.verify_password, password, user["hashed_password"]
+                ):
                     return None
                 
-                # Convert UUID objects to strings for JSON serialization
-                result = {
-                    "id": str(user["id"]),
-                    "email": user["email"]
-                }
-                return result
+                return {"id": user["id"], "email": user["email"]}
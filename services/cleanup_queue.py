@@ -0,0 +1,229 @@
+"""
+Durable cleanup queue for deepagents-runtime checkpointer data.
+
+Resolving a proposal enqueues its thread in the cleanup_outbox table inside
+the same transaction, and a background worker drains the outbox in batches.
+Cleanups therefore survive restarts and runtime outages, are retried with
+backoff, and never run as untracked fire-and-forget tasks.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg_pool import AsyncConnectionPool
+
+from core.database import connect
+from core.metrics import metrics
+from .deepagents_client import DeepAgentsRuntimeClient
+
+logger = logging.getLogger(__name__)
+
+# One worker per event loop, like the connection pools it uses
+_workers: Dict[asyncio.AbstractEventLoop, Tuple[asyncio.Task, asyncio.Event]] = {}
+
+
+def get_cleanup_settings() -> Dict[str, Any]:
+    """Read cleanup worker settings from environment variables."""
+    return {
+        "batch_size": int(os.getenv("CLEANUP_BATCH_SIZE", "50")),
+        "concurrency": int(os.getenv("CLEANUP_CONCURRENCY", "4")),
+        "max_attempts": int(os.getenv("CLEANUP_MAX_ATTEMPTS", "8")),
+        "retry_base": float(os.getenv("CLEANUP_RETRY_BASE", "2")),
+        "retry_max": float(os.getenv("CLEANUP_RETRY_MAX", "300")),
+        "lease": float(os.getenv("CLEANUP_LEASE", "60")),
+        "poll_interval": float(os.getenv("CLEANUP_POLL_INTERVAL", "5")),
+        "batch_endpoint": os.getenv("DEEPAGENTS_BATCH_CLEANUP", "false").lower() == "true",
+    }
+
+
+class CleanupQueue:
+    """Postgres-backed outbox of threads whose runtime data should be deleted."""
+
+    def __init__(
+        self,
+        database_url: str,
+        pool: Optional[AsyncConnectionPool] = None,
+        deepagents_client: Optional[DeepAgentsRuntimeClient] = None
+    ):
+        self.database_url = database_url
+        self.pool = pool
+        self.deepagents_client = deepagents_client or DeepAgentsRuntimeClient()
+        self.settings = get_cleanup_settings()
+
+    async def enqueue(self, thread_id: str, runtime_endpoint: Optional[str] = None) -> None:
+        """
+        Add a thread to the outbox.
+
+        Joins the caller's unit of work when there is one, so the cleanup is
+        recorded if and only if the surrounding transaction commits.
+
+        Args:
+            thread_id: Thread ID whose checkpointer data should be removed
+            runtime_endpoint: deepagents-runtime instance holding the thread, if known
+        """
+        async with connect(self.database_url, self.pool) as conn:
+            await conn.execute(
+                """
+                INSERT INTO cleanup_outbox (thread_id, runtime_endpoint) VALUES (%s, %s)
+                ON CONFLICT (thread_id) DO NOTHING
+                """,
+                (thread_id, runtime_endpoint)
+            )
+
+    async def claim_batch(self) -> List[Dict[str, Any]]:
+        """
+        Claim due rows for processing.
+
+        Claimed rows are leased by pushing next_attempt_at forward, so a worker
+        that dies mid-batch only delays them. SKIP LOCKED lets several
+        orchestrator replicas drain the same outbox.
+
+        Returns:
+            Claimed rows with id, thread_id, attempts and runtime_endpoint
+        """
+        async with connect(self.database_url, self.pool) as conn:
+            cur = await conn.execute(
+                """
+                UPDATE cleanup_outbox
+                SET attempts = attempts + 1,
+                    next_attempt_at = NOW() + make_interval(secs => %s)
+                WHERE id IN (
+                    SELECT id FROM cleanup_outbox
+                    WHERE failed_at IS NULL AND next_attempt_at <= NOW()
+                    ORDER BY next_attempt_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, thread_id, attempts, runtime_endpoint
+                """,
+                (self.settings["lease"], self.settings["batch_size"])
+            )
+            return await cur.fetchall()
+
+    async def _cleanup(self, rows: List[Dict[str, Any]]) -> Dict[int, bool]:
+        """Run cleanups for claimed rows, returning success per row id."""
+        for row in rows:
+            if row["runtime_endpoint"]:
+                # Route to the owning instance even if this process never saw the thread
+                self.deepagents_client.pin_thread(row["thread_id"], row["runtime_endpoint"])
+        
+        if self.settings["batch_endpoint"]:
+            result = await self.deepagents_client.cleanup_threads([r["thread_id"] for r in rows])
+            if result is not None:
+                return {r["id"]: result for r in rows}
+            logger.info("deepagents-runtime has no batch cleanup endpoint; cleaning up per thread")
+            self.settings["batch_endpoint"] = False
+
+        semaphore = asyncio.Semaphore(self.settings["concurrency"])
+
+        async def cleanup_one(row: Dict[str, Any]) -> bool:
+            async with semaphore:
+                return await self.deepagents_client.cleanup_thread_data(row["thread_id"])
+
+        results = await asyncio.gather(*(cleanup_one(r) for r in rows), return_exceptions=True)
+        return {r["id"]: res is True for r, res in zip(rows, results)}
+
+    async def drain_once(self) -> int:
+        """
+        Claim and process one batch.
+
+        Succeeded rows are deleted in one statement; failed rows are rescheduled
+        with exponential backoff and parked once max_attempts is reached.
+
+        Returns:
+            Number of rows claimed
+        """
+        rows = await self.claim_batch()
+        if not rows:
+            return 0
+
+        results = await self._cleanup(rows)
+        succeeded = [row_id for row_id, ok in results.items() if ok]
+        failed = [row_id for row_id, ok in results.items() if not ok]
+
+        async with connect(self.database_url, self.pool) as conn:
+            if succeeded:
+                await conn.execute("DELETE FROM cleanup_outbox WHERE id = ANY(%s)", (succeeded,))
+            if failed:
+                await conn.execute(
+                    """
+                    UPDATE cleanup_outbox
+                    SET last_error = 'cleanup request failed',
+                        next_attempt_at = NOW() + make_interval(
+                            secs => LEAST(%s, %s * power(2, attempts - 1))
+                        ),
+                        failed_at = CASE WHEN attempts >= %s THEN NOW() END
+                    WHERE id = ANY(%s)
+                    """,
+                    (self.settings["retry_max"], self.settings["retry_base"],
+                     self.settings["max_attempts"], failed)
+                )
+
+        metrics.record_cleanups("succeeded", len(succeeded))
+        metrics.record_cleanups("failed", len(failed))
+        return len(rows)
+
+    async def refresh_metrics(self) -> None:
+        """Sample outbox depth and the age of the oldest pending cleanup."""
+        async with connect(self.database_url, self.pool) as conn:
+            cur = await conn.execute(
+                """
+                SELECT COUNT(*) AS depth,
+                       COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(created_at)), 0) AS lag_seconds
+                FROM cleanup_outbox
+                WHERE failed_at IS NULL
+                """
+            )
+            row = await cur.fetchone()
+        metrics.record_cleanup_queue(row["depth"], float(row["lag_seconds"]))
+
+    async def run(self, wake: asyncio.Event) -> None:
+        """Drain the outbox until cancelled, sleeping until woken or the poll interval passes."""
+        while True:
+            try:
+                wake.clear()
+                while await self.drain_once() >= self.settings["batch_size"]:
+                    pass
+                await self.refresh_metrics()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cleanup worker iteration failed: {e}")
+
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=self.settings["poll_interval"])
+            except asyncio.TimeoutError:
+                pass
+
+
+def start_worker(database_url: str, pool: Optional[AsyncConnectionPool] = None) -> None:
+    """Start the cleanup worker for the running event loop if it is not running."""
+    loop = asyncio.get_running_loop()
+    worker = _workers.get(loop)
+    if worker is not None and not worker[0].done():
+        return
+
+    wake = asyncio.Event()
+    task = loop.create_task(CleanupQueue(database_url, pool).run(wake))
+    _workers[loop] = (task, wake)
+
+
+def notify_worker(database_url: str, pool: Optional[AsyncConnectionPool] = None) -> None:
+    """Wake the worker after enqueueing, starting it if the lifespan did not."""
+    start_worker(database_url, pool)
+    _workers[asyncio.get_running_loop()][1].set()
+
+
+async def stop_worker() -> None:
+    """Stop the running loop's cleanup worker. Pending rows stay in the outbox."""
+    worker = _workers.pop(asyncio.get_running_loop(), None)
+    if worker is None:
+        return
+    task, _ = worker
+    # Cancel until the task finishes: a cancellation arriving while psycopg is
+    # mid-query can be absorbed, leaving the worker looping
+    while not task.done():
+        task.cancel()
+        await asyncio.wait([task], timeout=0.1)
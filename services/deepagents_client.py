@@ -7,33 +7,96 @@ including HTTP calls, WebSocket connections, and cleanup operations.
 
 import asyncio
 import httpx
-import pybreaker
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 from opentelemetry import trace
 from opentelemetry.propagate import inject
+from core import circuit_breaker, http_client, load_balancer, polling, retries, state_cache
 from core.metrics import metrics
 
 tracer = trace.get_tracer(__name__)
 
-# Circuit breaker for deepagents-runtime calls
-deepagents_breaker = pybreaker.CircuitBreaker(
-    fail_max=5,
-    reset_timeout=60,
-    exclude=[httpx.HTTPStatusError]  # Don't break on HTTP errors, only on connection issues
-)
-
 
 class DeepAgentsRuntimeClient:
     """Client for communicating with deepagents-runtime service."""
     
-    def __init__(self, base_url: str):
-        self.base_url = base_url.rstrip('/')
+    def __init__(
+        self,
+        base_url: Union[str, List[str], None] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        """
+        Args:
+            base_url: Runtime base URL, or several to balance across; defaults
+                to DEEPAGENTS_RUNTIME_URLS / DEEPAGENTS_RUNTIME_URL
+            client: HTTP client to use instead of the shared one
+        """
+        urls = [base_url] if isinstance(base_url, str) else base_url
+        self.balancer = load_balancer.get_load_balancer(urls)
+        self._client = client
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client for requests; the process-wide shared client unless one was injected."""
+        return self._client or http_client.get_http_client()
+    
+    def runtime_endpoint(self, thread_id: str) -> Optional[str]:
+        """Base URL of the instance a thread is pinned to, if known."""
+        return self.balancer.pinned(thread_id)
+    
+    def pin_thread(self, thread_id: str, runtime_endpoint: Optional[str]) -> None:
+        """Restore a thread's pin from a persisted runtime endpoint."""
+        self.balancer.pin(thread_id, runtime_endpoint)
+    
+    async def _request(
+        self,
+        endpoint: str,
+        method: str,
+        path: str,
+        thread_id: Optional[str] = None,
+        instance: Optional[str] = None,
+        extra_read_timeout: float = 0.0,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request on the pooled client with the endpoint's timeout.
+        
+        Each endpoint has its own circuit breaker: network errors, 5xx
+        responses and calls slower than the endpoint's latency threshold count
+        against it, and while it is open requests fail fast with
+        CircuitOpenError instead of reaching the runtime.
+        
+        Requests for a thread go to the instance it is pinned to; others go
+        to the instance the load balancer picks, unless one is given.
+        """
+        timeout = http_client.get_endpoint_timeout(endpoint)
+        if extra_read_timeout:
+            timeout = httpx.Timeout(
+                timeout.read + extra_read_timeout, connect=timeout.connect, pool=timeout.pool
+            )
+        
+        base_url = instance or self.balancer.route(thread_id)
+        breaker = circuit_breaker.get_breaker(endpoint)
+        with metrics.track_deepagents_request(endpoint), self.balancer.track(base_url):
+            return await breaker.call(
+                self.client.request,
+                method,
+                f"{base_url}{path}",
+                timeout=timeout,
+                is_failure=lambda response: response.status_code >= 500,
+                slow_allowance=extra_read_timeout,
+                **kwargs
+            )
     
-    @deepagents_breaker
     async def invoke_job(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Invoke a job on deepagents-runtime.
         
+        Transport errors and 502/503/504 responses are retried (and slow
+        attempts optionally hedged) within the retry budget; the payload's
+        job_id doubles as the idempotency key. Each attempt may go to a
+        different instance; the returned thread is pinned to the one that
+        answered.
+        
         Args:
             payload: Job payload with job_id, trace_id, agent_definition, input_payload
             
@@ -51,37 +114,51 @@ class DeepAgentsRuntimeClient:
             
             headers = {}
             inject(headers)  # Inject OpenTelemetry trace context
+            if "job_id" in payload:
+                # Lets the runtime dedupe retried and hedged submissions
+                headers["Idempotency-Key"] = payload["job_id"]
             
             try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{self.base_url}/invoke",
-                        json=payload,
-                        headers=headers
+                response = await retries.send_with_retries(
+                    "invoke",
+                    lambda: self._request(
+                        "invoke", "POST", "/invoke", json=payload, headers=headers
                     )
-                    
-                    metrics.record_deepagents_request("invoke", str(response.status_code))
-                    span.set_attributes({"http.status_code": response.status_code})
-                    
-                    if response.status_code != 200:
-                        error_msg = f"Deepagents-runtime invoke failed: {response.status_code}"
-                        span.record_exception(Exception(error_msg))
-                        raise Exception(error_msg)
-                    
-                    return response.json()
-                    
+                )
+                
+                metrics.record_deepagents_request("invoke", str(response.status_code))
+                span.set_attributes({"http.status_code": response.status_code})
+                
+                if response.status_code != 200:
+                    error_msg = f"Deepagents-runtime invoke failed: {response.status_code}"
+                    span.record_exception(Exception(error_msg))
+                    raise Exception(error_msg)
+                
+                result = response.json()
+                if result.get("thread_id"):
+                    self.balancer.pin(
+                        result["thread_id"], self.balancer.instance_for(str(response.request.url))
+                    )
+                return result
+                
             except httpx.RequestError as e:
                 metrics.record_deepagents_request("invoke", "error")
                 span.record_exception(e)
                 raise Exception(f"Network error calling deepagents-runtime: {str(e)}")
     
-    @deepagents_breaker
-    async def get_execution_state(self, thread_id: str) -> Dict[str, Any]:
+    async def get_execution_state(self, thread_id: str, wait: Optional[float] = None) -> Dict[str, Any]:
         """
         Get execution state for a thread.
         
+        States are served from the in-process state cache: completed and
+        failed states until the thread is cleaned up, running states for a
+        short TTL. Concurrent lookups share one request; long-polls always
+        reach the runtime unless the state is already terminal.
+        
         Args:
             thread_id: Thread ID from deepagents-runtime
+            wait: Long-poll for up to this many seconds until the state changes;
+                runtimes without long-poll support ignore it and answer immediately
             
         Returns:
             Execution state with status, result, generated_files
@@ -89,6 +166,14 @@ class DeepAgentsRuntimeClient:
         Raises:
             Exception: If the request fails
         """
+        return await state_cache.get_state_cache().get(
+            thread_id,
+            lambda: self._fetch_execution_state(thread_id, wait),
+            fresh=bool(wait)
+        )
+    
+    async def _fetch_execution_state(self, thread_id: str, wait: Optional[float]) -> Dict[str, Any]:
+        """Fetch a thread's execution state from the runtime, bypassing the cache."""
         with tracer.start_as_current_span("deepagents_get_state") as span:
             span.set_attributes({"thread_id": thread_id})
             
@@ -96,22 +181,26 @@ class DeepAgentsRuntimeClient:
             inject(headers)
             
             try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        f"{self.base_url}/state/{thread_id}",
-                        headers=headers
-                    )
-                    
-                    metrics.record_deepagents_request("state", str(response.status_code))
-                    span.set_attributes({"http.status_code": response.status_code})
+                response = await self._request(
+                    "state",
+                    "GET",
+                    f"/state/{thread_id}",
+                    thread_id=thread_id,
+                    extra_read_timeout=wait or 0.0,
+                    params={"wait": f"{wait:g}"} if wait else None,
+                    headers=headers
+                )
+                
+                metrics.record_deepagents_request("state", str(response.status_code))
+                span.set_attributes({"http.status_code": response.status_code})
+                
+                if response.status_code == 200:
+                    return response.json()
+                else:
+                    error_msg = f"Failed to get execution state: {response.status_code}"
+                    span.record_exception(Exception(error_msg))
+                    raise Exception(error_msg)
                     
-                    if response.status_code == 200:
-                        return response.json()
-                    else:
-                        error_msg = f"Failed to get execution state: {response.status_code}"
-                        span.record_exception(Exception(error_msg))
-                        raise Exception(error_msg)
-                        
             except httpx.RequestError as e:
                 metrics.record_deepagents_request("state", "error")
                 span.record_exception(e)
@@ -136,26 +225,83 @@ class DeepAgentsRuntimeClient:
                 headers = {}
                 inject(headers)
                 
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.delete(
-                        f"{self.base_url}/cleanup/{thread_id}",
-                        headers=headers
-                    )
-                    
-                    metrics.record_deepagents_request("cleanup", str(response.status_code))
-                    span.set_attributes({"http.status_code": response.status_code})
+                response = await self._request(
+                    "cleanup", "DELETE", f"/cleanup/{thread_id}",
+                    thread_id=thread_id, headers=headers
+                )
+                
+                metrics.record_deepagents_request("cleanup", str(response.status_code))
+                span.set_attributes({"http.status_code": response.status_code})
+                
+                if response.status_code in [200, 204, 404]:
+                    state_cache.invalidate(thread_id)
+                    return True
+                else:
+                    span.record_exception(Exception(f"Cleanup failed: {response.status_code}"))
+                    return False
                     
-                    if response.status_code in [200, 204, 404]:
-                        return True
-                    else:
-                        span.record_exception(Exception(f"Cleanup failed: {response.status_code}"))
-                        return False
-                        
             except Exception as e:
                 metrics.record_deepagents_request("cleanup", "error")
                 span.record_exception(e)
                 return False
     
+    async def cleanup_threads(self, thread_ids: List[str]) -> Optional[bool]:
+        """
+        Clean up checkpointer data for several threads in one request per instance.
+        
+        This is a best-effort operation that won't raise exceptions.
+        
+        Args:
+            thread_ids: Thread IDs to clean up
+            
+        Returns:
+            True if cleanup succeeded, False if it failed on any instance, None
+            if an instance has no batch cleanup endpoint
+        """
+        groups: Dict[str, List[str]] = {}
+        for thread_id in thread_ids:
+            groups.setdefault(self.balancer.route(thread_id), []).append(thread_id)
+        
+        results = await asyncio.gather(
+            *(self._cleanup_batch(url, batch) for url, batch in groups.items())
+        )
+        if None in results:
+            return None
+        if all(results):
+            for thread_id in thread_ids:
+                state_cache.invalidate(thread_id)
+            return True
+        return False
+    
+    async def _cleanup_batch(self, instance: str, thread_ids: List[str]) -> Optional[bool]:
+        """Send one batch cleanup request to an instance."""
+        with tracer.start_as_current_span("deepagents_cleanup_batch") as span:
+            span.set_attributes({"thread_count": len(thread_ids)})
+            
+            try:
+                headers = {}
+                inject(headers)
+                
+                response = await self._request(
+                    "cleanup", "POST", "/cleanup/batch", instance=instance,
+                    json={"thread_ids": thread_ids}, headers=headers
+                )
+                
+                metrics.record_deepagents_request("cleanup_batch", str(response.status_code))
+                span.set_attributes({"http.status_code": response.status_code})
+                
+                if response.status_code in [404, 405]:
+                    return None
+                if response.status_code in [200, 204]:
+                    return True
+                span.record_exception(Exception(f"Batch cleanup failed: {response.status_code}"))
+                return False
+                
+            except Exception as e:
+                metrics.record_deepagents_request("cleanup_batch", "error")
+                span.record_exception(e)
+                return False
+    
     async def process_refinement_job(
         self,
         proposal_id: str,
@@ -163,7 +309,8 @@ class DeepAgentsRuntimeClient:
         user_prompt: str,
         current_specification: Dict[str, Any],
         context_file_path: Optional[str] = None,
-        context_selection: Optional[str] = None
+        context_selection: Optional[str] = None,
+        deadline: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Process a complete refinement job from invoke to completion.
@@ -175,6 +322,7 @@ class DeepAgentsRuntimeClient:
             current_specification: Current agent specification
             context_file_path: Optional file path for context
             context_selection: Optional text selection for context
+            deadline: Seconds to wait for completion, defaults to DEEPAGENTS_POLL_DEADLINE
             
         Returns:
             Final execution state with generated files
@@ -198,31 +346,23 @@ class DeepAgentsRuntimeClient:
         invoke_result = await self.invoke_job(payload)
         runtime_thread_id = invoke_result.get("thread_id", thread_id)
         
-        # Poll for completion with proper timeout and intervals
-        max_wait_time = 60  # 60 seconds max wait
-        poll_interval = 2   # Poll every 2 seconds
-        elapsed_time = 0
+        # Poll with backoff until completion; a stream that sees the job
+        # finish wakes the poller early via polling.notify_stream_completion
+        settings = polling.get_poll_settings()
+        if deadline is not None:
+            settings["deadline"] = deadline
         
-        while elapsed_time < max_wait_time:
-            await asyncio.sleep(poll_interval)
-            elapsed_time += poll_interval
-            
-            try:
-                state = await self.get_execution_state(runtime_thread_id)
-                status = state.get("status", "running")
-                
-                if status == "completed":
-                    return state
-                elif status == "failed":
-                    error_msg = state.get("error", "Job failed without error details")
-                    raise Exception(f"Deepagents-runtime job failed: {error_msg}")
-                # Continue polling if status is "running" or unknown
-                
-            except Exception as e:
-                # If we can't get state, continue polling (might be temporary issue)
-                if elapsed_time >= max_wait_time:
-                    raise Exception(f"Failed to get job completion status: {str(e)}")
-                continue
+        try:
+            state = await polling.poll_until_terminal(
+                runtime_thread_id,
+                lambda wait: self.get_execution_state(runtime_thread_id, wait),
+                settings
+            )
+        except TimeoutError as e:
+            raise Exception(str(e))
+        
+        if state.get("status") == "failed":
+            error_msg = state.get("error", "Job failed without error details")
+            raise Exception(f"Deepagents-runtime job failed: {error_msg}")
         
-        # Timeout reached
-        raise Exception(f"Job did not complete within {max_wait_time} seconds")
\ No newline at end of file
+        return state
@@ -6,19 +6,49 @@ file management, and UPSERT operations for draft specification files.
 """
 
 import uuid
-import psycopg
-from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+from core.database import connect
+from core.locking import lock_rows
+from core.queries import queries
+
+# Upserts every file in one statement; the three arrays are zipped row-wise
+UPSERT_DRAFT_FILES = queries.register(
+    "apply_files_to_draft",
+    """
+    INSERT INTO draft_specification_files 
+    (draft_id, file_path, content, file_type, created_at, updated_at)
+    SELECT %s::uuid, f.file_path, f.content, f.file_type, %s, %s
+    FROM unnest(%s::text[], %s::text[], %s::text[]) AS f(file_path, content, file_type)
+    ON CONFLICT (draft_id, file_path) 
+    DO UPDATE SET 
+        content = EXCLUDED.content,
+        file_type = EXCLUDED.file_type,
+        updated_at = EXCLUDED.updated_at
+    """
+)
+
+VALIDATE_DRAFT_ACCESS = queries.register(
+    "validate_draft_access",
+    """
+    SELECT d.workflow_id, w.created_by_user_id, w.name
+    FROM drafts d
+    JOIN workflows w ON d.workflow_id = w.id
+    WHERE d.id = %s
+    """
+)
+
 
 class DraftService:
     """Service for managing workflow drafts and their files."""
     
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, pool: Optional[AsyncConnectionPool] = None):
         self.database_url = database_url
+        self.pool = pool
     
-    def get_or_create_draft(self, workflow_id: str, user_id: str) -> str:
+    async def get_or_create_draft(self, workflow_id: str, user_id: str) -> str:
         """
         Get existing draft or create new one for workflow with locking logic.
         
@@ -31,20 +61,22 @@ class DraftService:
             
         Raises:
             ValueError: If workflow not found, access denied, or locked
+            LockConflictError: If the workflow row is locked by a concurrent request
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.transaction():
-                with conn.cursor() as cur:
+        async with connect(self.database_url, self.pool) as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cur:
                     # Lock workflow and validate access
-                    cur.execute(
+                    workflows = await lock_rows(
+                        cur,
+                        "draft",
                         """
                         SELECT id, name, is_locked FROM workflows 
-                        WHERE id = %s AND created_by_user_id = %s 
-                        FOR UPDATE
+                        WHERE id = %s AND created_by_user_id = %s
                         """,
                         (workflow_id, user_id)
                     )
-                    workflow = cur.fetchone()
+                    workflow = workflows[0] if workflows else None
                     
                     if not workflow:
                         raise ValueError("Workflow not found or access denied")
@@ -53,20 +85,20 @@ class DraftService:
                         raise ValueError("Workflow is locked by another operation")
                     
                     # Check for existing draft
-                    cur.execute(
+                    await cur.execute(
                         "SELECT id FROM drafts WHERE workflow_id = %s ORDER BY created_at DESC LIMIT 1",
                         (workflow_id,)
                     )
-                    existing_draft = cur.fetchone()
+                    existing_draft = await cur.fetchone()
                     
                     if existing_draft:
-                        return str(existing_draft["id"])
+                        return existing_draft["id"]
                     
                     # Create new draft
                     draft_id = str(uuid.uuid4())
                     now = datetime.utcnow()
                     
-                    cur.execute(
+                    await cur.execute(
                         """
                         INSERT INTO drafts (id, workflow_id, name, description, created_by_user_id, created_at, updated_at)
                         VALUES (%s, %s, %s, %s, %s, %s, %s)
@@ -74,12 +106,14 @@ class DraftService:
                         """,
                         (draft_id, workflow_id, f"Draft for {workflow['name']}", "Work in progress", user_id, now, now)
                     )
-                    result = cur.fetchone()
-                    return str(result["id"])
+                    result = await cur.fetchone()
+                    return result["id"]
     
-    def apply_files_to_draft(self, draft_id: str, generated_files: Dict[str, Any]) -> int:
+    async def apply_files_to_draft(self, draft_id: str, generated_files: Dict[str, Any]) -> int:
         """
-        Apply generated files to draft using UPSERT (INSERT ... ON CONFLICT) logic.
+        Apply generated files to draft using a single bulk UPSERT (INSERT ... ON CONFLICT).
+        
+        Malformed entries (not a dict, or missing "content") are skipped.
         
         Args:
             draft_id: Draft ID
@@ -94,58 +128,44 @@ class DraftService:
         if not generated_files:
             return 0
         
-        files_applied = 0
+        file_paths = []
+        contents = []
+        file_types = []
+        
+        for file_path, file_data in generated_files.items():
+            if not isinstance(file_data, dict) or "content" not in file_data:
+                continue
+            
+            content = file_data["content"]
+            
+            # Convert content list to string if needed
+            if isinstance(content, list):
+                content = "\n".join(str(line) for line in content)
+            elif not isinstance(content, str):
+                content = str(content)
+            
+            file_paths.append(file_path)
+            contents.append(content)
+            file_types.append(file_data.get("type", "markdown"))
+        
         now = datetime.utcnow()
         
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
+        async with connect(self.database_url, self.pool) as conn:
+            async with conn.cursor() as cur:
                 # Validate draft exists
-                cur.execute("SELECT id FROM drafts WHERE id = %s", (draft_id,))
-                if not cur.fetchone():
+                await cur.execute("SELECT id FROM drafts WHERE id = %s", (draft_id,))
+                if not await cur.fetchone():
                     raise ValueError("Draft not found")
                 
-                for file_path, file_data in generated_files.items():
-                    if not isinstance(file_data, dict) or "content" not in file_data:
-                        continue
-                    
-                    content = file_data["content"]
-                    file_type = file_data.get("type", "markdown")
-                    
-                    # Convert content list to string if needed
-                    if isinstance(content, list):
-                        content = "\n".join(str(line) for line in content)
-                    elif not isinstance(content, str):
-                        content = str(content)
-                    
-                    # UPSERT: Insert or Update on Conflict
-                    cur.execute(
-                        """
-                        INSERT INTO draft_specification_files 
-                        (id, draft_id, file_path, content, file_type, created_at, updated_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (draft_id, file_path) 
-                        DO UPDATE SET 
-                            content = EXCLUDED.content,
-                            file_type = EXCLUDED.file_type,
-                            updated_at = EXCLUDED.updated_at
-                        """,
-                        (
-                            str(uuid.uuid4()),
-                            draft_id,
-                            file_path,
-                            content,
-                            file_type,
-                            now,
-                            now
-                        )
+                if file_paths:
+                    await UPSERT_DRAFT_FILES.execute(
+                        cur,
+                        (draft_id, now, now, file_paths, contents, file_types)
                     )
-                    files_applied += 1
-                
-                conn.commit()
         
-        return files_applied
+        return len(file_paths)
     
-    def get_draft_files(self, draft_id: str) -> Dict[str, Any]:
+    async def get_draft_files(self, draft_id: str) -> Dict[str, Any]:
         """
         Get all files for a draft.
         
@@ -155,9 +175,9 @@ class DraftService:
         Returns:
             Dictionary of file paths to file data
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with connect(self.database_url, self.pool) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     SELECT file_path, content, file_type, created_at, updated_at
                     FROM draft_specification_files
@@ -168,7 +188,7 @@ class DraftService:
                 )
                 
                 files = {}
-                for row in cur.fetchall():
+                for row in await cur.fetchall():
                     files[row["file_path"]] = {
                         "content": row["content"],
                         "type": row["file_type"],
@@ -178,7 +198,7 @@ class DraftService:
                 
                 return files
     
-    def validate_draft_access(self, draft_id: str, user_id: str) -> Dict[str, Any]:
+    async def validate_draft_access(self, draft_id: str, user_id: str) -> Dict[str, Any]:
         """
         Validate user access to draft and return draft info.
         
@@ -192,23 +212,15 @@ class DraftService:
         Raises:
             ValueError: If draft not found or access denied
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT d.workflow_id, w.created_by_user_id, w.name
-                    FROM drafts d
-                    JOIN workflows w ON d.workflow_id = w.id
-                    WHERE d.id = %s
-                    """,
-                    (draft_id,)
-                )
-                draft_info = cur.fetchone()
+        async with connect(self.database_url, self.pool) as conn:
+            async with conn.cursor() as cur:
+                await VALIDATE_DRAFT_ACCESS.execute(cur, (draft_id,))
+                draft_info = await cur.fetchone()
                 
                 if not draft_info:
                     raise ValueError("Draft not found")
                 
-                if str(draft_info["created_by_user_id"]) != user_id:
+                if draft_info["created_by_user_id"] != user_id:
                     raise ValueError("Access denied to draft")
                 
-                return dict(draft_info)
\ No newline at end of file
+                return draft_info
\ No newline at end of file
@@ -6,12 +6,14 @@ workflow refinement lifecycle, from proposal creation to completion.
 """
 
 import asyncio
-import os
 from typing import Optional, Dict, Any, Tuple
 from opentelemetry import trace
+from psycopg_pool import AsyncConnectionPool
 
+from core.database import unit_of_work, use_primary
 from core.metrics import metrics
 from .deepagents_client import DeepAgentsRuntimeClient
+from . import cleanup_queue
 from .audit_service import AuditService
 from .draft_service import DraftService
 from .proposal_service import ProposalService
@@ -22,15 +24,22 @@ tracer = trace.get_tracer(__name__)
 class OrchestrationService:
     """Service for orchestrating workflow refinements and deepagents-runtime integration."""
     
-    def __init__(self, database_url: str):
+    def __init__(
+        self,
+        database_url: str,
+        pool: Optional[AsyncConnectionPool] = None,
+        read_pool: Optional[AsyncConnectionPool] = None
+    ):
         self.database_url = database_url
-        deepagents_url = os.getenv("DEEPAGENTS_RUNTIME_URL", "http://deepagents-runtime:8000")
+        self.pool = pool
+        self.read_pool = read_pool
         
         # Initialize service dependencies
-        self.deepagents_client = DeepAgentsRuntimeClient(deepagents_url)
+        self.deepagents_client = DeepAgentsRuntimeClient()
         self.audit_service = AuditService()
-        self.draft_service = DraftService(database_url)
-        self.proposal_service = ProposalService(database_url)
+        self.draft_service = DraftService(database_url, pool)
+        self.proposal_service = ProposalService(database_url, pool, read_pool)
+        self.cleanup_queue = cleanup_queue.CleanupQueue(database_url, pool, self.deepagents_client)
     
     async def get_or_create_draft(self, workflow_id: str, user_id: str) -> str:
         """
@@ -46,7 +55,7 @@ class OrchestrationService:
         Raises:
             ValueError: If workflow not found, access denied, or locked
         """
-        return self.draft_service.get_or_create_draft(workflow_id, user_id)
+        return await self.draft_service.get_or_create_draft(workflow_id, user_id)
     
     async def create_refinement_proposal(
         self,
@@ -78,7 +87,7 @@ class OrchestrationService:
             ValueError: If draft not found or deepagents-runtime unavailable
         """
         # Validate draft access
-        draft_info = self.draft_service.validate_draft_access(draft_id, user_id)
+        draft_info = await self.draft_service.validate_draft_access(draft_id, user_id)
         
         # Generate proposal ID
         proposal_id = f"proposal-{int(asyncio.get_event_loop().time() * 1000000)}"
@@ -116,9 +125,10 @@ class OrchestrationService:
                 raise ValueError("deepagents-runtime did not return thread_id")
             
             # Create proposal in database with the thread_id from deepagents-runtime
-            proposal_id = self.proposal_service.create_proposal(
+            proposal_id = await self.proposal_service.create_proposal(
                 draft_id, thread_id, user_id, user_prompt, audit_trail,
-                context_file_path, context_selection
+                context_file_path, context_selection,
+                runtime_endpoint=self.deepagents_client.runtime_endpoint(thread_id)
             )
             
             # According to the spec, we only call /invoke and let the WebSocket proxy
@@ -130,7 +140,7 @@ class OrchestrationService:
         except Exception as e:
             # If deepagents-runtime is unavailable, create proposal in failed state
             thread_id = f"failed-{proposal_id}"
-            proposal_id = self.proposal_service.create_proposal(
+            proposal_id = await self.proposal_service.create_proposal(
                 draft_id, thread_id, user_id, user_prompt, audit_trail,
                 context_file_path, context_selection
             )
@@ -151,8 +161,9 @@ class OrchestrationService:
         generated_files: Optional[Dict[str, Any]] = None
     ):
         """Update proposal with processing results and audit trail."""
-        # Get current proposal for audit trail
-        current_proposal = self.proposal_service.get_proposal(proposal_id)
+        # Get current proposal for audit trail; read-modify-write must see the primary
+        with use_primary():
+            current_proposal = await self.proposal_service.get_proposal(proposal_id)
         if not current_proposal:
             return
         
@@ -163,101 +174,130 @@ class OrchestrationService:
         )
         
         # Update proposal in database
-        self.proposal_service.update_proposal_results(
+        await self.proposal_service.update_proposal_results(
             proposal_id, status, audit_trail_json, generated_files
         )
     
-    def can_access_proposal(self, proposal_id: str, user_id: str) -> bool:
+    async def can_access_proposal(self, proposal_id: str, user_id: str) -> bool:
         """Check if user can access the specified proposal."""
-        return self.proposal_service.can_access_proposal(proposal_id, user_id)
+        return await self.proposal_service.can_access_proposal(proposal_id, user_id)
     
-    def get_proposal(self, proposal_id: str) -> Optional[Dict[str, Any]]:
+    async def get_proposal(self, proposal_id: str) -> Optional[Dict[str, Any]]:
         """Get proposal details."""
-        return self.proposal_service.get_proposal(proposal_id)
+        return await self.proposal_service.get_proposal(proposal_id)
+    
+    async def list_workflow_proposals(
+        self,
+        workflow_id: str,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """List a page of proposals on the workflow's draft."""
+        return await self.proposal_service.list_workflow_proposals(workflow_id, limit, cursor)
     
-    def get_proposal_by_thread_id(self, thread_id: str) -> Optional[Dict[str, Any]]:
+    async def get_proposal_by_thread_id(self, thread_id: str) -> Optional[Dict[str, Any]]:
         """Get proposal by thread ID (for WebSocket processing)."""
-        return self.proposal_service.get_proposal_by_thread_id(thread_id)
+        return await self.proposal_service.get_proposal_by_thread_id(thread_id)
     
-    def approve_proposal(self, proposal_id: str, user_id: str) -> None:
+    async def get_thread_access(self, thread_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get proposal id and status for a thread the user can access, in one query."""
+        return await self.proposal_service.get_thread_access(thread_id, user_id)
+    
+    async def approve_proposal(self, proposal_id: str, user_id: str) -> None:
         """
-        Approve a proposal and apply changes to draft with row-level locking.
+        Approve a proposal and apply changes to draft in a single transaction.
+        
+        The proposal row stays locked from the status check until it is
+        resolved, so concurrent approve/reject calls serialize and only the
+        first one wins.
         
         Args:
             proposal_id: Proposal ID
             user_id: User ID (for access validation)
             
         Raises:
-            ValueError: If proposal not found, access denied, or not ready for approval
+            ValueError: If proposal not found, access denied, already resolved
+                or not ready for approval
         """
-        # Get proposal with locking and access validation
-        proposal = self.proposal_service.get_proposal_with_access_check(
-            proposal_id, user_id, for_update=True
-        )
-        
-        if proposal["status"] != "completed":
-            raise ValueError("Proposal is not ready for approval")
-        
-        # Apply generated files to draft
-        files_applied = 0
-        if proposal["generated_files"]:
-            # generated_files is already a dictionary from JSONB field
-            generated_files = proposal["generated_files"]
-            if isinstance(generated_files, str):
-                # Handle case where it might still be a JSON string
-                import json
-                generated_files = json.loads(generated_files)
-            files_applied = self.draft_service.apply_files_to_draft(
-                proposal["draft_id"], generated_files
+        async with unit_of_work(self.database_url, self.pool):
+            proposal = await self.proposal_service.get_proposal_with_access_check(
+                proposal_id, user_id, for_update=True
             )
+            
+            if proposal["status"] == "resolved":
+                raise ValueError("Proposal is already resolved")
+            if proposal["status"] != "completed":
+                raise ValueError("Proposal is not ready for approval")
+            
+            # Apply generated files to draft
+            files_applied = 0
+            if proposal["generated_files"]:
+                # generated_files is already a dictionary from JSONB field
+                generated_files = proposal["generated_files"]
+                if isinstance(generated_files, str):
+                    # Handle case where it might still be a JSON string
+                    import json
+                    generated_files = json.loads(generated_files)
+                files_applied = await self.draft_service.apply_files_to_draft(
+                    proposal["draft_id"], generated_files
+                )
+            
+            # Update audit trail for approval
+            audit_trail_json = self.audit_service.add_approval_event(
+                proposal.get("ai_generated_content"), user_id, files_applied
+            )
+            
+            # Update proposal status to resolved with approved resolution
+            await self.proposal_service.resolve_proposal(
+                proposal_id, "approved", user_id, audit_trail_json
+            )
+            
+            # Queue deepagents-runtime checkpointer cleanup with the resolution
+            if proposal["thread_id"]:
+                await self.cleanup_queue.enqueue(
+                    proposal["thread_id"], proposal["runtime_endpoint"]
+                )
         
-        # Update audit trail for approval
-        audit_trail_json = self.audit_service.add_approval_event(
-            proposal.get("ai_generated_content"), user_id, files_applied
-        )
-        
-        # Update proposal status to resolved with approved resolution
-        self.proposal_service.resolve_proposal(
-            proposal_id, "approved", user_id, audit_trail_json
-        )
-        
-        # Clean up deepagents-runtime checkpointer data
         if proposal["thread_id"]:
-            asyncio.create_task(
-                self.deepagents_client.cleanup_thread_data(proposal["thread_id"])
-            )
+            cleanup_queue.notify_worker(self.database_url, self.pool)
     
-    def reject_proposal(self, proposal_id: str, user_id: str) -> None:
+    async def reject_proposal(self, proposal_id: str, user_id: str) -> None:
         """
-        Reject a proposal.
+        Reject a proposal in a single transaction.
         
         Args:
             proposal_id: Proposal ID
             user_id: User ID (for access validation)
             
         Raises:
-            ValueError: If proposal not found or access denied
+            ValueError: If proposal not found, access denied or already resolved
         """
-        # Get proposal with access validation
-        proposal = self.proposal_service.get_proposal_with_access_check(
-            proposal_id, user_id
-        )
-        
-        # Update audit trail for rejection
-        audit_trail_json = self.audit_service.add_rejection_event(
-            proposal.get("ai_generated_content"), user_id
-        )
-        
-        # Update proposal status to resolved with rejected resolution
-        self.proposal_service.resolve_proposal(
-            proposal_id, "rejected", user_id, audit_trail_json
-        )
+        async with unit_of_work(self.database_url, self.pool):
+            proposal = await self.proposal_service.get_proposal_with_access_check(
+                proposal_id, user_id, for_update=True
+            )
+            
+            if proposal["status"] == "resolved":
+                raise ValueError("Proposal is already resolved")
+            
+            # Update audit trail for rejection
+            audit_trail_json = self.audit_service.add_rejection_event(
+                proposal.get("ai_generated_content"), user_id
+            )
+            
+            # Update proposal status to resolved with rejected resolution
+            await self.proposal_service.resolve_proposal(
+                proposal_id, "rejected", user_id, audit_trail_json
+            )
+            
+            # Queue deepagents-runtime checkpointer cleanup with the resolution
+            if proposal["thread_id"]:
+                await self.cleanup_queue.enqueue(
+                    proposal["thread_id"], proposal["runtime_endpoint"]
+                )
         
-        # Clean up deepagents-runtime checkpointer data
         if proposal["thread_id"]:
-            asyncio.create_task(
-                self.deepagents_client.cleanup_thread_data(proposal["thread_id"])
-            )
+            cleanup_queue.notify_worker(self.database_url, self.pool)
     
     async def update_proposal_files_from_stream(self, thread_id: str, files: Dict[str, Any]) -> None:
         """
@@ -271,7 +311,7 @@ class OrchestrationService:
             files: Files dictionary from streaming events
         """
         # Find proposal by thread_id
-        proposal = self.get_proposal_by_thread_id(thread_id)
+        proposal = await self.get_proposal_by_thread_id(thread_id)
         if not proposal:
             raise ValueError(f"No proposal found for thread_id: {thread_id}")
         
@@ -291,7 +331,7 @@ class OrchestrationService:
             error_message: Optional error message
         """
         # Find proposal by thread_id
-        proposal = self.get_proposal_by_thread_id(thread_id)
+        proposal = await self.get_proposal_by_thread_id(thread_id)
         if not proposal:
             raise ValueError(f"No proposal found for thread_id: {thread_id}")
         
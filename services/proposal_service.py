@@ -7,19 +7,76 @@ including creation, retrieval, access control, and status updates.
 
 import uuid
 import json
-import psycopg
-from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
 
+from core.database import connect, read_only
+from core.pagination import DEFAULT_PAGE_SIZE, build_page, decode_created_cursor
+from core.queries import queries
+
+CAN_ACCESS_PROPOSAL = queries.register(
+    "can_access_proposal",
+    "SELECT COUNT(*) as count FROM proposal_access WHERE proposal_id = %s AND user_id = %s"
+)
+
+GET_PROPOSAL_BY_THREAD_ID = queries.register(
+    "get_proposal_by_thread_id",
+    "SELECT id, draft_id, status FROM proposals WHERE thread_id = %s"
+)
+
+AUTHORIZE_THREAD_ACCESS = queries.register(
+    "authorize_thread_access",
+    """
+    SELECT p.id, p.status, p.runtime_endpoint
+    FROM proposals p
+    JOIN proposal_access pa ON pa.proposal_id = p.id
+    WHERE p.thread_id = %s AND pa.user_id = %s
+    """
+)
+
+# The draft is resolved in an InitPlan so the page is a single ordered range
+# scan over idx_proposals_draft_created_id.
+LIST_WORKFLOW_PROPOSALS = queries.register(
+    "list_workflow_proposals",
+    """
+    SELECT id, draft_id, thread_id, user_prompt, status, resolution,
+           created_by_user_id, created_at, completed_at, resolved_at
+    FROM proposals
+    WHERE draft_id = (SELECT id FROM drafts WHERE workflow_id = %s)
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s
+    """
+)
+
+LIST_WORKFLOW_PROPOSALS_AFTER = queries.register(
+    "list_workflow_proposals_after",
+    """
+    SELECT id, draft_id, thread_id, user_prompt, status, resolution,
+           created_by_user_id, created_at, completed_at, resolved_at
+    FROM proposals
+    WHERE draft_id = (SELECT id FROM drafts WHERE workflow_id = %s)
+      AND (created_at, id) < (%s::timestamptz, %s::uuid)
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s
+    """
+)
+
 
 class ProposalService:
     """Service for managing refinement proposals."""
     
-    def __init__(self, database_url: str):
+    def __init__(
+        self,
+        database_url: str,
+        pool: Optional[AsyncConnectionPool] = None,
+        read_pool: Optional[AsyncConnectionPool] = None
+    ):
         self.database_url = database_url
+        self.pool = pool
+        self.read_pool = read_pool
     
-    def create_proposal(
+    async def create_proposal(
         self,
         draft_id: str,
         thread_id: str,
@@ -27,7 +84,8 @@ class ProposalService:
         user_prompt: str,
         audit_trail: Dict[str, Any],
         context_file_path: Optional[str] = None,
-        context_selection: Optional[str] = None
+        context_selection: Optional[str] = None,
+        runtime_endpoint: Optional[str] = None
     ) -> str:
         """
         Create a new refinement proposal.
@@ -40,6 +98,7 @@ class ProposalService:
             audit_trail: Initial audit trail
             context_file_path: Optional file path for context
             context_selection: Optional text selection for context
+            runtime_endpoint: deepagents-runtime instance that owns the thread
             
         Returns:
             Proposal ID
@@ -47,39 +106,38 @@ class ProposalService:
         proposal_id = str(uuid.uuid4())
         now = datetime.utcnow()
         
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
                 # Create proposal record
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO proposals (
                         id, draft_id, thread_id, user_prompt, context_file_path, 
                         context_selection, status, created_by_user_id, created_at,
-                        ai_generated_content
+                        ai_generated_content, runtime_endpoint
                     )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     """,
                     (
                         proposal_id, draft_id, thread_id, user_prompt,
                         context_file_path, context_selection, "processing",
-                        user_id, now, json.dumps(audit_trail)
+                        user_id, now, json.dumps(audit_trail), runtime_endpoint
                     )
                 )
                 
                 # Create proposal access record for user
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO proposal_access (proposal_id, user_id, granted_at)
                     VALUES (%s, %s, %s)
                     """,
                     (proposal_id, user_id, now)
                 )
-                
-                conn.commit()
         
         return proposal_id
     
-    def get_proposal(self, proposal_id: str) -> Optional[Dict[str, Any]]:
+    @read_only
+    async def get_proposal(self, proposal_id: str) -> Optional[Dict[str, Any]]:
         """
         Get proposal details.
         
@@ -89,9 +147,9 @@ class ProposalService:
         Returns:
             Proposal dictionary or None if not found
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     SELECT id, draft_id, thread_id, user_prompt, context_file_path,
                            context_selection, status, ai_generated_content, generated_files,
@@ -101,17 +159,43 @@ class ProposalService:
                     """,
                     (proposal_id,)
                 )
-                result = cur.fetchone()
-                if result:
-                    result = dict(result)
-                    # Convert UUID objects to strings
-                    for key, value in result.items():
-                        if hasattr(value, 'hex'):
-                            result[key] = str(value)
-                    return result
-                return None
+                return await cur.fetchone()
+    
+    @read_only
+    async def list_workflow_proposals(
+        self,
+        workflow_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List proposals on a workflow's draft, newest first, one keyset page at a time.
+        
+        Args:
+            workflow_id: Workflow ID
+            limit: Page size
+            cursor: next_cursor from the previous page, or None for the first page
+            
+        Returns:
+            Dict with "proposals" and "next_cursor"
+            
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                if cursor is None:
+                    await LIST_WORKFLOW_PROPOSALS.execute(cur, (workflow_id, limit + 1))
+                else:
+                    created_at, proposal_id = decode_created_cursor(cursor)
+                    await LIST_WORKFLOW_PROPOSALS_AFTER.execute(
+                        cur, (workflow_id, created_at, proposal_id, limit + 1)
+                    )
+                rows = await cur.fetchall()
+        
+        return build_page(rows, limit, ("created_at", "id"), "proposals")
     
-    def can_access_proposal(self, proposal_id: str, user_id: str) -> bool:
+    async def can_access_proposal(self, proposal_id: str, user_id: str) -> bool:
         """
         Check if user can access the specified proposal.
         
@@ -122,16 +206,13 @@ class ProposalService:
         Returns:
             True if user can access proposal, False otherwise
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT COUNT(*) as count FROM proposal_access WHERE proposal_id = %s AND user_id = %s",
-                    (proposal_id, user_id)
-                )
-                result = cur.fetchone()
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await CAN_ACCESS_PROPOSAL.execute(cur, (proposal_id, user_id))
+                result = await cur.fetchone()
                 return result["count"] > 0
     
-    def update_proposal_results(
+    async def update_proposal_results(
         self,
         proposal_id: str,
         status: str,
@@ -147,9 +228,9 @@ class ProposalService:
             audit_trail_json: Updated audit trail as JSON string
             generated_files: Generated files dictionary
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     UPDATE proposals 
                     SET status = %s, ai_generated_content = %s, generated_files = %s, completed_at = %s
@@ -163,9 +244,8 @@ class ProposalService:
                         proposal_id
                     )
                 )
-                conn.commit()
     
-    def get_proposal_with_access_check(
+    async def get_proposal_with_access_check(
         self,
         proposal_id: str,
         user_id: str,
@@ -185,14 +265,14 @@ class ProposalService:
         Raises:
             ValueError: If proposal not found or access denied
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
                 lock_clause = "FOR UPDATE" if for_update else ""
                 
-                cur.execute(
+                await cur.execute(
                     f"""
                     SELECT p.id, p.draft_id, p.status, p.generated_files, p.thread_id, 
-                           p.ai_generated_content, p.resolution, d.workflow_id
+                           p.ai_generated_content, p.resolution, p.runtime_endpoint, d.workflow_id
                     FROM proposals p
                     JOIN proposal_access pa ON p.id = pa.proposal_id
                     JOIN drafts d ON p.draft_id = d.id
@@ -201,14 +281,14 @@ class ProposalService:
                     """,
                     (proposal_id, user_id)
                 )
-                proposal = cur.fetchone()
+                proposal = await cur.fetchone()
                 
                 if not proposal:
                     raise ValueError("Proposal not found")
                 
-                return dict(proposal)
+                return proposal
     
-    def update_proposal_status(
+    async def update_proposal_status(
         self,
         proposal_id: str,
         status: str,
@@ -224,9 +304,9 @@ class ProposalService:
             user_id: User ID who resolved the proposal
             audit_trail_json: Updated audit trail as JSON string
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     UPDATE proposals 
                     SET status = %s, resolved_by_user_id = %s, resolved_at = %s, ai_generated_content = %s
@@ -234,9 +314,8 @@ class ProposalService:
                     """,
                     (status, user_id, datetime.utcnow(), audit_trail_json, proposal_id)
                 )
-                conn.commit()
     
-    def resolve_proposal(
+    async def resolve_proposal(
         self,
         proposal_id: str,
         resolution: str,
@@ -252,9 +331,9 @@ class ProposalService:
             user_id: User ID who resolved the proposal
             audit_trail_json: Updated audit trail as JSON string
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     UPDATE proposals 
                     SET status = %s, resolution = %s, resolved_by_user_id = %s, resolved_at = %s, ai_generated_content = %s
@@ -262,9 +341,8 @@ class ProposalService:
                     """,
                     ("resolved", resolution, user_id, datetime.utcnow(), audit_trail_json, proposal_id)
                 )
-                conn.commit()
     
-    def get_proposal_by_thread_id(self, thread_id: str) -> Optional[Dict[str, Any]]:
+    async def get_proposal_by_thread_id(self, thread_id: str) -> Optional[Dict[str, Any]]:
         """
         Get proposal by thread ID (for WebSocket processing).
         
@@ -274,18 +352,27 @@ class ProposalService:
         Returns:
             Proposal dictionary or None if not found
         """
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT id, draft_id, status FROM proposals WHERE thread_id = %s",
-                    (thread_id,)
-                )
-                result = cur.fetchone()
-                if result:
-                    result = dict(result)
-                    # Convert UUID objects to strings
-                    for key, value in result.items():
-                        if hasattr(value, 'hex'):
-                            result[key] = str(value)
-                    return result
-                return None
\ No newline at end of file
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await GET_PROPOSAL_BY_THREAD_ID.execute(cur, (thread_id,))
+                return await cur.fetchone()
+    
+    async def get_thread_access(self, thread_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Authorize a user for a thread in a single query.
+        
+        Used by the WebSocket handshake in place of a thread lookup followed
+        by a separate access check.
+        
+        Args:
+            thread_id: Thread ID from deepagents-runtime
+            user_id: User ID
+            
+        Returns:
+            Dictionary with proposal id, status and runtime_endpoint, or None
+            if the thread does not exist or the user has no access to it
+        """
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await AUTHORIZE_THREAD_ACCESS.execute(cur, (thread_id, user_id))
+                return await cur.fetchone()
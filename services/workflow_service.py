@@ -3,34 +3,98 @@
 import uuid
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-import psycopg
-from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from core.database import connect, read_only
+from core.locking import lock_rows
+from core.pagination import DEFAULT_PAGE_SIZE, build_page, decode_created_cursor, decode_cursor
+from core.queries import queries
+
+GET_WORKFLOW = queries.register(
+    "get_workflow",
+    """
+    SELECT id, name, description, created_by_user_id, created_at, updated_at, is_locked
+    FROM workflows
+    WHERE id = %s AND created_by_user_id = %s
+    """
+)
+
+LIST_WORKFLOWS = queries.register(
+    "list_workflows",
+    """
+    SELECT id, name, description, created_by_user_id, created_at, updated_at, is_locked
+    FROM workflows
+    WHERE created_by_user_id = %s
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s
+    """
+)
+
+LIST_WORKFLOWS_AFTER = queries.register(
+    "list_workflows_after",
+    """
+    SELECT id, name, description, created_by_user_id, created_at, updated_at, is_locked
+    FROM workflows
+    WHERE created_by_user_id = %s AND (created_at, id) < (%s::timestamptz, %s::uuid)
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s
+    """
+)
+
+LIST_VERSIONS = queries.register(
+    "list_versions",
+    """
+    SELECT id, version_number, status, created_at
+    FROM versions
+    WHERE workflow_id = %s
+    ORDER BY version_number DESC
+    LIMIT %s
+    """
+)
+
+LIST_VERSIONS_AFTER = queries.register(
+    "list_versions_after",
+    """
+    SELECT id, version_number, status, created_at
+    FROM versions
+    WHERE workflow_id = %s AND version_number < %s
+    ORDER BY version_number DESC
+    LIMIT %s
+    """
+)
 
 
 class WorkflowService:
     """Service for workflow database operations."""
     
-    def __init__(self, database_url: str):
+    def __init__(
+        self,
+        database_url: str,
+        pool: Optional[AsyncConnectionPool] = None,
+        read_pool: Optional[AsyncConnectionPool] = None
+    ):
         self.database_url = database_url
+        self.pool = pool
+        self.read_pool = read_pool
     
-    def create_workflow(self, name: str, user_id: str, description: Optional[str] = None) -> dict:
+    async def create_workflow(self, name: str, user_id: str, description: Optional[str] = None) -> dict:
         """Create a new workflow in the database."""
         workflow_id = str(uuid.uuid4())
         now = datetime.utcnow()
         
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
                 # Check for workflow locking - prevent creation if user has locked workflows
-                cur.execute(
+                await cur.execute(
                     "SELECT COUNT(*) as count FROM workflows WHERE created_by_user_id = %s AND is_locked = true",
                     (user_id,)
                 )
-                locked_count = cur.fetchone()["count"]
+                locked_count = (await cur.fetchone())["count"]
                 
                 if locked_count > 0:
                     raise ValueError("Cannot create workflow: user has locked workflows")
                 
-                cur.execute(
+                await cur.execute(
                     """
                     INSERT INTO workflows (id, name, description, created_by_user_id, created_at, updated_at)
                     VALUES (%s, %s, %s, %s, %s, %s)
@@ -38,75 +102,102 @@ class WorkflowService:
                     """,
                     (workflow_id, name, description, user_id, now, now)
                 )
-                result = cur.fetchone()
-                conn.commit()
-                # Convert UUID objects to strings for JSON serialization
-                if result:
-                    result = dict(result)
-                    for key, value in result.items():
-                        if hasattr(value, 'hex'):  # UUID objects have a hex attribute
-                            result[key] = str(value)
+                result = await cur.fetchone()
                 return result
     
-    def get_workflow(self, workflow_id: str, user_id: str) -> Optional[dict]:
+    async def get_workflow(self, workflow_id: str, user_id: str) -> Optional[dict]:
         """Get a workflow by ID, ensuring user has access."""
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT id, name, description, created_by_user_id, created_at, updated_at, is_locked
-                    FROM workflows
-                    WHERE id = %s AND created_by_user_id = %s
-                    """,
-                    (workflow_id, user_id)
-                )
-                result = cur.fetchone()
-                # Convert UUID objects to strings for JSON serialization
-                if result:
-                    result = dict(result)
-                    for key, value in result.items():
-                        if hasattr(value, 'hex'):  # UUID objects have a hex attribute
-                            result[key] = str(value)
-                return result
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await GET_WORKFLOW.execute(cur, (workflow_id, user_id))
+                return await cur.fetchone()
     
-    def workflow_exists(self, workflow_id: str) -> bool:
+    async def workflow_exists(self, workflow_id: str) -> bool:
         """Check if a workflow exists (regardless of user access)."""
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     "SELECT 1 FROM workflows WHERE id = %s",
                     (workflow_id,)
                 )
-                return cur.fetchone() is not None
+                return (await cur.fetchone()) is not None
     
-    def get_versions(self, workflow_id: str) -> List[Dict[str, Any]]:
-        """Get all versions for a workflow."""
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT id, version_number, status, created_at
-                    FROM versions
-                    WHERE workflow_id = %s
-                    ORDER BY version_number DESC
-                    """,
-                    (workflow_id,)
-                )
-                results = cur.fetchall()
-                versions = []
-                for result in results:
-                    version = dict(result)
-                    for key, value in version.items():
-                        if hasattr(value, 'hex'):
-                            version[key] = str(value)
-                    versions.append(version)
-                return versions
+    @read_only
+    async def list_workflows(
+        self,
+        user_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List a user's workflows, newest first, one keyset page at a time.
+        
+        Args:
+            user_id: Owner of the workflows
+            limit: Page size
+            cursor: next_cursor from the previous page, or None for the first page
+            
+        Returns:
+            Dict with "workflows" and "next_cursor"
+            
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                if cursor is None:
+                    await LIST_WORKFLOWS.execute(cur, (user_id, limit + 1))
+                else:
+                    created_at, workflow_id = decode_created_cursor(cursor)
+                    await LIST_WORKFLOWS_AFTER.execute(
+                        cur, (user_id, created_at, workflow_id, limit + 1)
+                    )
+                rows = await cur.fetchall()
+        
+        return build_page(rows, limit, ("created_at", "id"), "workflows")
+    
+    @read_only
+    async def get_versions(
+        self,
+        workflow_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get versions for a workflow, newest first, one keyset page at a time.
+        
+        Args:
+            workflow_id: Workflow ID
+            limit: Page size
+            cursor: next_cursor from the previous page, or None for the first page
+            
+        Returns:
+            Dict with "versions" and "next_cursor"
+            
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                if cursor is None:
+                    await LIST_VERSIONS.execute(cur, (workflow_id, limit + 1))
+                else:
+                    (version_number,) = decode_cursor(cursor, 1)
+                    if not isinstance(version_number, int):
+                        raise ValueError("Invalid cursor")
+                    await LIST_VERSIONS_AFTER.execute(
+                        cur, (workflow_id, version_number, limit + 1)
+                    )
+                rows = await cur.fetchall()
+        
+        return build_page(rows, limit, ("version_number",), "versions")
     
-    def get_version(self, workflow_id: str, version_number: int) -> Optional[Dict[str, Any]]:
+    @read_only
+    async def get_version(self, workflow_id: str, version_number: int) -> Optional[Dict[str, Any]]:
         """Get a specific version of a workflow."""
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
                     """
                     SELECT id, version_number, status, specification, created_at
                     FROM versions
@@ -114,30 +205,24 @@ class WorkflowService:
                     """,
                     (workflow_id, version_number)
                 )
-                result = cur.fetchone()
-                if result:
-                    version = dict(result)
-                    for key, value in version.items():
-                        if hasattr(value, 'hex'):
-                            version[key] = str(value)
-                    return version
-                return None
+                return await cur.fetchone()
     
-    def publish_draft(self, workflow_id: str, user_id: str) -> Dict[str, Any]:
+    async def publish_draft(self, workflow_id: str, user_id: str) -> Dict[str, Any]:
         """Publish draft as a new version with row-level locking."""
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.transaction():
-                with conn.cursor() as cur:
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cur:
                     # Lock the workflow to prevent concurrent modifications
-                    cur.execute(
+                    workflows = await lock_rows(
+                        cur,
+                        "publish",
                         """
                         SELECT id, is_locked FROM workflows 
-                        WHERE id = %s AND created_by_user_id = %s 
-                        FOR UPDATE
+                        WHERE id = %s AND created_by_user_id = %s
                         """,
                         (workflow_id, user_id)
                     )
-                    workflow = cur.fetchone()
+                    workflow = workflows[0] if workflows else None
                     
                     if not workflow:
                         raise ValueError("Workflow not found or access denied")
@@ -146,30 +231,30 @@ class WorkflowService:
                         raise ValueError("Workflow is locked by another operation")
                     
                     # Check if draft exists
-                    cur.execute(
+                    await cur.execute(
                         "SELECT id FROM drafts WHERE workflow_id = %s",
                         (workflow_id,)
                     )
-                    draft = cur.fetchone()
+                    draft = await cur.fetchone()
                     
                     if not draft:
                         raise ValueError("No draft found to publish")
                     
                     # Get next version number
-                    cur.execute(
+                    await cur.execute(
                         """
                         SELECT COALESCE(MAX(version_number), 0) + 1 as next_version
                         FROM versions WHERE workflow_id = %s
                         """,
                         (workflow_id,)
                     )
-                    next_version = cur.fetchone()["next_version"]
+                    next_version = (await cur.fetchone())["next_version"]
                     
                     # Create new version
                     version_id = str(uuid.uuid4())
                     now = datetime.utcnow()
                     
-                    cur.execute(
+                    await cur.execute(
                         """
                         INSERT INTO versions 
                         (id, workflow_id, version_number, status, created_at)
@@ -178,10 +263,10 @@ class WorkflowService:
                         """,
                         (version_id, workflow_id, next_version, "published", now)
                     )
-                    version = cur.fetchone()
+                    version = await cur.fetchone()
                     
                     # Copy draft files to version
-                    cur.execute(
+                    await cur.execute(
                         """
                         INSERT INTO specification_files (version_id, file_path, content, file_type, created_at)
                         SELECT %s, file_path, content, file_type, %s
@@ -191,34 +276,31 @@ class WorkflowService:
                     )
                     
                     # Delete draft after successful publish
-                    cur.execute("DELETE FROM drafts WHERE id = %s", (draft["id"],))
+                    await cur.execute("DELETE FROM drafts WHERE id = %s", (draft["id"],))
                     
-                    return {
-                        "id": str(version["id"]),
-                        "version_number": version["version_number"]
-                    }
+                    return version
     
-    def discard_draft(self, workflow_id: str, user_id: str) -> None:
+    async def discard_draft(self, workflow_id: str, user_id: str) -> None:
         """Discard the current draft with row-level locking."""
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.transaction():
-                with conn.cursor() as cur:
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cur:
                     # Lock the workflow
-                    cur.execute(
+                    workflows = await lock_rows(
+                        cur,
+                        "draft",
                         """
                         SELECT id FROM workflows 
-                        WHERE id = %s AND created_by_user_id = %s 
-                        FOR UPDATE
+                        WHERE id = %s AND created_by_user_id = %s
                         """,
                         (workflow_id, user_id)
                     )
-                    workflow = cur.fetchone()
                     
-                    if not workflow:
+                    if not workflows:
                         raise ValueError("Workflow not found or access denied")
                     
                     # Delete draft
-                    cur.execute(
+                    await cur.execute(
                         "DELETE FROM drafts WHERE workflow_id = %s",
                         (workflow_id,)
                     )
@@ -226,22 +308,23 @@ class WorkflowService:
                     if cur.rowcount == 0:
                         raise ValueError("No draft found to discard")
     
-    def deploy_version(self, workflow_id: str, version_number: int, user_id: str) -> Dict[str, Any]:
+    async def deploy_version(self, workflow_id: str, version_number: int, user_id: str) -> Dict[str, Any]:
         """Deploy a version to production."""
-        with psycopg.connect(self.database_url, row_factory=dict_row) as conn:
-            with conn.transaction():
-                with conn.cursor() as cur:
+        async with connect(self.database_url, self.pool, self.read_pool) as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cur:
                     # Validate workflow access and version exists
-                    cur.execute(
+                    versions = await lock_rows(
+                        cur,
+                        "deploy",
                         """
                         SELECT v.id, v.status FROM versions v
                         JOIN workflows w ON v.workflow_id = w.id
                         WHERE w.id = %s AND w.created_by_user_id = %s AND v.version_number = %s
-                        FOR UPDATE
                         """,
                         (workflow_id, user_id, version_number)
                     )
-                    version = cur.fetchone()
+                    version = versions[0] if versions else None
                     
                     if not version:
                         raise ValueError("Version not found or access denied")
@@ -253,7 +336,7 @@ class WorkflowService:
                     deployment_id = str(uuid.uuid4())
                     now = datetime.utcnow()
                     
-                    cur.execute(
+                    await cur.execute(
                         """
                         INSERT INTO workflow_deployments 
                         (id, version_id, status, deployed_at, created_at)
@@ -262,9 +345,6 @@ class WorkflowService:
                         """,
                         (deployment_id, version["id"], "deploying", now, now)
                     )
-                    deployment = cur.fetchone()
+                    deployment = await cur.fetchone()
                     
-                    return {
-                        "id": str(deployment["id"]),
-                        "status": deployment["status"]
-                    }
+                    return deployment
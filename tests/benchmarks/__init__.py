@@ -0,0 +1,5 @@
+"""
+Benchmarks for IDE Orchestrator.
+
+Run individually, e.g. ``python -m tests.benchmarks.bench_event_loop_latency``.
+"""
@@ -0,0 +1,117 @@
+"""
+Event loop latency benchmark: WebSocket streams vs slow database calls.
+
+Runs concurrent WebSocket streams through the event loop while slow queries
+(``pg_sleep``) run alongside them, first through blocking psycopg calls made
+directly on the loop (the pre-async service layer), then through the async
+connection pool. Reports per-frame delivery latency percentiles.
+
+Usage:
+    python -m tests.benchmarks.bench_event_loop_latency [--streams 20] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from contextlib import AsyncExitStack
+from typing import List
+
+import psycopg
+import websockets
+
+from api.dependencies import get_database_url
+from core import database
+
+FRAME_INTERVAL = 0.01
+SLOW_QUERY_SECONDS = 0.1
+
+
+async def upstream_handler(ws):
+    """Emit timestamped on_llm_stream frames until the client goes away."""
+    try:
+        while True:
+            await ws.send(json.dumps({
+                "event_type": "on_llm_stream",
+                "sent_at": time.perf_counter()
+            }))
+            await asyncio.sleep(FRAME_INTERVAL)
+    except websockets.ConnectionClosed:
+        pass
+
+
+async def consume_stream(ws, deadline: float, latencies: List[float]) -> None:
+    """Read frames and record delivery latency in milliseconds."""
+    while time.perf_counter() < deadline:
+        event = json.loads(await ws.recv())
+        latencies.append((time.perf_counter() - event["sent_at"]) * 1000)
+
+
+async def slow_calls_blocking(database_url: str, deadline: float) -> None:
+    """Slow queries issued with synchronous psycopg on the event loop."""
+    while time.perf_counter() < deadline:
+        with psycopg.connect(database_url) as conn:
+            conn.execute("SELECT pg_sleep(%s)", (SLOW_QUERY_SECONDS,))
+        await asyncio.sleep(0)
+
+
+async def slow_calls_async(database_url: str, deadline: float) -> None:
+    """Slow queries issued through the shared async pool."""
+    pool = await database.get_pool(database_url)
+    while time.perf_counter() < deadline:
+        async with pool.connection() as conn:
+            await conn.execute("SELECT pg_sleep(%s)", (SLOW_QUERY_SECONDS,))
+
+
+async def run_scenario(mode: str, streams: int, slow_callers: int, duration: float) -> List[float]:
+    database_url = get_database_url()
+    latencies: List[float] = []
+
+    async with websockets.serve(upstream_handler, "127.0.0.1", 0) as server, \
+            AsyncExitStack() as stack:
+        port = server.sockets[0].getsockname()[1]
+        clients = [
+            await stack.enter_async_context(websockets.connect(f"ws://127.0.0.1:{port}"))
+            for _ in range(streams)
+        ]
+        if mode == "async":
+            await database.get_pool(database_url)
+
+        deadline = time.perf_counter() + duration
+        slow_call = slow_calls_blocking if mode == "blocking" else slow_calls_async
+
+        await asyncio.gather(
+            *(consume_stream(ws, deadline, latencies) for ws in clients),
+            *(slow_call(database_url, deadline) for _ in range(slow_callers)),
+        )
+
+    await database.close_pool()
+    return latencies
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--slow-callers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'frames':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ("blocking", "async"):
+        latencies = asyncio.run(
+            run_scenario(mode, args.streams, args.slow_callers, args.duration)
+        )
+        print(
+            f"{mode:<10} {len(latencies):>8} {statistics.median(latencies):>8.1f} "
+            f"{percentile(latencies, 99):>8.1f} {max(latencies):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Stream forwarding benchmark: parse-and-reencode vs passthrough frames.
+
+Replays the recorded refinement stream in ``tests/testdata/all_events.json``
+through the per-frame work the proxy does before sending to a client: first
+the old path (``json.loads`` to read ``event_type``, then ``json.dumps`` for
+``send_json``), then passthrough frames (prefix sniffing, parsing only state
+and end frames, splicing in ``seq``). Reports per-frame cost for each.
+
+Usage:
+    python -m tests.benchmarks.bench_stream_passthrough [--repeat 5000]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import List
+
+from core.stream_frames import StreamEvent
+
+ALL_EVENTS = Path(__file__).resolve().parent.parent / "testdata" / "all_events.json"
+
+
+def load_frames(repeat: int) -> List[str]:
+    """The recorded stream as upstream text frames, repeated ``repeat`` times."""
+    frames = [json.dumps(event) for event in json.loads(ALL_EVENTS.read_text())]
+    return frames * repeat
+
+
+def reparse(frames: List[str]) -> int:
+    """Decode every frame and encode it again, as the proxy used to."""
+    sent = 0
+    for seq, frame in enumerate(frames, 1):
+        event = json.loads(frame)
+        event["seq"] = seq
+        if event.get("event_type") == "on_state_update":
+            event.get("data", {}).get("files")
+        sent += len(json.dumps(event))
+    return sent
+
+
+def passthrough(frames: List[str]) -> int:
+    """Wrap frames without re-encoding, parsing only the ones the hub acts on."""
+    sent = 0
+    for seq, frame in enumerate(frames, 1):
+        event = StreamEvent.from_frame(frame)
+        event.number(seq)
+        if event.event_type == "on_state_update":
+            event.parsed.get("data", {}).get("files")
+        sent += len(event.text)
+    return sent
+
+
+def _timed(forward, frames: List[str]) -> float:
+    start = time.perf_counter()
+    forward(frames)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = load_frames(args.repeat)
+    megabytes = sum(len(frame) for frame in frames) / 1024 / 1024
+    print(f"{len(frames)} frames, {megabytes:.1f} MiB per round")
+    print(f"{'mode':<12} {'us/frame':>10} {'MiB/s':>10}")
+
+    results = {}
+    for name, forward in (("reparse", reparse), ("passthrough", passthrough)):
+        best = min(_timed(forward, frames) for _ in range(args.rounds))
+        results[name] = best
+        print(f"{name:<12} {best / len(frames) * 1e6:>10.2f} {megabytes / best:>10.1f}")
+
+    print(f"speedup: {results['reparse'] / results['passthrough']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
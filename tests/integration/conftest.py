@@ -34,6 +34,24 @@ def test_db():
     db.close()
 
 
+@pytest_asyncio.fixture(scope="function", autouse=True)
+async def database_pool():
+    """
+    Stop the cleanup worker and close the shared database pool and HTTP
+    client after each test.
+    
+    Each test runs on its own event loop, and async pools cannot outlive
+    the loop that opened them.
+    """
+    from core import database, http_client
+    from services import cleanup_queue
+    
+    yield
+    await cleanup_queue.stop_worker()
+    await http_client.close_http_client()
+    await database.close_pool()
+
+
 @pytest_asyncio.fixture(scope="function")
 async def test_client(app):
     """
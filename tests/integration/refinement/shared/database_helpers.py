@@ -75,11 +75,11 @@ async def create_test_workflow_with_draft(
     await create_test_user(user_id)
     
     # Use production workflow service
-    workflow_service = get_workflow_service()
-    orchestration_service = get_orchestration_service()
+    workflow_service = await get_workflow_service()
+    orchestration_service = await get_orchestration_service()
     
     # Create workflow through production service
-    workflow_result = workflow_service.create_workflow(
+    workflow_result = await workflow_service.create_workflow(
         name=workflow_name,
         user_id=user_id,
         description=f"Testing workflow: {workflow_name}"
@@ -100,7 +100,7 @@ async def create_test_workflow_with_draft(
             }
         
         # Apply files through production draft service
-        files_applied = orchestration_service.draft_service.apply_files_to_draft(
+        files_applied = await orchestration_service.draft_service.apply_files_to_draft(
             draft_id, generated_files
         )
         print(f"[DEBUG] Applied {files_applied} initial files to draft {draft_id}")
@@ -120,14 +120,14 @@ async def get_draft_content_by_workflow(workflow_id: str, user_id: str) -> Dict[
         Dictionary of file_path -> content
     """
     # Use production orchestration service to get draft
-    orchestration_service = get_orchestration_service()
+    orchestration_service = await get_orchestration_service()
     
     try:
         # Get or create draft through production service
         draft_id = await orchestration_service.get_or_create_draft(workflow_id, user_id)
         
         # Get draft files through production draft service
-        draft_files = orchestration_service.draft_service.get_draft_files(draft_id)
+        draft_files = await orchestration_service.draft_service.get_draft_files(draft_id)
         
         # Convert to expected format (file_path -> content string)
         content_dict = {}
@@ -154,8 +154,8 @@ async def get_proposal_by_id(proposal_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Proposal dictionary or None if not found
     """
-    orchestration_service = get_orchestration_service()
-    return orchestration_service.get_proposal(proposal_id)
+    orchestration_service = await get_orchestration_service()
+    return await orchestration_service.get_proposal(proposal_id)
 
 
 async def verify_proposal_resolution(
@@ -0,0 +1,139 @@
+"""
+Adaptive job-state polling integration tests.
+
+Verifies backoff bounds, deadlines, long-poll pacing and stream-derived
+completion short-circuiting, and drives process_refinement_job end to end
+against a scripted runtime.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from core import polling
+from services.deepagents_client import DeepAgentsRuntimeClient
+
+
+def fast_settings(**overrides):
+    settings = {
+        "initial_interval": 0.01,
+        "max_interval": 0.05,
+        "multiplier": 2.0,
+        "deadline": 2.0,
+        "long_poll_wait": 0.0,
+    }
+    settings.update(overrides)
+    return settings
+
+
+def test_backoff_grows_with_jitter_and_caps():
+    """Delays stay within the upper half of an exponentially growing, capped ceiling."""
+    settings = fast_settings(initial_interval=0.1, max_interval=1.0)
+
+    for attempt, ceiling in [(0, 0.1), (1, 0.2), (2, 0.4), (3, 0.8), (4, 1.0), (10, 1.0)]:
+        delays = [polling.backoff_delay(attempt, settings) for _ in range(50)]
+        assert all(ceiling / 2 <= d <= ceiling for d in delays)
+
+
+@pytest.mark.asyncio
+async def test_short_job_is_noticed_quickly():
+    """A job that finishes after a few polls is returned without fixed-interval latency."""
+    states = iter(["running", "running", "completed"])
+
+    async def fetch(wait):
+        return {"status": next(states)}
+
+    start = time.perf_counter()
+    state = await polling.poll_until_terminal("thread-short", fetch, fast_settings())
+
+    assert state["status"] == "completed"
+    assert time.perf_counter() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_deadline_and_transient_errors():
+    """Fetch errors are retried; the deadline bounds the total wait."""
+    calls = 0
+
+    async def fetch(wait):
+        nonlocal calls
+        calls += 1
+        if calls % 2:
+            raise Exception("state unavailable")
+        return {"status": "running"}
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError, match="did not complete within 0.3 seconds"):
+        await polling.poll_until_terminal("thread-slow", fetch, fast_settings(deadline=0.3))
+
+    assert 0.3 <= time.perf_counter() - start < 1
+    assert calls > 3
+
+
+@pytest.mark.asyncio
+async def test_long_poll_skips_backoff():
+    """When the server holds requests, polls go out back to back with the wait parameter."""
+    waits = []
+
+    async def fetch(wait):
+        waits.append(wait)
+        await asyncio.sleep(wait)
+        return {"status": "completed" if len(waits) == 3 else "running"}
+
+    settings = fast_settings(initial_interval=5, max_interval=5, long_poll_wait=0.05)
+    start = time.perf_counter()
+    await polling.poll_until_terminal("thread-long", fetch, settings)
+
+    assert waits == [0.05, 0.05, 0.05]
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.asyncio
+async def test_stream_completion_wakes_poller():
+    """A stream-derived completion signal triggers an immediate poll."""
+    finished = False
+
+    async def fetch(wait):
+        return {"status": "completed" if finished else "running"}
+
+    async def finish_on_stream():
+        nonlocal finished
+        await asyncio.sleep(0.05)
+        finished = True
+        assert polling.notify_stream_completion("thread-stream") == 1
+
+    settings = fast_settings(initial_interval=10, max_interval=10, deadline=30)
+    start = time.perf_counter()
+    state, _ = await asyncio.gather(
+        polling.poll_until_terminal("thread-stream", fetch, settings),
+        finish_on_stream()
+    )
+
+    assert state["status"] == "completed"
+    assert time.perf_counter() - start < 1
+    assert polling.notify_stream_completion("thread-stream") == 0
+
+
+@pytest.mark.asyncio
+async def test_process_refinement_job_long_polls(monkeypatch):
+    """process_refinement_job passes ?wait= when long-polling is configured."""
+    monkeypatch.setenv("DEEPAGENTS_LONG_POLL_WAIT", "2")
+    monkeypatch.setenv("DEEPAGENTS_POLL_INITIAL_INTERVAL", "0.01")
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/invoke":
+            return httpx.Response(200, json={"thread_id": "runtime-thread"})
+        status = "completed" if len(requests) > 2 else "running"
+        return httpx.Response(200, json={"status": status, "generated_files": {}})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        runtime = DeepAgentsRuntimeClient("http://runtime", client=client)
+        state = await runtime.process_refinement_job("p-1", "t-1", "Add a step", {})
+
+    assert state["status"] == "completed"
+    assert [r.url.path for r in requests] == ["/invoke", "/state/runtime-thread", "/state/runtime-thread"]
+    assert requests[1].url.params["wait"] == "2"
@@ -0,0 +1,154 @@
+"""
+Refinement admission control integration tests.
+
+Covers token-bucket rate limits, global and per-user concurrency slots with
+a bounded wait queue, admission metrics, and the 429 + Retry-After response
+of the refinements endpoint.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from core.admission import AdmissionController, AdmissionRejectedError, TokenBucket
+from services.orchestration_service import OrchestrationService
+from tests.integration.refinement.shared.database_helpers import create_test_workflow_with_draft
+
+
+def settings(**overrides):
+    values = {
+        "max_concurrency": 4,
+        "max_concurrency_per_user": 2,
+        "rate": 0.0,
+        "burst": 10.0,
+        "user_rate": 0.0,
+        "user_burst": 10.0,
+        "max_queue": 8,
+        "queue_timeout": 0.2,
+        "max_tracked_users": 100,
+    }
+    values.update(overrides)
+    return values
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+async def hold(controller, user_id, release: asyncio.Event, admitted: list):
+    async with controller.admit(user_id):
+        admitted.append(user_id)
+        await release.wait()
+
+
+def test_token_bucket_refills_over_time():
+    """A drained bucket reports how long until the next token."""
+    bucket = TokenBucket(rate=2.0, burst=2)
+    bucket.take()
+    bucket.take()
+    assert bucket.retry_after() == pytest.approx(0.5, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_per_user_rate_limit_is_isolated():
+    """One user exhausting their bucket does not affect another user."""
+    controller = AdmissionController(settings(user_rate=0.1, user_burst=2))
+    before = sample("ide_orchestrator_refinement_admission_rejections_total", reason="user_rate")
+
+    for _ in range(2):
+        async with controller.admit("user-a"):
+            pass
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        async with controller.admit("user-a"):
+            pass
+    assert exc_info.value.reason == "user_rate"
+    assert exc_info.value.retry_after_header == "10"
+
+    async with controller.admit("user-b"):
+        pass
+    assert sample("ide_orchestrator_refinement_admission_rejections_total", reason="user_rate") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_per_user_concurrency_queues_then_rejects():
+    """Requests over the per-user limit wait for a slot and are rejected if none frees up."""
+    controller = AdmissionController(settings())
+    release = asyncio.Event()
+    admitted = []
+    holders = [asyncio.create_task(hold(controller, "user-a", release, admitted)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        async with controller.admit("user-a"):
+            pass
+    assert exc_info.value.reason == "user_concurrency"
+
+    # Other users still get slots under the global limit
+    async with controller.admit("user-b"):
+        pass
+
+    waiter = asyncio.create_task(hold(controller, "user-a", release, admitted))
+    await asyncio.sleep(0.01)
+    assert controller.queued == 1
+    release.set()
+    await asyncio.gather(*holders, waiter)
+
+    assert admitted.count("user-a") == 3
+    assert controller.in_flight == 0 and controller.queued == 0
+    assert sample("ide_orchestrator_refinement_admission_in_flight") == 0
+
+
+@pytest.mark.asyncio
+async def test_global_concurrency_and_queue_bound():
+    """The global limit caps in-flight requests and the wait queue is bounded."""
+    controller = AdmissionController(settings(max_concurrency=2, max_queue=1, queue_timeout=1))
+    release = asyncio.Event()
+    admitted = []
+    holders = [
+        asyncio.create_task(hold(controller, f"user-{i}", release, admitted)) for i in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    assert controller.in_flight == 2 and controller.queued == 1
+
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        async with controller.admit("user-late"):
+            pass
+    assert exc_info.value.reason == "queue_full"
+
+    before = REGISTRY.get_sample_value(
+        "ide_orchestrator_refinement_admission_wait_seconds_count", {"outcome": "admitted"}
+    )
+    release.set()
+    await asyncio.gather(*holders)
+    assert len(admitted) == 3
+    assert REGISTRY.get_sample_value(
+        "ide_orchestrator_refinement_admission_wait_seconds_count", {"outcome": "admitted"}
+    ) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_refinement_endpoint_returns_429(test_client: AsyncClient, jwt_manager, monkeypatch):
+    """Rate-limited refinement requests get 429 with Retry-After."""
+    monkeypatch.setenv("REFINEMENT_USER_RATE", "0.05")
+    monkeypatch.setenv("REFINEMENT_USER_BURST", "1")
+
+    async def create_refinement_proposal(self, draft_id, user_id, user_prompt, **kwargs):
+        return str(uuid.uuid4()), f"thread-{uuid.uuid4()}"
+
+    monkeypatch.setattr(OrchestrationService, "create_refinement_proposal", create_refinement_proposal)
+
+    user_id = str(uuid.uuid4())
+    workflow_id, _ = await create_test_workflow_with_draft(user_id, "Admission Workflow", {})
+    token = await jwt_manager.generate_token(user_id, "admission@example.com", [], 3600)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    url = f"/api/workflows/{workflow_id}/refinements"
+    response = await test_client.post(url, json={"instructions": "Add a step"}, headers=headers)
+    assert response.status_code == 202
+
+    response = await test_client.post(url, json={"instructions": "Add another"}, headers=headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "20"
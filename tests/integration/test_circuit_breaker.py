@@ -0,0 +1,146 @@
+"""
+Circuit breaker integration tests.
+
+Covers error- and latency-based tripping, half-open probe limits, breaker
+metrics, and per-endpoint isolation in the deepagents-runtime client.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from core import circuit_breaker
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.deepagents_client import DeepAgentsRuntimeClient
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+async def fail():
+    raise ConnectionError("runtime unreachable")
+
+
+async def succeed(delay=0.0):
+    await asyncio.sleep(delay)
+    return "ok"
+
+
+@pytest.fixture
+def fresh_breakers(monkeypatch):
+    """Give each test its own breaker registry."""
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+
+@pytest.mark.asyncio
+async def test_opens_after_consecutive_failures_and_recovers():
+    """Failures open the breaker, open calls fail fast, and a probe closes it again."""
+    breaker = CircuitBreaker("test-errors", fail_max=3, reset_timeout=0.05)
+    before = sample("ide_orchestrator_circuit_breaker_transitions_total",
+                    breaker="test-errors", from_state="closed", to_state="open")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await breaker.call(fail)
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == "closed"
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            await breaker.call(fail)
+    assert breaker.state == "open"
+    assert sample("ide_orchestrator_circuit_breaker_state", breaker="test-errors") == 2
+    assert sample("ide_orchestrator_circuit_breaker_transitions_total",
+                  breaker="test-errors", from_state="closed", to_state="open") == before + 1
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        await breaker.call(succeed)
+    assert 0 < exc_info.value.retry_after <= 0.05
+    assert sample("ide_orchestrator_circuit_breaker_rejections_total", breaker="test-errors") >= 1
+
+    await asyncio.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == "closed"
+    assert sample("ide_orchestrator_circuit_breaker_state", breaker="test-errors") == 0
+
+
+@pytest.mark.asyncio
+async def test_half_open_limits_concurrent_probes():
+    """Only half_open_max_calls probes run at once; a failed probe reopens the breaker."""
+    breaker = CircuitBreaker("test-probes", fail_max=1, reset_timeout=0.01, half_open_max_calls=2)
+    with pytest.raises(ConnectionError):
+        await breaker.call(fail)
+    await asyncio.sleep(0.02)
+
+    results = await asyncio.gather(
+        *(breaker.call(succeed, 0.05) for _ in range(4)), return_exceptions=True
+    )
+    assert results.count("ok") == 2
+    assert sum(isinstance(r, CircuitOpenError) for r in results) == 2
+    assert breaker.state == "closed"
+
+    with pytest.raises(ConnectionError):
+        await breaker.call(fail)
+    await asyncio.sleep(0.02)
+    with pytest.raises(ConnectionError):
+        await breaker.call(fail)
+    assert breaker._state == "open"
+
+
+@pytest.mark.asyncio
+async def test_slow_calls_trip_the_breaker():
+    """Calls over the latency threshold count as failures unless covered by an allowance."""
+    breaker = CircuitBreaker("test-latency", fail_max=2, reset_timeout=60, slow_call_threshold=0.02)
+    before = sample("ide_orchestrator_circuit_breaker_slow_calls_total", breaker="test-latency")
+
+    assert await breaker.call(succeed, 0.04, slow_allowance=0.1) == "ok"
+    assert await breaker.call(succeed, 0.04) == "ok"
+    assert breaker.state == "closed"
+    assert await breaker.call(succeed, 0.04) == "ok"
+    assert breaker.state == "open"
+    assert sample("ide_orchestrator_circuit_breaker_slow_calls_total", breaker="test-latency") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_client_breakers_are_per_endpoint(fresh_breakers, monkeypatch):
+    """A failing /state endpoint opens its own breaker without blocking /invoke."""
+    monkeypatch.setenv("DEEPAGENTS_STATE_BREAKER_FAIL_MAX", "2")
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if request.url.path == "/invoke":
+            return httpx.Response(200, json={"thread_id": "runtime-thread"})
+        return httpx.Response(503)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        runtime = DeepAgentsRuntimeClient("http://runtime", client=client)
+        for _ in range(2):
+            with pytest.raises(Exception, match="503"):
+                await runtime.get_execution_state("runtime-thread")
+        with pytest.raises(CircuitOpenError):
+            await runtime.get_execution_state("runtime-thread")
+
+        assert await runtime.invoke_job({"job_id": "job-1"}) == {"thread_id": "runtime-thread"}
+
+    assert requests == ["/state/runtime-thread", "/state/runtime-thread", "/invoke"]
+    assert circuit_breaker.get_breaker("state").state == "open"
+    assert circuit_breaker.get_breaker("invoke").state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_trip(fresh_breakers, monkeypatch):
+    """4xx responses are answers from a healthy runtime, not breaker failures."""
+    monkeypatch.setenv("DEEPAGENTS_BREAKER_FAIL_MAX", "1")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(404))) as client:
+        runtime = DeepAgentsRuntimeClient("http://runtime", client=client)
+        for _ in range(3):
+            with pytest.raises(Exception, match="404"):
+                await runtime.get_execution_state("missing-thread")
+
+    assert circuit_breaker.get_breaker("state").state == "closed"
@@ -0,0 +1,166 @@
+"""
+Durable cleanup queue integration tests.
+
+Drives the outbox worker against scripted runtime clients to verify
+transactional enqueueing, batched draining with bounded concurrency, retry
+backoff and the optional batch cleanup endpoint.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from prometheus_client import REGISTRY
+
+from api.dependencies import get_database_url, get_db_pool
+from core import database
+from services.cleanup_queue import CleanupQueue
+
+
+class ScriptedRuntime:
+    """Stand-in runtime client recording cleanup calls."""
+
+    def __init__(self, succeed: bool = True, batch: object = "unsupported"):
+        self.succeed = succeed
+        self.batch = batch
+        self.cleaned = []
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def cleanup_thread_data(self, thread_id: str) -> bool:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.cleaned.append(thread_id)
+        return self.succeed
+
+    async def cleanup_threads(self, thread_ids):
+        self.batches.append(list(thread_ids))
+        return None if self.batch == "unsupported" else self.batch
+
+
+@pytest_asyncio.fixture
+async def outbox():
+    """Start each test with an empty outbox."""
+    pool = await get_db_pool()
+    async with pool.connection() as conn:
+        await conn.execute("DELETE FROM cleanup_outbox")
+    return pool
+
+
+async def outbox_rows(pool):
+    async with pool.connection() as conn:
+        cur = await conn.execute(
+            """
+            SELECT thread_id, attempts, failed_at, next_attempt_at > NOW() AS backing_off
+            FROM cleanup_outbox ORDER BY id
+            """
+        )
+        return await cur.fetchall()
+
+
+def make_queue(pool, runtime, monkeypatch, **settings) -> CleanupQueue:
+    for name, value in settings.items():
+        monkeypatch.setenv(name, str(value))
+    return CleanupQueue(get_database_url(), pool, runtime)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_follows_transaction(outbox, monkeypatch):
+    """Cleanups are recorded only when the enclosing unit of work commits."""
+    queue = make_queue(outbox, ScriptedRuntime(), monkeypatch)
+
+    with pytest.raises(RuntimeError):
+        async with database.unit_of_work(get_database_url(), outbox):
+            await queue.enqueue("thread-rolled-back")
+            raise RuntimeError("resolution failed")
+
+    async with database.unit_of_work(get_database_url(), outbox):
+        await queue.enqueue("thread-committed")
+        await queue.enqueue("thread-committed")
+
+    assert [r["thread_id"] for r in await outbox_rows(outbox)] == ["thread-committed"]
+
+
+@pytest.mark.asyncio
+async def test_drain_in_batches_with_bounded_concurrency(outbox, monkeypatch):
+    """Due rows are drained batch by batch, cleaned concurrently and deleted."""
+    runtime = ScriptedRuntime()
+    queue = make_queue(outbox, runtime, monkeypatch, CLEANUP_BATCH_SIZE=5, CLEANUP_CONCURRENCY=2)
+    threads = [f"thread-{uuid.uuid4()}" for _ in range(12)]
+    for thread_id in threads:
+        await queue.enqueue(thread_id)
+
+    assert [await queue.drain_once() for _ in range(4)] == [5, 5, 2, 0]
+
+    assert sorted(runtime.cleaned) == sorted(threads)
+    assert runtime.max_in_flight == 2
+    assert await outbox_rows(outbox) == []
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_then_park(outbox, monkeypatch):
+    """Failed cleanups are rescheduled with backoff and parked after max attempts."""
+    queue = make_queue(
+        outbox, ScriptedRuntime(succeed=False), monkeypatch,
+        CLEANUP_MAX_ATTEMPTS=2, CLEANUP_RETRY_BASE=0
+    )
+    await queue.enqueue("thread-flaky")
+    before = REGISTRY.get_sample_value("ide_orchestrator_cleanups_total", {"outcome": "failed"}) or 0
+
+    assert await queue.drain_once() == 1
+    [row] = await outbox_rows(outbox)
+    assert (row["attempts"], row["failed_at"]) == (1, None)
+
+    assert await queue.drain_once() == 1
+    [row] = await outbox_rows(outbox)
+    assert row["attempts"] == 2 and row["failed_at"] is not None
+
+    assert await queue.drain_once() == 0
+    assert REGISTRY.get_sample_value("ide_orchestrator_cleanups_total", {"outcome": "failed"}) == before + 2
+
+    queue.settings["retry_base"] = 60
+    await queue.enqueue("thread-retry-later")
+    await queue.drain_once()
+    assert (await outbox_rows(outbox))[1]["backing_off"] is True
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_and_fallback(outbox, monkeypatch):
+    """One batch request cleans a whole batch; a runtime without it falls back per thread."""
+    runtime = ScriptedRuntime(batch=True)
+    queue = make_queue(outbox, runtime, monkeypatch, DEEPAGENTS_BATCH_CLEANUP="true")
+    for i in range(3):
+        await queue.enqueue(f"thread-batch-{i}")
+
+    await queue.drain_once()
+    assert len(runtime.batches) == 1 and sorted(runtime.batches[0]) == [f"thread-batch-{i}" for i in range(3)]
+    assert runtime.cleaned == []
+
+    legacy = ScriptedRuntime(batch="unsupported")
+    queue = make_queue(outbox, legacy, monkeypatch, DEEPAGENTS_BATCH_CLEANUP="true")
+    await queue.enqueue("thread-legacy")
+    await queue.drain_once()
+    assert legacy.cleaned == ["thread-legacy"]
+    assert queue.settings["batch_endpoint"] is False
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_and_lag_metrics(outbox, monkeypatch):
+    """Depth and lag gauges reflect pending rows."""
+    queue = make_queue(outbox, ScriptedRuntime(), monkeypatch)
+    await queue.enqueue("thread-metrics-1")
+    await queue.enqueue("thread-metrics-2")
+    await asyncio.sleep(0.05)
+
+    await queue.refresh_metrics()
+    assert REGISTRY.get_sample_value("ide_orchestrator_cleanup_queue_depth") == 2
+    assert REGISTRY.get_sample_value("ide_orchestrator_cleanup_queue_lag_seconds") > 0
+
+    await queue.drain_once()
+    await queue.refresh_metrics()
+    assert REGISTRY.get_sample_value("ide_orchestrator_cleanup_queue_depth") == 0
+    assert REGISTRY.get_sample_value("ide_orchestrator_cleanup_queue_lag_seconds") == 0
@@ -0,0 +1,80 @@
+"""
+Shared database connection pool integration tests.
+
+Verifies that services borrow connections from the single process-wide pool
+and that pool usage is exported to Prometheus.
+"""
+
+import pytest
+from prometheus_client import REGISTRY
+
+from api.dependencies import (
+    get_auth_service,
+    get_db_pool,
+    get_orchestration_service,
+    get_workflow_service,
+)
+
+
+@pytest.mark.asyncio
+async def test_services_share_one_pool():
+    """All services are injected with the same pool instance."""
+    pool = await get_db_pool()
+
+    assert (await get_auth_service()).pool is pool
+    assert (await get_workflow_service()).pool is pool
+
+    orchestration_service = await get_orchestration_service()
+    assert orchestration_service.pool is pool
+    assert orchestration_service.draft_service.pool is pool
+    assert orchestration_service.proposal_service.pool is pool
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_connections():
+    """Repeated service calls do not grow the pool beyond its configured size."""
+    pool = await get_db_pool()
+    workflow_service = await get_workflow_service()
+
+    for _ in range(25):
+        await workflow_service.workflow_exists("00000000-0000-0000-0000-000000000000")
+
+    stats = pool.get_stats()
+    assert stats["pool_size"] <= pool.max_size
+    assert stats.get("connections_num", 0) <= pool.max_size
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_exported():
+    """Checked-out, idle and waiting gauges are sampled from the pool."""
+    pool = await get_db_pool()
+    await pool.wait()
+
+    async with pool.connection():
+        checked_out = REGISTRY.get_sample_value(
+            "ide_orchestrator_db_pool_connections_checked_out", {"pool": "primary"}
+        )
+        assert checked_out is not None and checked_out >= 1
+
+    idle = REGISTRY.get_sample_value(
+        "ide_orchestrator_db_pool_connections_idle", {"pool": "primary"}
+    )
+    waiting = REGISTRY.get_sample_value(
+        "ide_orchestrator_db_pool_requests_waiting", {"pool": "primary"}
+    )
+    assert idle is not None and idle >= 1
+    assert waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_uuid_columns_load_as_str():
+    """Pooled connections decode uuid columns straight to str."""
+    pool = await get_db_pool()
+
+    async with pool.connection() as conn:
+        cur = await conn.execute("SELECT gen_random_uuid() AS id, now() AS created_at")
+        row = await cur.fetchone()
+
+    assert isinstance(row["id"], str)
+    assert len(row["id"]) == 36
+    assert hasattr(row["created_at"], "isoformat")
@@ -0,0 +1,129 @@
+"""
+Shared deepagents-runtime HTTP client integration tests.
+
+Runs the real client against a small keep-alive HTTP server that counts TCP
+connections, to verify connection reuse, per-endpoint timeouts and exported
+pool utilization.
+"""
+
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from prometheus_client import REGISTRY
+
+from core import http_client
+from services.deepagents_client import DeepAgentsRuntimeClient
+
+
+class KeepAliveServer:
+    """Minimal HTTP/1.1 server answering every request with a JSON state."""
+
+    def __init__(self):
+        self.connections = 0
+        self.delay = 0.0
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                if length:
+                    await reader.readexactly(length)
+
+                await asyncio.sleep(self.delay)
+                body = json.dumps({"status": "completed", "thread_id": "t-1"}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+
+@pytest_asyncio.fixture
+async def runtime_server():
+    server = KeepAliveServer()
+    server.server = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    yield server
+    server.server.close()
+    await http_client.close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_clients_share_one_connection(runtime_server):
+    """Runtime clients reuse a single kept-alive connection across calls."""
+    first = DeepAgentsRuntimeClient(runtime_server.url)
+    second = DeepAgentsRuntimeClient(runtime_server.url)
+    assert first.client is second.client
+
+    for _ in range(5):
+        assert (await first.get_execution_state("t-1"))["status"] == "completed"
+        assert (await second.invoke_job({"job_id": "j-1"}))["thread_id"] == "t-1"
+    assert await first.cleanup_thread_data("t-1") is True
+
+    assert runtime_server.connections == 1
+
+    idle = REGISTRY.get_sample_value(
+        "ide_orchestrator_http_pool_connections", {"pool": "deepagents", "state": "idle"}
+    )
+    in_flight = REGISTRY.get_sample_value(
+        "ide_orchestrator_deepagents_requests_in_flight", {"endpoint": "state"}
+    )
+    assert idle == 1
+    assert in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_endpoint_timeouts(runtime_server, monkeypatch):
+    """Each endpoint uses its own read timeout."""
+    monkeypatch.setenv("DEEPAGENTS_STATE_TIMEOUT", "0.1")
+    runtime_server.delay = 0.5
+    client = DeepAgentsRuntimeClient(runtime_server.url)
+
+    with pytest.raises(Exception, match="Network error"):
+        await client.get_execution_state("t-1")
+
+    assert (await client.invoke_job({"job_id": "j-2"}))["thread_id"] == "t-1"
+
+
+@pytest.mark.asyncio
+async def test_close_and_reopen(runtime_server):
+    """Closing the shared client releases it; the next caller gets a fresh one."""
+    client = DeepAgentsRuntimeClient(runtime_server.url)
+    opened = client.client
+    await http_client.close_http_client()
+
+    assert opened.is_closed
+    assert client.client is not opened
+    assert (await client.get_execution_state("t-1"))["status"] == "completed"
+
+
+def test_client_settings(monkeypatch):
+    """Limits and HTTP/2 come from the environment; HTTP/2 needs the h2 package."""
+    monkeypatch.setenv("DEEPAGENTS_HTTP_MAX_KEEPALIVE", "7")
+    assert http_client.get_client_limits().max_keepalive_connections == 7
+
+    assert http_client.get_endpoint_timeout("invoke").read == 30.0
+    assert http_client.get_endpoint_timeout("cleanup").connect == 5.0
+
+    monkeypatch.setenv("DEEPAGENTS_HTTP2", "true")
+    try:
+        import h2  # noqa: F401
+        assert http_client.http2_enabled() is True
+    except ImportError:
+        assert http_client.http2_enabled() is False
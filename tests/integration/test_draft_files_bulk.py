@@ -0,0 +1,87 @@
+"""
+Bulk draft file UPSERT integration tests.
+
+Applies large generated file sets to a draft and verifies the skip rules,
+the files_applied count and that the work is done in a single statement.
+"""
+
+import uuid
+
+import pytest
+from prometheus_client import REGISTRY
+
+from tests.integration.refinement.shared.database_helpers import create_test_workflow_with_draft
+from api.dependencies import get_orchestration_service
+
+
+def upsert_count() -> float:
+    return REGISTRY.get_sample_value(
+        "ide_orchestrator_db_query_duration_seconds_count", {"query": "apply_files_to_draft"}
+    ) or 0
+
+
+@pytest.mark.asyncio
+async def test_apply_many_files_in_one_statement():
+    """Hundreds of files are upserted with one statement and counted correctly."""
+    user_id = str(uuid.uuid4())
+    _, draft_id = await create_test_workflow_with_draft(user_id, "Bulk Upsert Workflow", {})
+    draft_service = (await get_orchestration_service()).draft_service
+
+    generated_files = {
+        f"/specs/file-{i}.md": {"content": f"# File {i}", "type": "markdown"}
+        for i in range(300)
+    }
+    generated_files["/specs/lines.md"] = {"content": ["line 1", "line 2"]}
+    generated_files["/specs/number.json"] = {"content": 42, "type": "json"}
+    generated_files["/specs/not-a-dict.md"] = "raw string"
+    generated_files["/specs/no-content.md"] = {"type": "markdown"}
+
+    before = upsert_count()
+    files_applied = await draft_service.apply_files_to_draft(draft_id, generated_files)
+
+    assert files_applied == 302
+    assert upsert_count() == before + 1
+
+    files = await draft_service.get_draft_files(draft_id)
+    assert len(files) == 302
+    assert files["/specs/lines.md"]["content"] == "line 1\nline 2"
+    assert files["/specs/lines.md"]["type"] == "markdown"
+    assert files["/specs/number.json"]["content"] == "42"
+    assert "/specs/not-a-dict.md" not in files
+    assert "/specs/no-content.md" not in files
+
+
+@pytest.mark.asyncio
+async def test_reapply_updates_existing_files():
+    """Re-applying a path updates content in place instead of duplicating it."""
+    user_id = str(uuid.uuid4())
+    _, draft_id = await create_test_workflow_with_draft(
+        user_id, "Bulk Update Workflow", {"/main.md": "original"}
+    )
+    draft_service = (await get_orchestration_service()).draft_service
+
+    files_applied = await draft_service.apply_files_to_draft(draft_id, {
+        "/main.md": {"content": "updated", "type": "markdown"},
+        "/extra.yaml": {"content": "key: value", "type": "yaml"},
+    })
+
+    assert files_applied == 2
+    files = await draft_service.get_draft_files(draft_id)
+    assert files["/main.md"]["content"] == "updated"
+    assert files["/extra.yaml"]["type"] == "yaml"
+    assert len(files) == 2
+
+
+@pytest.mark.asyncio
+async def test_only_malformed_entries_and_missing_draft():
+    """All-malformed input applies nothing; an unknown draft is rejected."""
+    user_id = str(uuid.uuid4())
+    _, draft_id = await create_test_workflow_with_draft(user_id, "Bulk Skip Workflow", {})
+    draft_service = (await get_orchestration_service()).draft_service
+
+    assert await draft_service.apply_files_to_draft(draft_id, {"/bad.md": None}) == 0
+
+    with pytest.raises(ValueError, match="Draft not found"):
+        await draft_service.apply_files_to_draft(
+            str(uuid.uuid4()), {"/a.md": {"content": "a"}}
+        )
@@ -0,0 +1,169 @@
+"""
+invoke_job retry, hedging and retry budget integration tests.
+
+Drives DeepAgentsRuntimeClient.invoke_job against scripted transports that
+fail, stall or answer, checking idempotency keys, hedge timing and how the
+retry budget caps extra attempts.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from core import circuit_breaker, retries
+from core.retries import LatencyTracker, RetryBudget
+from services.deepagents_client import DeepAgentsRuntimeClient
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """Isolate budgets, latency history and breakers per test."""
+    monkeypatch.setattr(retries, "_budgets", {})
+    monkeypatch.setattr(retries, "_latencies", {})
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    monkeypatch.setenv("DEEPAGENTS_INVOKE_RETRY_BASE", "0.01")
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+async def invoke(handler, job_id="refinement-p-1"):
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        runtime = DeepAgentsRuntimeClient("http://runtime", client=client)
+        return await runtime.invoke_job({"job_id": job_id, "trace_id": "trace-p-1"})
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried_with_idempotency_key():
+    """A connect error and a 503 are retried; every attempt carries the job_id key."""
+    keys = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        keys.append(request.headers.get("Idempotency-Key"))
+        if len(keys) == 1:
+            raise httpx.ConnectError("connection reset", request=request)
+        if len(keys) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"thread_id": "runtime-thread"})
+
+    before = sample("ide_orchestrator_deepagents_retries_total", endpoint="invoke", kind="retry")
+
+    assert await invoke(handler) == {"thread_id": "runtime-thread"}
+    assert keys == ["refinement-p-1"] * 3
+    assert sample("ide_orchestrator_deepagents_retries_total", endpoint="invoke", kind="retry") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_responses_and_attempt_limit(monkeypatch):
+    """Client errors are not retried; retryable failures stop after max attempts."""
+    calls = []
+
+    def bad_request(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400)
+
+    with pytest.raises(Exception, match="invoke failed: 400"):
+        await invoke(bad_request)
+    assert len(calls) == 1
+
+    monkeypatch.setenv("DEEPAGENTS_INVOKE_MAX_ATTEMPTS", "2")
+    calls.clear()
+
+    def unreachable(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    with pytest.raises(Exception, match="Network error"):
+        await invoke(unreachable)
+    assert len(calls) == 2
+
+
+def test_retry_budget_scales_with_traffic():
+    """The budget allows a floor of retries plus a fraction of recent requests."""
+    budget = RetryBudget(ratio=0.1, min_retries=2, window=60)
+
+    assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+
+    for _ in range(50):
+        budget.record_request()
+    assert [budget.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_stops_retries(monkeypatch):
+    """During an outage, retries stop once the budget is spent."""
+    monkeypatch.setenv("DEEPAGENTS_RETRY_BUDGET_MIN", "1")
+    monkeypatch.setenv("DEEPAGENTS_RETRY_BUDGET_RATIO", "0")
+    monkeypatch.setenv("DEEPAGENTS_INVOKE_BREAKER_FAIL_MAX", "100")
+    calls = []
+
+    def down(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(503)
+
+    before = sample("ide_orchestrator_deepagents_retry_budget_exhausted_total", endpoint="invoke")
+    for job in range(3):
+        with pytest.raises(Exception, match="503"):
+            await invoke(down, job_id=f"job-{job}")
+
+    assert len(calls) == 4
+    assert sample("ide_orchestrator_deepagents_retry_budget_exhausted_total", endpoint="invoke") == before + 3
+
+
+def test_latency_quantile_needs_samples():
+    """Hedge delays come from recent latencies once there are enough of them."""
+    tracker = LatencyTracker(size=100, min_samples=10)
+    for ms in range(1, 10):
+        tracker.record(ms / 1000)
+    assert tracker.quantile(0.95) is None
+
+    for ms in range(10, 101):
+        tracker.record(ms / 1000)
+    assert tracker.quantile(0.95) == pytest.approx(0.096)
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_over_stalled_attempt(monkeypatch):
+    """A stalled first attempt is hedged after the delay and the faster answer is used."""
+    monkeypatch.setenv("DEEPAGENTS_INVOKE_HEDGE", "true")
+    monkeypatch.setenv("DEEPAGENTS_INVOKE_HEDGE_DEFAULT_DELAY", "0.05")
+    attempts = []
+    cancelled = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.headers["Idempotency-Key"])
+        if len(attempts) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return httpx.Response(200, json={"thread_id": f"attempt-{len(attempts)}"})
+
+    before = sample("ide_orchestrator_deepagents_hedge_wins_total", endpoint="invoke")
+    start = time.perf_counter()
+
+    assert await invoke(handler) == {"thread_id": "attempt-2"}
+    assert time.perf_counter() - start < 1
+    assert attempts == ["refinement-p-1", "refinement-p-1"]
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert sample("ide_orchestrator_deepagents_hedge_wins_total", endpoint="invoke") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_fast_responses_are_not_hedged(monkeypatch):
+    """Attempts that answer within the hedge delay never send a second request."""
+    monkeypatch.setenv("DEEPAGENTS_INVOKE_HEDGE", "true")
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        return httpx.Response(200, json={"thread_id": "runtime-thread"})
+
+    for _ in range(5):
+        await invoke(handler)
+    assert len(attempts) == 5
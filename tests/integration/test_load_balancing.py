@@ -0,0 +1,138 @@
+"""
+Client-side load balancing integration tests.
+
+Covers instance selection strategies, health-check ejection, thread pinning
+through the runtime client and pin restoration from the cleanup outbox.
+"""
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from api.dependencies import get_database_url, get_db_pool
+from core import circuit_breaker, load_balancer
+from core.load_balancer import LoadBalancer
+from services.cleanup_queue import CleanupQueue
+from services.deepagents_client import DeepAgentsRuntimeClient
+
+URLS = ["http://runtime-a", "http://runtime-b", "http://runtime-c"]
+
+
+def settings(**overrides):
+    values = {
+        "strategy": "least_outstanding",
+        "pin_cache_size": 100,
+        "health_check_interval": 10.0,
+        "health_check_path": "/health",
+        "health_check_timeout": 1.0,
+        "unhealthy_threshold": 2,
+    }
+    values.update(overrides)
+    return values
+
+
+@pytest.fixture(autouse=True)
+def fresh_balancers(monkeypatch):
+    monkeypatch.setattr(load_balancer, "_balancers", {})
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+
+def test_least_outstanding_and_p2c_avoid_busy_instances():
+    """Both strategies steer new work away from loaded instances."""
+    balancer = LoadBalancer(URLS, settings())
+    with balancer.track("http://runtime-a"), balancer.track("http://runtime-b"):
+        assert {balancer.pick() for _ in range(20)} == {"http://runtime-c"}
+
+    p2c = LoadBalancer(URLS, settings(strategy="p2c"))
+    with p2c.track("http://runtime-a"), p2c.track("http://runtime-a"):
+        assert "http://runtime-a" not in {p2c.pick() for _ in range(50)}
+    assert REGISTRY.get_sample_value(
+        "ide_orchestrator_deepagents_instance_outstanding_requests", {"instance": "http://runtime-a"}
+    ) == 0
+
+
+def test_invalid_strategy(monkeypatch):
+    monkeypatch.setenv("DEEPAGENTS_LB_STRATEGY", "round_robin")
+    with pytest.raises(ValueError, match="Invalid DEEPAGENTS_LB_STRATEGY"):
+        load_balancer.get_balancer_settings()
+
+
+@pytest.mark.asyncio
+async def test_health_checks_eject_and_restore_instances():
+    """Instances failing consecutive health checks stop receiving new work until they recover."""
+    down = {"runtime-b"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/health"
+        return httpx.Response(503 if request.url.host in down else 200)
+
+    balancer = LoadBalancer(URLS[:2], settings())
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        await balancer.check_health(client)
+        assert balancer.instances["http://runtime-b"].healthy
+        await balancer.check_health(client)
+        assert not balancer.instances["http://runtime-b"].healthy
+        assert REGISTRY.get_sample_value(
+            "ide_orchestrator_deepagents_instance_healthy", {"instance": "http://runtime-b"}
+        ) == 0
+
+        with balancer.track("http://runtime-a"):
+            assert balancer.pick() == "http://runtime-a"
+
+        down.clear()
+        await balancer.check_health(client)
+        assert balancer.instances["http://runtime-b"].healthy
+
+
+@pytest.mark.asyncio
+async def test_thread_calls_follow_the_creating_instance():
+    """After invoke, state and cleanup for the thread go to the instance that created it."""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.host, request.url.path))
+        if request.url.path == "/invoke":
+            return httpx.Response(200, json={"thread_id": f"thread-on-{request.url.host}"})
+        if request.url.path == "/cleanup/batch":
+            return httpx.Response(204)
+        return httpx.Response(200, json={"status": "running"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        runtime = DeepAgentsRuntimeClient(URLS, client=client)
+        threads = [(await runtime.invoke_job({"job_id": f"job-{i}"}))["thread_id"] for i in range(6)]
+
+        for thread_id in threads:
+            host = thread_id.removeprefix("thread-on-")
+            assert runtime.runtime_endpoint(thread_id) == f"http://{host}"
+            await runtime.get_execution_state(thread_id)
+            assert await runtime.cleanup_thread_data(thread_id)
+            assert seen[-2:] == [(host, f"/state/{thread_id}"), (host, f"/cleanup/{thread_id}")]
+
+        seen.clear()
+        assert await runtime.cleanup_threads(threads) is True
+        batches = {host for host, path in seen if path == "/cleanup/batch"}
+        assert batches == {t.removeprefix("thread-on-") for t in threads}
+        assert len(seen) == len(batches)
+
+
+@pytest.mark.asyncio
+async def test_cleanup_worker_restores_pins_from_outbox():
+    """A thread unknown to this process is cleaned up on the instance recorded in the outbox."""
+    pool = await get_db_pool()
+    async with pool.connection() as conn:
+        await conn.execute("DELETE FROM cleanup_outbox")
+
+    hosts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        return httpx.Response(204)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        runtime = DeepAgentsRuntimeClient(URLS, client=client)
+        queue = CleanupQueue(get_database_url(), pool, runtime)
+        await queue.enqueue("thread-from-another-replica", "http://runtime-c")
+
+        assert await queue.drain_once() == 1
+
+    assert hosts == ["runtime-c"]
@@ -0,0 +1,135 @@
+"""
+Per-query-class lock timeout integration tests.
+
+Holds row locks from a separate connection and verifies that write paths
+fail fast with LockConflictError (HTTP 409) under lock_timeout, NOWAIT and
+SKIP LOCKED, and that lock waits are exported.
+"""
+
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+import psycopg
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from api.dependencies import get_database_url, get_db_pool, get_orchestration_service, get_workflow_service
+from core.locking import LockConflictError, get_lock_settings
+from tests.integration.refinement.shared.database_helpers import create_test_workflow_with_draft
+
+
+def lock_waits(query_class: str, outcome: str) -> float:
+    return REGISTRY.get_sample_value(
+        "ide_orchestrator_db_lock_wait_seconds_count",
+        {"query_class": query_class, "outcome": outcome}
+    ) or 0
+
+
+@asynccontextmanager
+async def holding_lock(sql: str, params):
+    """Hold FOR UPDATE locks from another transaction for the duration of the block."""
+    async with await psycopg.AsyncConnection.connect(get_database_url()) as conn:
+        async with conn.transaction():
+            await conn.execute(f"{sql} FOR UPDATE", params)
+            yield
+
+
+def test_lock_settings_overrides(monkeypatch):
+    """Class-specific settings override the global defaults."""
+    monkeypatch.setenv("DB_LOCK_TIMEOUT_MS", "1500")
+    monkeypatch.setenv("DB_PUBLISH_LOCK_TIMEOUT_MS", "100")
+    monkeypatch.setenv("DB_PUBLISH_LOCK_MODE", "NOWAIT")
+
+    assert get_lock_settings("publish") == {
+        "statement_timeout_ms": 5000, "lock_timeout_ms": 100, "lock_mode": "nowait"
+    }
+    assert get_lock_settings("draft")["lock_timeout_ms"] == 1500
+
+    monkeypatch.setenv("DB_DEPLOY_LOCK_MODE", "sometimes")
+    with pytest.raises(ValueError):
+        get_lock_settings("deploy")
+
+
+@pytest.mark.asyncio
+async def test_lock_timeout_fails_fast(monkeypatch):
+    """A held workflow lock makes publish give up after lock_timeout."""
+    monkeypatch.setenv("DB_PUBLISH_LOCK_TIMEOUT_MS", "200")
+    user_id = str(uuid.uuid4())
+    workflow_id, _ = await create_test_workflow_with_draft(user_id, "Lock Timeout", {})
+    workflow_service = await get_workflow_service()
+    before = lock_waits("publish", "conflict")
+
+    async with holding_lock("SELECT id FROM workflows WHERE id = %s", (workflow_id,)):
+        start = time.perf_counter()
+        with pytest.raises(LockConflictError):
+            await workflow_service.publish_draft(workflow_id, user_id)
+        assert time.perf_counter() - start < 2
+
+    assert lock_waits("publish", "conflict") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_nowait_and_uncontended_locks(monkeypatch):
+    """NOWAIT fails immediately when contended and acquires normally otherwise."""
+    monkeypatch.setenv("DB_DRAFT_LOCK_MODE", "nowait")
+    monkeypatch.setenv("DB_DRAFT_LOCK_TIMEOUT_MS", "60000")
+    user_id = str(uuid.uuid4())
+    workflow_id, draft_id = await create_test_workflow_with_draft(user_id, "Lock Nowait", {})
+    orchestration_service = await get_orchestration_service()
+    acquired_before = lock_waits("draft", "acquired")
+
+    async with holding_lock("SELECT id FROM workflows WHERE id = %s", (workflow_id,)):
+        start = time.perf_counter()
+        with pytest.raises(LockConflictError):
+            await orchestration_service.get_or_create_draft(workflow_id, user_id)
+        assert time.perf_counter() - start < 1
+
+    assert await orchestration_service.get_or_create_draft(workflow_id, user_id) == draft_id
+    assert lock_waits("draft", "acquired") == acquired_before + 1
+
+
+@pytest.mark.asyncio
+async def test_skip_locked_distinguishes_locked_from_missing(monkeypatch):
+    """SKIP LOCKED reports a conflict for locked rows and not-found for missing ones."""
+    monkeypatch.setenv("DB_DEPLOY_LOCK_MODE", "skip_locked")
+    user_id = str(uuid.uuid4())
+    workflow_id, _ = await create_test_workflow_with_draft(user_id, "Lock Skip", {})
+
+    pool = await get_db_pool()
+    async with pool.connection() as conn:
+        await conn.execute(
+            """
+            INSERT INTO versions (workflow_id, version_number, status, published_by_user_id)
+            VALUES (%s, 1, 'published', %s)
+            """,
+            (workflow_id, user_id)
+        )
+
+    workflow_service = await get_workflow_service()
+    async with holding_lock(
+        "SELECT id FROM versions WHERE workflow_id = %s AND version_number = 1", (workflow_id,)
+    ):
+        with pytest.raises(LockConflictError):
+            await workflow_service.deploy_version(workflow_id, 1, user_id)
+
+        with pytest.raises(ValueError, match="Version not found"):
+            await workflow_service.deploy_version(workflow_id, 2, user_id)
+
+
+@pytest.mark.asyncio
+async def test_locked_discard_returns_409(test_client: AsyncClient, jwt_manager, monkeypatch):
+    """Lock conflicts surface to clients as 409 Conflict."""
+    monkeypatch.setenv("DB_DRAFT_LOCK_MODE", "nowait")
+    user_id = str(uuid.uuid4())
+    workflow_id, _ = await create_test_workflow_with_draft(user_id, "Lock 409", {})
+    token = await jwt_manager.generate_token(user_id, "lock@example.com", [], 3600)
+
+    async with holding_lock("SELECT id FROM workflows WHERE id = %s", (workflow_id,)):
+        response = await test_client.delete(
+            f"/api/workflows/{workflow_id}/draft",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert response.status_code == 409
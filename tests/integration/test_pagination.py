@@ -0,0 +1,138 @@
+"""
+Keyset-paginated listing integration tests.
+
+Walks workflows, versions and proposals page by page and verifies ordering,
+cursor continuity and cursor validation.
+"""
+
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from api.dependencies import get_db_pool, get_orchestration_service, get_workflow_service
+from core.pagination import decode_cursor, encode_cursor
+from tests.integration.refinement.shared.database_helpers import (
+    create_test_user,
+    create_test_workflow_with_draft,
+)
+
+
+async def collect_pages(fetch, items_name: str, limit: int):
+    """Follow next_cursor until the last page, returning all pages."""
+    pages, cursor = [], None
+    while True:
+        page = await fetch(limit=limit, cursor=cursor)
+        pages.append(page[items_name])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip_and_validation():
+    """Cursors are opaque round-trippable strings; garbage is rejected."""
+    cursor = encode_cursor([3])
+    assert decode_cursor(cursor, 1) == [3]
+
+    for bad in ("not-a-cursor", encode_cursor([1, 2]), encode_cursor([])):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(bad, 1)
+
+
+@pytest.mark.asyncio
+async def test_list_workflows_pages():
+    """A user's workflows are returned newest first without gaps or repeats."""
+    user_id = await create_test_user(str(uuid.uuid4()))
+    workflow_service = await get_workflow_service()
+    created = [
+        (await workflow_service.create_workflow(f"Paged Workflow {i}", user_id))["id"]
+        for i in range(7)
+    ]
+
+    fetch = lambda **kw: workflow_service.list_workflows(user_id, **kw)
+    pages = await collect_pages(fetch, "workflows", limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    listed = [w["id"] for page in pages for w in page]
+    assert sorted(listed) == sorted(created)
+
+    keys = [(w["created_at"], w["id"]) for page in pages for w in page]
+    assert keys == sorted(keys, reverse=True)
+
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        await workflow_service.list_workflows(user_id, cursor=encode_cursor(["yesterday", "x"]))
+
+
+@pytest.mark.asyncio
+async def test_get_versions_pages():
+    """Versions page by descending version_number."""
+    user_id = str(uuid.uuid4())
+    workflow_id, _ = await create_test_workflow_with_draft(user_id, "Paged Versions", {})
+
+    pool = await get_db_pool()
+    async with pool.connection() as conn:
+        for number in range(1, 6):
+            await conn.execute(
+                """
+                INSERT INTO versions (workflow_id, version_number, status, published_by_user_id)
+                VALUES (%s, %s, 'published', %s)
+                """,
+                (workflow_id, number, user_id)
+            )
+
+    workflow_service = await get_workflow_service()
+    fetch = lambda **kw: workflow_service.get_versions(workflow_id, **kw)
+    pages = await collect_pages(fetch, "versions", limit=2)
+
+    assert [[v["version_number"] for v in page] for page in pages] == [[5, 4], [3, 2], [1]]
+
+
+@pytest.mark.asyncio
+async def test_list_workflow_proposals_pages():
+    """Proposals on a workflow's draft page newest first."""
+    user_id = str(uuid.uuid4())
+    workflow_id, draft_id = await create_test_workflow_with_draft(user_id, "Paged Proposals", {})
+    orchestration_service = await get_orchestration_service()
+
+    created = [
+        await orchestration_service.proposal_service.create_proposal(
+            draft_id, f"thread-{uuid.uuid4()}", user_id, f"Change {i}", {}
+        )
+        for i in range(5)
+    ]
+
+    fetch = lambda **kw: orchestration_service.list_workflow_proposals(workflow_id, **kw)
+    pages = await collect_pages(fetch, "proposals", limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sorted(p["id"] for page in pages for p in page) == sorted(created)
+
+    empty = await orchestration_service.list_workflow_proposals(str(uuid.uuid4()), 10)
+    assert empty == {"proposals": [], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+async def test_listing_endpoints(test_client: AsyncClient, jwt_manager):
+    """Listing routes accept limit and cursor and reject bad cursors with 400."""
+    user_id = str(uuid.uuid4())
+    workflow_id, _ = await create_test_workflow_with_draft(user_id, "Paged Endpoint", {})
+    headers = {
+        "Authorization": f"Bearer {await jwt_manager.generate_token(user_id, 'paged@example.com', [], 3600)}"
+    }
+
+    response = await test_client.get("/api/workflows?limit=1", headers=headers)
+    assert response.status_code == 200
+    assert [w["id"] for w in response.json()["workflows"]] == [workflow_id]
+    assert response.json()["next_cursor"] is None
+
+    response = await test_client.get(f"/api/workflows/{workflow_id}/proposals", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"proposals": [], "next_cursor": None}
+
+    response = await test_client.get(
+        f"/api/workflows/{workflow_id}/versions?cursor=garbage", headers=headers
+    )
+    assert response.status_code == 400
+
+    response = await test_client.get("/api/workflows?limit=0", headers=headers)
+    assert response.status_code == 422
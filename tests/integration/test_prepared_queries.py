@@ -0,0 +1,82 @@
+"""
+Prepared-statement registry integration tests.
+
+Verifies that hot queries are prepared once per pooled connection and that
+per-query call counts and latency are exported.
+"""
+
+import uuid
+
+import pytest
+from prometheus_client import REGISTRY
+
+from api.dependencies import get_database_url
+from core import database
+from core.queries import queries
+from services.proposal_service import ProposalService
+from services.workflow_service import WorkflowService
+
+
+def test_hot_queries_registered():
+    """The per-request lookups are all in the central registry."""
+    assert {
+        "get_workflow",
+        "get_proposal_by_thread_id",
+        "can_access_proposal",
+        "validate_draft_access",
+        "apply_files_to_draft",
+    } <= set(queries.names())
+
+
+def test_conflicting_registration_rejected():
+    """A name cannot be reused for a different statement."""
+    with pytest.raises(ValueError):
+        queries.register("get_workflow", "SELECT 1")
+
+
+@pytest.mark.asyncio
+async def test_statement_prepared_once_per_connection(monkeypatch):
+    """Repeated lookups reuse one server-side prepared statement."""
+    monkeypatch.setenv("DB_POOL_MIN_SIZE", "1")
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "1")
+    pool = database.create_pool(get_database_url(), name="prepared-test")
+    await pool.open(wait=True)
+
+    try:
+        workflow_service = WorkflowService(get_database_url(), pool)
+        for _ in range(5):
+            await workflow_service.get_workflow(str(uuid.uuid4()), str(uuid.uuid4()))
+
+        async with pool.connection() as conn:
+            cur = await conn.execute(
+                """
+                SELECT count(*) AS count FROM pg_prepared_statements
+                WHERE statement LIKE '%FROM workflows%created_by_user_id = $2%'
+                """
+            )
+            assert (await cur.fetchone())["count"] == 1
+
+            cur = await conn.execute("SHOW plan_cache_mode")
+            assert (await cur.fetchone())["plan_cache_mode"] == "force_generic_plan"
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_query_metrics_recorded():
+    """Each execution is counted and timed under its query name."""
+    labels = {"query": "get_proposal_by_thread_id"}
+    before = REGISTRY.get_sample_value(
+        "ide_orchestrator_db_query_duration_seconds_count", labels
+    ) or 0
+
+    proposal_service = ProposalService(
+        get_database_url(), await database.get_pool(get_database_url())
+    )
+    await proposal_service.get_proposal_by_thread_id(f"missing-{uuid.uuid4()}")
+    await proposal_service.get_proposal_by_thread_id(f"missing-{uuid.uuid4()}")
+
+    after = REGISTRY.get_sample_value(
+        "ide_orchestrator_db_query_duration_seconds_count", labels
+    )
+    assert after == before + 2
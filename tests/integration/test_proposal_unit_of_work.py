@@ -0,0 +1,106 @@
+"""
+Proposal approval unit-of-work integration tests.
+
+Verifies that approve and reject run lock, file apply, audit and resolution
+as one transaction on one pooled connection, and that concurrent resolutions
+of the same proposal serialize on the row lock.
+"""
+
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from api.dependencies import get_db_pool, get_orchestration_service
+from tests.integration.refinement.shared.database_helpers import create_test_workflow_with_draft
+
+
+async def create_completed_proposal(orchestration_service, user_id: str, draft_id: str) -> str:
+    """Create a proposal that has finished generating files."""
+    proposal_service = orchestration_service.proposal_service
+    proposal_id = await proposal_service.create_proposal(
+        draft_id, f"thread-{uuid.uuid4()}", user_id, "Add a step", {}
+    )
+    await proposal_service.update_proposal_results(
+        proposal_id,
+        "completed",
+        json.dumps({"events": []}),
+        {"/main.md": {"content": "# Refined", "type": "markdown"}}
+    )
+    return proposal_id
+
+
+@pytest.mark.asyncio
+async def test_approve_uses_one_connection():
+    """Approval borrows a single pooled connection for the whole unit of work."""
+    user_id = str(uuid.uuid4())
+    _, draft_id = await create_test_workflow_with_draft(user_id, "UoW Workflow", {"/main.md": "# Draft"})
+    orchestration_service = await get_orchestration_service()
+    proposal_id = await create_completed_proposal(orchestration_service, user_id, draft_id)
+
+    pool = await get_db_pool()
+    before = pool.get_stats().get("requests_num", 0)
+    await orchestration_service.approve_proposal(proposal_id, user_id)
+    assert pool.get_stats().get("requests_num", 0) - before == 1
+
+    files = await orchestration_service.draft_service.get_draft_files(draft_id)
+    assert files["/main.md"]["content"] == "# Refined"
+    proposal = await orchestration_service.get_proposal(proposal_id)
+    assert (proposal["status"], proposal["resolution"]) == ("resolved", "approved")
+
+
+@pytest.mark.asyncio
+async def test_failed_approval_rolls_back_applied_files(monkeypatch):
+    """An error after files are applied leaves the draft and proposal untouched."""
+    user_id = str(uuid.uuid4())
+    _, draft_id = await create_test_workflow_with_draft(user_id, "UoW Rollback", {"/main.md": "# Draft"})
+    orchestration_service = await get_orchestration_service()
+    proposal_id = await create_completed_proposal(orchestration_service, user_id, draft_id)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("audit failure")
+
+    monkeypatch.setattr(orchestration_service.audit_service, "add_approval_event", fail)
+
+    with pytest.raises(RuntimeError):
+        await orchestration_service.approve_proposal(proposal_id, user_id)
+
+    files = await orchestration_service.draft_service.get_draft_files(draft_id)
+    assert files["/main.md"]["content"] == "# Draft"
+    assert (await orchestration_service.get_proposal(proposal_id))["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_approve_and_reject_resolve_once():
+    """Racing approve and reject calls on one proposal produce exactly one resolution."""
+    user_id = str(uuid.uuid4())
+    _, draft_id = await create_test_workflow_with_draft(user_id, "UoW Race", {"/main.md": "# Draft"})
+    orchestration_service = await get_orchestration_service()
+    proposal_id = await create_completed_proposal(orchestration_service, user_id, draft_id)
+
+    async def attempt(i: int):
+        if i % 2:
+            await orchestration_service.reject_proposal(proposal_id, user_id)
+            return "rejected"
+        await orchestration_service.approve_proposal(proposal_id, user_id)
+        return "approved"
+
+    results = await asyncio.gather(*(attempt(i) for i in range(20)), return_exceptions=True)
+
+    winners = [r for r in results if isinstance(r, str)]
+    losers = [r for r in results if not isinstance(r, str)]
+    assert len(winners) == 1
+    assert all(isinstance(e, ValueError) and "already resolved" in str(e) for e in losers)
+
+    proposal = await orchestration_service.get_proposal(proposal_id)
+    assert (proposal["status"], proposal["resolution"]) == ("resolved", winners[0])
+
+    audit = proposal["ai_generated_content"]
+    if isinstance(audit, str):
+        audit = json.loads(audit)
+    assert {"approved", "rejected"} & set(audit) == {winners[0]}
+
+    files = await orchestration_service.draft_service.get_draft_files(draft_id)
+    expected = "# Refined" if winners[0] == "approved" else "# Draft"
+    assert files["/main.md"]["content"] == expected
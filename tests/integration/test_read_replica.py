@@ -0,0 +1,78 @@
+"""
+Read replica routing integration tests.
+
+A second pool against the same database stands in for the replica, so the
+tests verify routing decisions rather than replication itself.
+"""
+
+import uuid
+
+import pytest
+from prometheus_client import REGISTRY
+
+from api.dependencies import get_database_url
+from core import database
+from services.workflow_service import WorkflowService
+
+
+def reads(target: str) -> float:
+    return REGISTRY.get_sample_value(
+        "ide_orchestrator_db_read_only_queries_total", {"target": target}
+    ) or 0
+
+
+@pytest.fixture
+async def workflow_service():
+    pool = await database.get_pool(get_database_url())
+    read_pool = await database.get_pool(get_database_url(), name="replica")
+    return WorkflowService(get_database_url(), pool, read_pool)
+
+
+@pytest.mark.asyncio
+async def test_read_only_methods_use_replica(workflow_service):
+    """@read_only methods go to the replica; other methods stay on the primary."""
+    replica_before, primary_before = reads("replica"), reads("primary")
+
+    await workflow_service.get_versions(str(uuid.uuid4()))
+    await workflow_service.get_workflow(str(uuid.uuid4()), str(uuid.uuid4()))
+
+    assert reads("replica") == replica_before + 1
+    assert reads("primary") == primary_before
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_forces_primary(workflow_service):
+    """A user's reads stay on the primary inside the consistency window."""
+    user_id = str(uuid.uuid4())
+    replica_before, primary_before = reads("replica"), reads("primary")
+
+    with database.read_your_writes(user_id):
+        await workflow_service.get_versions(str(uuid.uuid4()))
+
+    database.record_write(user_id)
+    with database.read_your_writes(user_id):
+        await workflow_service.get_versions(str(uuid.uuid4()))
+
+    with database.use_primary():
+        await workflow_service.get_versions(str(uuid.uuid4()))
+
+    assert reads("replica") == replica_before + 1
+    assert reads("primary") == primary_before + 2
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_routes_back_to_primary(workflow_service, monkeypatch):
+    """Reads fall back to the primary while replica lag exceeds the threshold."""
+    monkeypatch.setattr(database, "_replica_lag", 30.0)
+    primary_before = reads("primary")
+
+    await workflow_service.get_versions(str(uuid.uuid4()))
+
+    assert reads("primary") == primary_before + 1
+
+
+@pytest.mark.asyncio
+async def test_replica_lag_check_on_primary():
+    """A server that is not in recovery reports zero lag."""
+    pool = await database.get_pool(get_database_url())
+    assert await database.check_replica_lag(pool) == 0
@@ -0,0 +1,152 @@
+"""
+Execution state cache integration tests.
+
+Drives DeepAgentsRuntimeClient.get_execution_state against a counting
+transport to verify terminal and running TTLs, invalidation on cleanup,
+single-flight sharing, LRU bounds and cache metrics.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from core import circuit_breaker, load_balancer
+from core.state_cache import StateCache
+from services.deepagents_client import DeepAgentsRuntimeClient
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(load_balancer, "_balancers", {})
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+
+def sample(result):
+    return REGISTRY.get_sample_value(
+        "ide_orchestrator_deepagents_state_cache_lookups_total", {"result": result}
+    ) or 0
+
+
+class Runtime:
+    """Transport handler serving scripted states and counting state requests."""
+
+    def __init__(self, status="completed", delay=0.0):
+        self.status = status
+        self.delay = delay
+        self.state_requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        self.state_requests += 1
+        await asyncio.sleep(self.delay)
+        if self.status == "error":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"status": self.status, "generated_files": {}})
+
+
+async def with_client(runtime, test):
+    async with httpx.AsyncClient(transport=httpx.MockTransport(runtime)) as client:
+        return await test(DeepAgentsRuntimeClient("http://runtime", client=client))
+
+
+@pytest.mark.asyncio
+async def test_terminal_state_cached_until_cleanup():
+    """Completed states are served from memory until the thread is cleaned up."""
+    runtime = Runtime("completed")
+    hits = sample("hit")
+
+    async def test(client):
+        for _ in range(3):
+            assert (await client.get_execution_state("thread-done"))["status"] == "completed"
+        assert runtime.state_requests == 1
+
+        # Callers get copies and cannot corrupt the cached state
+        (await client.get_execution_state("thread-done"))["status"] = "tampered"
+        assert (await client.get_execution_state("thread-done"))["status"] == "completed"
+
+        assert await client.cleanup_thread_data("thread-done")
+        await client.get_execution_state("thread-done")
+        assert runtime.state_requests == 2
+
+    await with_client(runtime, test)
+    assert sample("hit") == hits + 4
+
+
+@pytest.mark.asyncio
+async def test_running_state_expires_quickly(monkeypatch):
+    """Running states are reused only within the short TTL; long-polls bypass them."""
+    monkeypatch.setenv("DEEPAGENTS_STATE_CACHE_RUNNING_TTL", "0.05")
+    runtime = Runtime("running")
+
+    async def test(client):
+        await client.get_execution_state("thread-running")
+        await client.get_execution_state("thread-running")
+        assert runtime.state_requests == 1
+
+        await asyncio.sleep(0.06)
+        await client.get_execution_state("thread-running")
+        assert runtime.state_requests == 2
+
+        await client.get_execution_state("thread-running", wait=0.01)
+        assert runtime.state_requests == 3
+
+    await with_client(runtime, test)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_request():
+    """Simultaneous lookups for a thread are coalesced into one upstream request."""
+    runtime = Runtime("running", delay=0.05)
+    shared = sample("shared")
+
+    async def test(client):
+        states = await asyncio.gather(
+            *(client.get_execution_state("thread-busy") for _ in range(5))
+        )
+        assert [s["status"] for s in states] == ["running"] * 5
+
+    await with_client(runtime, test)
+    assert runtime.state_requests == 1
+    assert sample("shared") == shared + 4
+
+
+@pytest.mark.asyncio
+async def test_failures_are_shared_but_not_cached():
+    """A failed request fails every waiter and the next lookup retries upstream."""
+    runtime = Runtime("error", delay=0.02)
+
+    async def test(client):
+        results = await asyncio.gather(
+            *(client.get_execution_state("thread-broken") for _ in range(3)),
+            return_exceptions=True
+        )
+        assert all("500" in str(r) for r in results)
+        assert runtime.state_requests == 1
+
+        runtime.status = "failed"
+        assert (await client.get_execution_state("thread-broken"))["status"] == "failed"
+        assert runtime.state_requests == 2
+
+    await with_client(runtime, test)
+
+
+@pytest.mark.asyncio
+async def test_cache_size_is_bounded():
+    """The least recently used state is evicted once the cache is full."""
+    cache = StateCache({"max_size": 2, "running_ttl": 10, "terminal_ttl": 0})
+    fetches = []
+
+    def fetcher(thread_id):
+        async def fetch():
+            fetches.append(thread_id)
+            return {"status": "completed"}
+        return fetch
+
+    for thread_id in ["a", "b", "a", "c", "a", "b"]:
+        await cache.get(thread_id, fetcher(thread_id))
+
+    assert fetches == ["a", "b", "c", "b"]
+    assert REGISTRY.get_sample_value("ide_orchestrator_deepagents_state_cache_entries") == 2
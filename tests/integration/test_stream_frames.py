@@ -0,0 +1,128 @@
+"""
+Passthrough stream frame tests.
+
+Replays the recorded refinement stream to check that token frames are
+forwarded as received, that only state and end frames are parsed, and that
+sequence numbers are spliced in without changing the rest of the frame.
+Also checks that files deltas rebuild the full files state.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from core.stream_frames import StreamEvent, diff_files, sniff_event_type
+
+ALL_EVENTS = Path(__file__).resolve().parent.parent / "testdata" / "all_events.json"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"event_type": "on_llm_stream", "data": {}}', "on_llm_stream"),
+    ('  {"event_type":"end"}', "end"),
+    ('{"data": {"event_type": "end"}, "event_type": "on_llm_stream"}', None),
+    ('{"event_type": "on_\\u006cm"}', None),
+    ('{"event_type": 3}', None),
+    ('[{"event_type": "end"}]', None),
+])
+def test_sniff_event_type(text, expected):
+    """Only a leading, plain event_type key is trusted; anything else falls back to parsing."""
+    assert sniff_event_type(text) == expected
+
+
+def test_recorded_stream_passes_through_unparsed():
+    """Token frames keep their text; state and end frames are parsed for the hub."""
+    frames = [json.dumps(event) for event in json.loads(ALL_EVENTS.read_text())]
+
+    for seq, frame in enumerate(frames, 1):
+        event = StreamEvent.from_frame(frame)
+        original = json.loads(frame)
+        assert event.event_type == original["event_type"]
+        if event.event_type == "on_llm_stream":
+            assert event.parsed is None and event.text is frame
+        else:
+            assert event.parsed == original
+
+        event.number(seq)
+        assert event.text.endswith(frame[1:])
+        assert json.loads(event.text) == dict(original, seq=seq)
+
+
+def test_number_empty_and_orchestrator_frames():
+    """Splicing handles empty objects, and orchestrator events carry seq in their parsed form too."""
+    event = StreamEvent.from_frame("{}")
+    event.number(7)
+    assert json.loads(event.text) == {"seq": 7}
+
+    event = StreamEvent.from_dict({"event_type": "error", "data": {"error": "x"}})
+    event.number(8)
+    assert json.loads(event.text) == event.parsed == {"seq": 8, "event_type": "error", "data": {"error": "x"}}
+
+
+def apply_delta(files, delta):
+    """Apply a files delta the way a client would."""
+    files = dict(files)
+    for path in delta["removed"]:
+        del files[path]
+    files.update(delta["added"])
+    for path, file in delta["changed"].items():
+        if "patch" in file:
+            content = list(files[path]["content"])
+            for start, end, replacement in reversed(file["patch"]):
+                content[start:end] = replacement
+            file = {key: value for key, value in file.items() if key != "patch"}
+            file["content"] = content
+        files[path] = file
+    return files
+
+
+def recorded_files():
+    events = json.loads(ALL_EVENTS.read_text())
+    return next(event["data"]["files"] for event in events if "files" in event.get("data", {}))
+
+
+@pytest.mark.parametrize("lines", [False, True])
+def test_diff_files_rebuilds_state(lines):
+    """Added, changed and removed paths turn the previous state into the current one."""
+    previous = recorded_files()
+    current = dict(previous)
+    del current["/user_request.md"]
+    current["/new.md"] = {"content": ["new"], "created_at": "t1", "modified_at": "t1"}
+    plan = previous["/THE_SPEC/plan.md"]
+    current["/THE_SPEC/plan.md"] = dict(plan, content=plan["content"][:3] + ["edited"] + plan["content"][4:],
+                                        modified_at="t1")
+    current["/definition.json"] = dict(previous["/definition.json"], content=["{}"])
+
+    delta = diff_files(previous, current, lines)
+
+    assert delta["removed"] == ["/user_request.md"]
+    assert list(delta["added"]) == ["/new.md"]
+    assert sorted(delta["changed"]) == ["/THE_SPEC/plan.md", "/definition.json"]
+    assert apply_delta(previous, delta) == current
+    if lines:
+        # A one-line edit becomes a patch; a rewritten file keeps its full content
+        assert delta["changed"]["/THE_SPEC/plan.md"]["patch"] == [[3, 4, ["edited"]]]
+        assert "patch" not in delta["changed"]["/definition.json"]
+
+
+def test_files_delta_frame():
+    """The delta frame keeps the rest of the event and names the state it applies to."""
+    event = StreamEvent.from_dict({
+        "event_type": "on_state_update",
+        "data": {"messages": ["hi"], "files": {"/a.md": {"content": ["a"]}, "/b.md": {"content": ["b"]}}}
+    })
+    event.number(5)
+    event.base_seq, event.previous_files = 2, {"/a.md": {"content": ["a"]}}
+
+    frame = json.loads(event.files_delta())
+
+    assert frame == {
+        "seq": 5,
+        "event_type": "on_state_update",
+        "data": {
+            "messages": ["hi"],
+            "files_delta": {"added": {"/b.md": {"content": ["b"]}}, "changed": {}, "removed": [], "base_seq": 2},
+        },
+    }
+    assert event.files_delta() is event.files_delta()
+    assert StreamEvent.from_dict({"event_type": "on_state_update", "data": {}}).files is None
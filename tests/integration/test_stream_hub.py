@@ -0,0 +1,430 @@
+"""
+WebSocket stream hub integration tests.
+
+Runs a local WebSocket server standing in for deepagents-runtime and checks
+that subscribers of one thread share a single upstream connection, that the
+proposal is finalized exactly once, that the upstream is torn down when
+the last subscriber leaves, that reconnecting clients resume from the
+replay buffer, that slow or batching clients are served from bounded
+per-client queues and that delta clients get only changed files.
+"""
+
+import asyncio
+import json
+
+import pytest
+import websockets
+from prometheus_client import REGISTRY
+
+from core.stream_frames import StreamEvent
+from api.routers.websockets import proxy_websocket_with_state_extraction
+from core.stream_hub import ReplayBuffer, SendQueue, StreamHub, Subscription
+
+
+class Upstream:
+    """Local stream server sending the first event, then the rest once a client message arrives."""
+
+    def __init__(self, events):
+        self.events = events
+        self.connections = 0
+        self.closed = asyncio.Event()
+        self.received = []
+
+    async def handler(self, ws):
+        self.connections += 1
+        try:
+            await ws.send(json.dumps(self.events[0]))
+            self.received.append(await ws.recv())
+            for event in self.events[1:]:
+                await ws.send(json.dumps(event))
+            await ws.wait_closed()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.closed.set()
+
+
+EVENTS = [
+    {"event_type": "on_llm_stream", "data": {"chunk": "Hello"}},
+    {"event_type": "on_state_update", "data": {"files": {"/agent.md": "# Agent"}}},
+    {"event_type": "end", "data": {}},
+]
+
+
+class Outcomes:
+    def __init__(self):
+        self.ended = []
+        self.failed = []
+
+    def on_end(self, thread_id, files):
+        self.ended.append((thread_id, files))
+
+    def on_error(self, thread_id, error):
+        self.failed.append((thread_id, error))
+
+
+def settings(**overrides):
+    values = {
+        "replay_max_events": 100,
+        "replay_max_bytes": 1024 * 1024,
+        "replay_ttl": 60.0,
+        "replay_max_threads": 10,
+        "linger": 0.0,
+        "send_queue_size": 100,
+        "send_queue_policy": "block",
+        "batch_window": 0.01,
+        "batch_max_events": 32,
+    }
+    values.update(overrides)
+    return values
+
+
+def numbered(events, first=1):
+    return [dict(event, seq=seq) for seq, event in enumerate(events, first)]
+
+
+async def receive(subscription):
+    event = await subscription.next_event()
+    return None if event is None else json.loads(event.text)
+
+
+async def drain(subscription):
+    events = []
+    while (event := await receive(subscription)) is not None:
+        events.append(event)
+    return events
+
+
+@pytest.mark.asyncio
+async def test_subscribers_share_one_upstream():
+    """Two clients of one thread get every event over one upstream connection."""
+    upstream = Upstream(EVENTS)
+    outcomes = Outcomes()
+    hub = StreamHub(settings())
+
+    async with websockets.serve(upstream.handler, "127.0.0.1", 0) as server:
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/stream/thread-1"
+
+        async with hub.subscribe("thread-1", url, outcomes.on_end, outcomes.on_error) as first, \
+                hub.subscribe("thread-1", url, outcomes.on_end, outcomes.on_error) as second:
+            assert await receive(first) == numbered(EVENTS)[0]
+            assert await receive(second) == numbered(EVENTS)[0]
+            await second.send("client message")
+
+            assert await drain(first) == numbered(EVENTS)[1:]
+            assert await drain(second) == numbered(EVENTS)[1:]
+
+        assert upstream.connections == 1
+        assert upstream.received == ["client message"]
+        assert outcomes.ended == [("thread-1", {"/agent.md": "# Agent"})]
+        assert hub.streams == {}
+
+        # A finished thread is replayed from memory without reconnecting or finalizing again
+        async with hub.subscribe("thread-1", url, outcomes.on_end, outcomes.on_error, since=1) as late:
+            assert await drain(late) == numbered(EVENTS)[1:]
+        assert upstream.connections == 1
+        assert len(outcomes.ended) == 1
+
+        # Once the buffer is gone a reopened stream still does not finalize again
+        hub.buffers.clear()
+        async with hub.subscribe("thread-1", url, outcomes.on_end, outcomes.on_error) as late:
+            await late.send("resume")
+            assert (await drain(late))[-1]["event_type"] == "end"
+        assert upstream.connections == 2
+        assert upstream.received == ["client message", "resume"]
+        assert len(outcomes.ended) == 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_closed_after_last_subscriber_leaves():
+    """The upstream stays open while anyone watches and closes after the last one leaves."""
+    upstream = Upstream(EVENTS)
+    outcomes = Outcomes()
+    hub = StreamHub(settings())
+
+    async with websockets.serve(upstream.handler, "127.0.0.1", 0) as server:
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/stream/thread-2"
+
+        async with hub.subscribe("thread-2", url, outcomes.on_end, outcomes.on_error) as first:
+            await first.next_event()
+            async with hub.subscribe("thread-2", url, outcomes.on_end, outcomes.on_error):
+                pass
+            assert not upstream.closed.is_set()
+            assert "thread-2" in hub.streams
+
+        await asyncio.wait_for(upstream.closed.wait(), timeout=1)
+        assert hub.streams == {}
+        assert outcomes.ended == [] and outcomes.failed == []
+
+
+@pytest.mark.asyncio
+async def test_connect_failure_reports_error_event():
+    """Subscribers get an error event when deepagents-runtime is unreachable."""
+    outcomes = Outcomes()
+    hub = StreamHub(settings())
+
+    async with hub.subscribe("thread-3", "ws://127.0.0.1:9/stream/thread-3",
+                             outcomes.on_end, outcomes.on_error) as subscription:
+        events = await asyncio.wait_for(drain(subscription), timeout=5)
+
+    assert events == [{"event_type": "error", "data": {"error": "Failed to connect to AI service"}}]
+    assert outcomes.failed == []
+
+
+@pytest.mark.asyncio
+async def test_reconnect_resumes_from_sequence_number():
+    """A client dropping mid-stream reconnects within the linger time and misses nothing."""
+    upstream = Upstream(EVENTS)
+    outcomes = Outcomes()
+    hub = StreamHub(settings(linger=5.0))
+
+    async with websockets.serve(upstream.handler, "127.0.0.1", 0) as server:
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/stream/thread-4"
+
+        async with hub.subscribe("thread-4", url, outcomes.on_end, outcomes.on_error) as first:
+            last_seen = (await receive(first))["seq"]
+            # Drop the connection right after asking for the rest of the stream
+            await first.send("continue")
+
+        async with hub.subscribe("thread-4", url, outcomes.on_end, outcomes.on_error,
+                                 since=last_seen) as resumed:
+            assert await asyncio.wait_for(drain(resumed), timeout=2) == numbered(EVENTS)[1:]
+
+    assert upstream.connections == 1
+    assert len(outcomes.ended) == 1
+
+
+def test_replay_buffer_bounds_and_gaps():
+    """The buffer evicts by count, bytes and age and reports evicted ranges as gaps."""
+    buffer = ReplayBuffer(settings(replay_max_events=3, replay_max_bytes=300))
+    for i in range(5):
+        buffer.append(StreamEvent("on_llm_stream", '{"event_type": "on_llm_stream"}'))
+    assert [seq for seq, _, _, _ in buffer.events] == [3, 4, 5]
+    assert buffer.events[0][3].text == '{"seq": 3, "event_type": "on_llm_stream"}'
+
+    missed, events = buffer.since(3)
+    assert not missed and [e.seq for e in events] == [4, 5]
+    missed, events = buffer.since(1)
+    assert missed and [e.seq for e in events] == [3, 4, 5]
+
+    buffer.append(StreamEvent("on_state_update", "{" + " " * 240 + "}"))
+    assert [seq for seq, _, _, _ in buffer.events] == [5, 6] and buffer.size <= 300
+
+    buffer.settings["replay_ttl"] = 0.0
+    missed, events = buffer.since(5)
+    assert missed and events == []
+
+
+def token(i):
+    event = StreamEvent("on_llm_stream", "{}")
+    event.seq = i
+    return event
+
+
+def update(i):
+    event = StreamEvent("on_state_update", "{}")
+    event.seq = i
+    return event
+
+
+def dropped(event_type, policy):
+    return REGISTRY.get_sample_value(
+        "ide_orchestrator_stream_send_queue_dropped_total",
+        {"event_type": event_type, "policy": policy}
+    ) or 0
+
+
+@pytest.mark.asyncio
+async def test_send_queue_drop_policy():
+    """New stream events are dropped when full; other events displace queued stream events."""
+    queue = SendQueue(2, "drop")
+    before = dropped("on_llm_stream", "drop")
+    for i in range(1, 4):
+        await queue.put(token(i))
+    await queue.put(update(4))
+
+    assert [e.seq for e in queue.items] == [2, 4]
+    assert dropped("on_llm_stream", "drop") == before + 2
+    assert not queue.overflowed
+
+
+@pytest.mark.asyncio
+async def test_send_queue_coalesce_policy_disconnects_when_nothing_droppable():
+    """Newer stream events supersede older ones; a full queue of state updates disconnects."""
+    queue = SendQueue(2, "coalesce")
+    for i in range(1, 4):
+        await queue.put(token(i))
+    assert [e.seq for e in queue.items] == [2, 3]
+
+    await queue.put(update(4))
+    await queue.put(update(5))
+    assert [e.seq for e in queue.items] == [4, 5]
+
+    await queue.put(update(6))
+    assert queue.overflowed
+    assert await queue.get() is None
+
+
+@pytest.mark.asyncio
+async def test_send_queue_block_policy_waits_for_consumer():
+    """With the block policy the producer waits until the client takes an event."""
+    queue = SendQueue(1, "block")
+    await queue.put(token(1))
+    producer = asyncio.create_task(queue.put(token(2)))
+    await asyncio.sleep(0.01)
+    assert not producer.done()
+
+    assert (await queue.get()).seq == 1
+    await asyncio.wait_for(producer, timeout=1)
+    assert (await queue.get()).seq == 2
+
+    # Closing releases a blocked producer without queueing its event
+    await queue.put(token(3))
+    producer = asyncio.create_task(queue.put(token(4)))
+    await asyncio.sleep(0.01)
+    queue.close()
+    await asyncio.wait_for(producer, timeout=1)
+    assert [e.seq for e in queue.items] == [3]
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_disconnected_without_stalling_others():
+    """A client that stops reading is cut off while other subscribers get every event."""
+    upstream = Upstream(EVENTS)
+    outcomes = Outcomes()
+    hub = StreamHub(settings(send_queue_size=2, send_queue_policy="disconnect"))
+
+    async with websockets.serve(upstream.handler, "127.0.0.1", 0) as server:
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/stream/thread-5"
+
+        async with hub.subscribe("thread-5", url, outcomes.on_end, outcomes.on_error) as slow, \
+                hub.subscribe("thread-5", url, outcomes.on_end, outcomes.on_error) as fast:
+            assert await receive(fast) == numbered(EVENTS)[0]
+            await fast.send("continue")
+            assert await asyncio.wait_for(drain(fast), timeout=2) == numbered(EVENTS)[1:]
+
+            assert slow.overflowed
+            assert await slow.next_event() is None
+
+    assert len(outcomes.ended) == 1
+
+
+@pytest.mark.asyncio
+async def test_next_batch_groups_consecutive_stream_events():
+    """Runs of stream events are batched up to the size cap; other events end a batch."""
+    subscription = Subscription(None, settings())
+    for event in [token(1), token(2), token(3), update(4), token(5)]:
+        subscription.queue.push(event)
+    before = REGISTRY.get_sample_value("ide_orchestrator_stream_batch_events_count") or 0
+
+    assert [e.seq for e in await subscription.next_batch(2, 0.01)] == [1, 2]
+    assert [e.seq for e in await subscription.next_batch(32, 0.01)] == [3]
+    assert [e.seq for e in await subscription.next_batch(32, 0.01)] == [4]
+
+    # A lone stream event is sent once the window passes
+    late = asyncio.get_running_loop().call_later(0.005, subscription.queue.push, token(6))
+    assert [e.seq for e in await subscription.next_batch(32, 0.05)] == [5, 6]
+    subscription.queue.close()
+    assert await subscription.next_batch(32, 0.01) is None
+    assert subscription.last_seq == 6
+    assert REGISTRY.get_sample_value("ide_orchestrator_stream_batch_events_count") == before + 3
+
+
+class FakeClient:
+    """Client socket that never sends and records the frames it receives."""
+
+    def __init__(self):
+        self.frames = []
+
+    async def receive_text(self):
+        await asyncio.Event().wait()
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+
+@pytest.mark.asyncio
+async def test_proxy_sends_array_frames_when_batching():
+    """Opted-in clients get stream events in array frames and other events as objects."""
+    subscription = Subscription(None, settings())
+    frames = [
+        '{"event_type": "on_llm_stream", "data": {"raw_event": "a"}}',
+        '{"event_type": "on_llm_stream", "data": {"raw_event": "b"}}',
+        '{"event_type": "end", "data": {}}',
+    ]
+    for seq, frame in enumerate(frames, 1):
+        event = StreamEvent.from_frame(frame)
+        event.number(seq)
+        subscription.queue.push(event)
+    subscription.queue.close()
+
+    client = FakeClient()
+    await proxy_websocket_with_state_extraction(client, subscription, "thread-6", "user-1", batch=True)
+
+    assert client.frames == [
+        [
+            {"seq": 1, "event_type": "on_llm_stream", "data": {"raw_event": "a"}},
+            {"seq": 2, "event_type": "on_llm_stream", "data": {"raw_event": "b"}},
+        ],
+        {"seq": 3, "event_type": "end", "data": {}},
+    ]
+
+
+def state_update(files):
+    return StreamEvent.from_dict({"event_type": "on_state_update", "data": {"files": files}})
+
+
+@pytest.mark.asyncio
+async def test_delta_client_gets_changed_files_and_snapshots():
+    """The first state update goes out in full, later ones as deltas, and a resync sends a snapshot."""
+    buffer = ReplayBuffer(settings())
+    subscription = Subscription(None, settings(), buffer, delta="files")
+    full = Subscription(None, settings(), buffer)
+    for files in ({"/a.md": "a"}, {"/a.md": "a", "/b.md": "b"}, {"/b.md": "b2"}):
+        event = state_update(files)
+        buffer.append(event)
+        subscription.queue.push(event)
+        full.queue.push(event)
+    subscription.resync()
+    event = state_update({"/b.md": "b3"})
+    buffer.append(event)
+    subscription.queue.push(event)
+    subscription.queue.close()
+
+    frames = []
+    while (event := await subscription.next_event()) is not None:
+        frames.append(json.loads(subscription.frame(event)))
+
+    assert frames[0]["data"] == {"files": {"/a.md": "a"}}
+    assert frames[1]["data"] == {"files_delta": {
+        "added": {"/b.md": "b"}, "changed": {}, "removed": [], "base_seq": 1
+    }}
+    assert frames[2]["data"]["files_delta"] == {
+        "added": {}, "changed": {"/b.md": "b2"}, "removed": ["/a.md"], "base_seq": 2
+    }
+    assert frames[3] == {"event_type": "files_snapshot", "data": {"base_seq": 3, "files": {"/b.md": "b2"}}}
+    assert frames[4]["data"]["files_delta"]["base_seq"] == 3
+    # Clients that did not opt in still get every state in full
+    assert json.loads(full.frame(await full.next_event()))["data"] == {"files": {"/a.md": "a"}}
+    assert "files" in json.loads(full.frame(await full.next_event()))["data"]
+
+
+@pytest.mark.asyncio
+async def test_delta_client_resyncs_after_replay_gap():
+    """A delta client resuming past evicted events gets the current files as a snapshot."""
+    hub = StreamHub(settings(replay_max_events=2))
+    buffer = hub._buffer("thread-9")
+    for files in ({"/a.md": "a"}, {"/a.md": "a2"}, {"/a.md": "a3"}):
+        buffer.append(state_update(files))
+    buffer.append(StreamEvent.from_dict({"event_type": "end", "data": {}}))
+    buffer.finished = True
+
+    async with hub.subscribe("thread-9", "ws://unused", Outcomes().on_end, Outcomes().on_error,
+                             since=1, delta="lines") as subscription:
+        frames = []
+        while (event := await subscription.next_event()) is not None:
+            frames.append(json.loads(subscription.frame(event)))
+
+    assert [frame["event_type"] for frame in frames] == ["replay_gap", "on_state_update", "end", "files_snapshot"]
+    assert frames[1]["data"] == {"files": {"/a.md": "a3"}}
+    assert frames[3]["data"] == {"base_seq": 3, "files": {"/a.md": "a3"}}
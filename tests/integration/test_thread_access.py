@@ -0,0 +1,40 @@
+"""
+WebSocket thread authorization integration tests.
+
+Verifies the single-query thread access check used by the WebSocket
+handshake.
+"""
+
+import uuid
+
+import pytest
+
+from api.dependencies import get_orchestration_service
+from api.routers.websockets import can_access_thread
+from tests.integration.refinement.shared.database_helpers import (
+    create_test_user,
+    create_test_workflow_with_draft,
+)
+
+
+@pytest.mark.asyncio
+async def test_thread_access_single_query():
+    """Owner gets proposal id, status and runtime instance; other users and unknown threads get nothing."""
+    owner_id = str(uuid.uuid4())
+    other_user_id = await create_test_user(str(uuid.uuid4()))
+    _, draft_id = await create_test_workflow_with_draft(owner_id, "Thread Access Workflow", {})
+
+    orchestration_service = await get_orchestration_service()
+    thread_id = f"thread-{uuid.uuid4()}"
+    proposal_id = await orchestration_service.proposal_service.create_proposal(
+        draft_id, thread_id, owner_id, "Add a step", {}, runtime_endpoint="http://runtime-1"
+    )
+
+    access = await orchestration_service.get_thread_access(thread_id, owner_id)
+    assert access == {"id": proposal_id, "status": "processing", "runtime_endpoint": "http://runtime-1"}
+
+    assert await orchestration_service.get_thread_access(thread_id, other_user_id) is None
+    assert await orchestration_service.get_thread_access(f"missing-{uuid.uuid4()}", owner_id) is None
+
+    assert await can_access_thread(owner_id, thread_id) is True
+    assert await can_access_thread(other_user_id, thread_id) is False
@@ -0,0 +1,89 @@
+"""
+Startup warm-up integration tests.
+
+Runs the warm-up against the test database and a MockTransport runtime to
+verify pre-connection, template preloading, non-fatal step failures and the
+readiness probe.
+"""
+
+import httpx
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from api.dependencies import get_database_url
+from core import database, load_balancer, templates, warmup
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(load_balancer, "_balancers", {})
+    monkeypatch.setattr(templates, "_templates", None)
+    monkeypatch.setenv("DEEPAGENTS_RUNTIME_URL", "http://localhost:8000")
+    monkeypatch.delenv("DEEPAGENTS_RUNTIME_URLS", raising=False)
+    monkeypatch.delenv("DEEPAGENTS_RUNTIME_WS_URL", raising=False)
+    warmup.reset()
+    yield
+    warmup.reset()
+
+
+def settings(**overrides):
+    values = {"enabled": True, "timeout": 2.0, "connections": 3}
+    values.update(overrides)
+    return values
+
+
+@pytest.mark.asyncio
+async def test_warm_up_preconnects_and_preloads():
+    """Every step succeeds and the runtime sees one request per warm connection."""
+    requests = []
+
+    def runtime(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(200)
+
+    pool = await database.get_pool(get_database_url())
+    async with httpx.AsyncClient(transport=httpx.MockTransport(runtime)) as client:
+        results = await warmup.warm_up([pool], client, settings())
+
+    assert results == {"dns": "ok", "http": "ok", "database": "ok", "templates": "ok"}
+    assert requests == ["/health"] * 3
+    assert set(templates._templates) == {"multi-agent", "single-agent"}
+    assert warmup.is_ready()
+    assert REGISTRY.get_sample_value("ide_orchestrator_ready") == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_step_does_not_block_readiness():
+    """An unreachable runtime is reported but the instance still becomes ready."""
+    def runtime(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused")
+
+    pool = await database.get_pool(get_database_url())
+    async with httpx.AsyncClient(transport=httpx.MockTransport(runtime)) as client:
+        results = await warmup.warm_up([pool], client, settings())
+
+    assert results["http"].startswith("ConnectError")
+    assert results["database"] == "ok"
+    assert warmup.is_ready()
+    assert REGISTRY.get_sample_value(
+        "ide_orchestrator_warmup_step_duration_seconds", {"step": "http", "outcome": "failed"}
+    ) is not None
+
+
+@pytest.mark.asyncio
+async def test_ready_probe_waits_for_warm_up(test_client: AsyncClient):
+    """/ready returns 503 until warm-up finishes; /health is always healthy."""
+    for path in ["/ready", "/api/ready"]:
+        response = await test_client.get(path)
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+    assert (await test_client.get("/health")).status_code == 200
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200))) as client:
+        await warmup.warm_up([], client, settings(enabled=False))
+
+    for path in ["/ready", "/api/ready"]:
+        response = await test_client.get(path)
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}